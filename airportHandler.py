@@ -0,0 +1,22 @@
+from p2app.engine import query_builder
+
+
+def airport_search(myCursor, event, chunk_size = query_builder.DEFAULT_CHUNK_SIZE):
+    """
+    Search for airports in the database by any combination of their columns, streaming
+    the results from the cursor in chunks rather than fetching them all at once.
+
+    Args:
+        myCursor (sqlite3.Cursor): The SQLite cursor to execute the query.
+        event: A StartAirportSearchEvent, whose criteria map columns to values or to
+            (operator, value) tuples.
+        chunk_size (int): The number of rows fetched from the cursor at a time.
+
+    Yields:
+        Airport: Each Airport matching the search criteria, fetched while the query is still running.
+
+    Raises:
+        ValueError: If the criteria name a column or operator that isn't known.
+    """
+    predicates = query_builder.predicates_from('airport', event.criteria())
+    yield from query_builder.search(myCursor, 'airport', predicates, chunk_size)
@@ -0,0 +1,255 @@
+# p2app/events/airports.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# The representation of airports, which events related to them carry.
+
+from collections import namedtuple
+
+
+
+Airport = namedtuple(
+    'Airport',
+    ['airport_id', 'airport_ident', 'type', 'name', 'latitude_deg', 'longitude_deg',
+     'elevation_ft', 'continent_id', 'country_id', 'region_id', 'municipality',
+     'scheduled_service', 'gps_code', 'iata_code', 'local_code', 'home_link',
+     'wikipedia_link', 'keywords'])
+
+Airport.__annotations__ = {
+    'airport_id': int | None,
+    'airport_ident': str | None,
+    'type': str | None,
+    'name': str | None,
+    'latitude_deg': float | None,
+    'longitude_deg': float | None,
+    'elevation_ft': int | None,
+    'continent_id': str | None,
+    'country_id': int | None,
+    'region_id': int | None,
+    'municipality': str | None,
+    'scheduled_service': int | None,
+    'gps_code': str | None,
+    'iata_code': str | None,
+    'local_code': str | None,
+    'home_link': str | None,
+    'wikipedia_link': str | None,
+    'keywords': str | None
+}
+
+
+
+class StartAirportSearchEvent:
+    def __init__(self, criteria: dict, time_budget: float | None = None):
+        # criteria maps each column to a value it must equal, or to an (operator, value)
+        # tuple, such as ('>=', 5000) or ('like', 'San %')
+        self._criteria = criteria
+        self._time_budget = time_budget
+
+
+    def criteria(self) -> dict:
+        return self._criteria
+
+
+    def time_budget(self) -> float | None:
+        return self._time_budget
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: criteria = {repr(self._criteria)}'
+
+
+
+class AirportSearchResultEvent:
+    def __init__(self, airport: Airport):
+        self._airport = airport
+
+
+    def airport(self) -> Airport:
+        return self._airport
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: airport = {repr(self._airport)}'
+
+
+
+class StartNearestAirportsEvent:
+    def __init__(self, latitude: float, longitude: float, count: int,
+                 airport_type: str | None = None, scheduled_service: bool | None = None):
+        self._latitude = latitude
+        self._longitude = longitude
+        self._count = count
+        self._airport_type = airport_type
+        self._scheduled_service = scheduled_service
+
+
+    def latitude(self) -> float:
+        return self._latitude
+
+
+    def longitude(self) -> float:
+        return self._longitude
+
+
+    def count(self) -> int:
+        return self._count
+
+
+    def airport_type(self) -> str | None:
+        return self._airport_type
+
+
+    def scheduled_service(self) -> bool | None:
+        return self._scheduled_service
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: latitude = {repr(self._latitude)}, longitude = {repr(self._longitude)}, ' + \
+               f'count = {repr(self._count)}, airport_type = {repr(self._airport_type)}, ' + \
+               f'scheduled_service = {repr(self._scheduled_service)}'
+
+
+
+class StartAirportsWithinRadiusEvent:
+    def __init__(self, latitude: float, longitude: float, radius_km: float,
+                 airport_type: str | None = None, scheduled_service: bool | None = None):
+        self._latitude = latitude
+        self._longitude = longitude
+        self._radius_km = radius_km
+        self._airport_type = airport_type
+        self._scheduled_service = scheduled_service
+
+
+    def latitude(self) -> float:
+        return self._latitude
+
+
+    def longitude(self) -> float:
+        return self._longitude
+
+
+    def radius_km(self) -> float:
+        return self._radius_km
+
+
+    def airport_type(self) -> str | None:
+        return self._airport_type
+
+
+    def scheduled_service(self) -> bool | None:
+        return self._scheduled_service
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: latitude = {repr(self._latitude)}, longitude = {repr(self._longitude)}, ' + \
+               f'radius_km = {repr(self._radius_km)}, airport_type = {repr(self._airport_type)}, ' + \
+               f'scheduled_service = {repr(self._scheduled_service)}'
+
+
+
+class StartAirportsInBoxEvent:
+    def __init__(self, min_latitude: float, min_longitude: float, max_latitude: float, max_longitude: float,
+                 airport_type: str | None = None, scheduled_service: bool | None = None):
+        self._min_latitude = min_latitude
+        self._min_longitude = min_longitude
+        self._max_latitude = max_latitude
+        self._max_longitude = max_longitude
+        self._airport_type = airport_type
+        self._scheduled_service = scheduled_service
+
+
+    def min_latitude(self) -> float:
+        return self._min_latitude
+
+
+    def min_longitude(self) -> float:
+        return self._min_longitude
+
+
+    def max_latitude(self) -> float:
+        return self._max_latitude
+
+
+    def max_longitude(self) -> float:
+        return self._max_longitude
+
+
+    def airport_type(self) -> str | None:
+        return self._airport_type
+
+
+    def scheduled_service(self) -> bool | None:
+        return self._scheduled_service
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: min_latitude = {repr(self._min_latitude)}, ' + \
+               f'min_longitude = {repr(self._min_longitude)}, max_latitude = {repr(self._max_latitude)}, ' + \
+               f'max_longitude = {repr(self._max_longitude)}, airport_type = {repr(self._airport_type)}, ' + \
+               f'scheduled_service = {repr(self._scheduled_service)}'
+
+
+
+class NearbyAirportEvent:
+    def __init__(self, airport: Airport, distance_km: float):
+        self._airport = airport
+        self._distance_km = distance_km
+
+
+    def airport(self) -> Airport:
+        return self._airport
+
+
+    def distance_km(self) -> float:
+        return self._distance_km
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: airport = {repr(self._airport)}, distance_km = {repr(self._distance_km)}'
+
+
+
+class StartDistanceMatrixEvent:
+    def __init__(self, from_ids: list[int], to_ids: list[int] | None = None):
+        self._from_ids = from_ids
+        self._to_ids = to_ids
+
+
+    def from_ids(self) -> list[int]:
+        return self._from_ids
+
+
+    def to_ids(self) -> list[int] | None:
+        return self._to_ids
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: from_ids = {repr(self._from_ids)}, to_ids = {repr(self._to_ids)}'
+
+
+
+class DistanceMatrixEvent:
+    def __init__(self, from_ids: list[int], to_ids: list[int], distances):
+        # distances is a NumPy array, whose element [i, j] is the distance, in
+        # kilometers, from airport from_ids[i] to airport to_ids[j]
+        self._from_ids = from_ids
+        self._to_ids = to_ids
+        self._distances = distances
+
+
+    def from_ids(self) -> list[int]:
+        return self._from_ids
+
+
+    def to_ids(self) -> list[int]:
+        return self._to_ids
+
+
+    def distances(self):
+        return self._distances
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: from_ids = {repr(self._from_ids)}, to_ids = {repr(self._to_ids)}, ' + \
+               f'distances = {repr(self._distances)}'
@@ -35,3 +35,23 @@ class QuitInitiatedEvent:
 class EndApplicationEvent:
     def __repr__(self) -> str:
         return f'{type(self).__name__}'
+
+
+
+class CancelSearchEvent:
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}'
+
+
+
+class SearchTruncatedEvent:
+    def __init__(self, reason: str):
+        self._reason = reason
+
+
+    def reason(self) -> str:
+        return self._reason
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: reason = {repr(self._reason)}'
@@ -0,0 +1,144 @@
+# p2app/engine/autocomplete.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# An in-memory index of the names and codes of continents, countries, regions and
+# airports, which completes a prefix typed by the user without a trip to the
+# database on every keystroke.
+#
+# The index is a sorted list of (key, table, id) tuples, where each key is a
+# normalized name or code, so the entries starting with a prefix are found by
+# bisecting to the first of them and reading forward.  Saving a record replaces
+# its entries in place, rather than rebuilding the index.
+
+import bisect
+from collections import namedtuple
+
+from p2app.engine.text import fold
+from p2app.events.searches import AutocompleteMatch
+
+
+AutocompleteTable = namedtuple('AutocompleteTable', ['table', 'id_column', 'code_columns', 'name_column'])
+
+
+AUTOCOMPLETE_TABLES = {
+    'continent': AutocompleteTable('continent', 'continent_id', ('continent_code',), 'name'),
+    'country': AutocompleteTable('country', 'country_id', ('country_code',), 'name'),
+    'region': AutocompleteTable('region', 'region_id', ('region_code',), 'name'),
+    'airport': AutocompleteTable('airport', 'airport_id', ('airport_ident', 'iata_code'), 'name')
+}
+
+
+class AutocompleteIndex:
+    """A sorted index of the normalized names and codes of records, keyed by the name
+    of their table and their primary key."""
+
+    def __init__(self):
+        """Initializes an empty index"""
+        self._keys = []
+        self._records = {}
+
+    @classmethod
+    def load(cls, connection):
+        """
+        Build an index of every record in the tables of AUTOCOMPLETE_TABLES.
+
+        Args:
+            connection (sqlite3.Connection): The connection to the database.
+
+        Returns:
+            AutocompleteIndex: The index.
+        """
+        index = cls()
+        for autocomplete_table in AUTOCOMPLETE_TABLES.values():
+            columns = ', '.join((autocomplete_table.id_column, autocomplete_table.name_column,
+                                 *autocomplete_table.code_columns))
+            for entity_id, name, *codes in connection.execute(f"SELECT {columns} FROM {autocomplete_table.table}"):
+                keys = _entity_keys(autocomplete_table.table, entity_id, name, codes)
+                index._records[(autocomplete_table.table, entity_id)] = (codes[0], name, keys)
+                index._keys.extend(keys)
+        index._keys.sort()
+        return index
+
+    def update(self, table, record):
+        """
+        Replace the entries of a record that has been saved, whether it was a new
+        record or a change to an existing one.
+
+        Args:
+            table (str): The name of the record's table.
+            record: The record (e.g., a Continent, Country or Region namedtuple).
+        """
+        autocomplete_table = AUTOCOMPLETE_TABLES.get(table)
+        if autocomplete_table is None:
+            return
+
+        entity_id = getattr(record, autocomplete_table.id_column)
+        self.remove(table, entity_id)
+
+        name = getattr(record, autocomplete_table.name_column)
+        codes = [getattr(record, column) for column in autocomplete_table.code_columns]
+        keys = _entity_keys(table, entity_id, name, codes)
+        self._records[(table, entity_id)] = (codes[0], name, keys)
+        for key in keys:
+            bisect.insort(self._keys, key)
+
+    def remove(self, table, entity_id):
+        """
+        Remove the entries of a record, if it's in the index.
+
+        Args:
+            table (str): The name of the record's table.
+            entity_id (int): The record's primary key.
+        """
+        entry = self._records.pop((table, entity_id), None)
+        if entry is None:
+            return
+
+        for key in entry[2]:
+            position = bisect.bisect_left(self._keys, key)
+            if position < len(self._keys) and self._keys[position] == key:
+                del self._keys[position]
+
+    def complete(self, prefix, limit = 10, tables = None):
+        """
+        Find the records whose names or codes start with a prefix.
+
+        Args:
+            prefix (str): What the user has typed so far.
+            limit (int): The largest number of matches to return.
+            tables (Iterable[str] or None): The tables to match records from; None means all.
+
+        Returns:
+            list[AutocompleteMatch]: The matches, in the order of the keys that matched
+            (so a shorter name or code matching exactly comes before longer ones).
+        """
+        folded = fold(prefix).strip()
+        if not folded or limit <= 0:
+            return []
+        tables = None if tables is None else set(tables)
+
+        matches = []
+        seen = set()
+        position = bisect.bisect_left(self._keys, (folded,))
+        while position < len(self._keys) and len(matches) < limit:
+            key, table, entity_id = self._keys[position]
+            if not key.startswith(folded):
+                break
+            position += 1
+            if (tables is None or table in tables) and (table, entity_id) not in seen:
+                seen.add((table, entity_id))
+                code, name, keys = self._records[(table, entity_id)]
+                matches.append(AutocompleteMatch(table, entity_id, code, name))
+        return matches
+
+    def __len__(self):
+        """Returns the number of records in the index"""
+        return len(self._records)
+
+
+def _entity_keys(table, entity_id, name, codes):
+    """Returns the distinct (key, table, id) entries of one record"""
+    keys = {fold(value) for value in (name, *codes) if value}
+    return [(key, table, entity_id) for key in keys if key]
@@ -0,0 +1,197 @@
+# p2app/engine/batch.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Shared functionality for saving many records at once.
+
+import sqlite3
+from contextlib import contextmanager
+
+
+# SQLite limits the number of parameters in one statement, so lookups by many
+# values are made a chunk at a time.
+_LOOKUP_CHUNK_SIZE = 500
+
+
+def is_duplicate(error):
+    """
+    Report whether an error was raised because a row would have violated a UNIQUE
+    constraint (e.g., a new continent with a continent_code that's already used),
+    rather than some other constraint, such as a foreign key.
+
+    Args:
+        error (sqlite3.IntegrityError): The error.
+
+    Returns:
+        bool: Whether the error is a UNIQUE constraint violation.
+    """
+    return str(error).startswith('UNIQUE constraint failed')
+
+
+def fetch_ids_by_code(connection, table, id_column, code_column, codes):
+    """
+    Look up the primary keys of the rows with any of the given codes.
+
+    Args:
+        connection (sqlite3.Connection): The connection to the database.
+        table (str): The name of the table.
+        id_column (str): The name of the table's primary key column.
+        code_column (str): The name of the table's unique code column.
+        codes (Iterable[str]): The codes to look up.
+
+    Returns:
+        dict[str, int]: The primary key of each code that was found.
+    """
+    codes = list(codes)
+    ids = {}
+    for start in range(0, len(codes), _LOOKUP_CHUNK_SIZE):
+        chunk = codes[start:start + _LOOKUP_CHUNK_SIZE]
+        placeholders = ', '.join('?' * len(chunk))
+        rows = connection.execute(
+            f"SELECT {code_column}, {id_column} FROM {table} WHERE {code_column} IN ({placeholders})", chunk)
+        ids.update(rows)
+    return ids
+
+
+def fetch_all_ids(connection, table, id_column):
+    """
+    Look up every primary key in a table, e.g., to check foreign keys without a query per row.
+
+    Args:
+        connection (sqlite3.Connection): The connection to the database.
+        table (str): The name of the table.
+        id_column (str): The name of the table's primary key column.
+
+    Returns:
+        set[int]: The primary keys.
+    """
+    return {row[0] for row in connection.execute(f"SELECT {id_column} FROM {table}")}
+
+
+@contextmanager
+def savepoint(connection, name):
+    """
+    Make the statements executed in a with block take effect together or not at all,
+    without committing or rolling back anything the connection had already done before
+    the block, such as edits that haven't been committed yet.
+
+    Args:
+        connection (sqlite3.Connection): The connection to the database.
+        name (str): The name of the savepoint.
+
+    Raises:
+        Exception: Whatever the block raised, after its statements were rolled back.
+    """
+    connection.execute(f"SAVEPOINT {name}")
+    try:
+        yield
+    except BaseException:
+        connection.execute(f"ROLLBACK TO {name}")
+        connection.execute(f"RELEASE {name}")
+        raise
+    else:
+        connection.execute(f"RELEASE {name}")
+
+
+def insert_batch(connection, insert_query, rows):
+    """
+    Insert rows with one executemany call, or, if any of them is rejected, one at a time,
+    so each row's outcome is its own and a bad row doesn't stop the others from being
+    inserted.  The inserted rows are then committed.
+
+    Args:
+        connection (sqlite3.Connection): The connection to the database.
+        insert_query (str): The parameterized INSERT statement.
+        rows (list[tuple]): The parameters for each row.
+
+    Returns:
+        list[sqlite3.Error or None]: For each row, in order, None if it was inserted or
+        the error that rejected it.
+    """
+    try:
+        with savepoint(connection, 'insert_batch'):
+            connection.executemany(insert_query, rows)
+        errors = [None] * len(rows)
+    except sqlite3.Error:
+        # A rejected INSERT undoes only itself, so the rows before it, and any edits
+        # that hadn't been committed yet, are kept
+        errors = []
+        for row in rows:
+            try:
+                with savepoint(connection, 'insert_batch_row'):
+                    connection.execute(insert_query, row)
+                errors.append(None)
+            except sqlite3.Error as e:
+                errors.append(e)
+
+    if any(error is None for error in errors):
+        connection.commit()
+    return errors
+
+
+def save_new_records(connection, table, records, check, duplicate_reason, rejected_reason = None,
+                     generations = None):
+    """
+    Save many new continents, countries or regions at once.  Each record is checked
+    first, by check and then for a code that's already used (in the database or earlier
+    in the batch), and the valid ones are inserted with insert_batch.
+
+    Args:
+        connection (sqlite3.Connection): The connection to the database.
+        table (str): The name of the table, whose primary key and unique code columns
+            are named <table>_id and <table>_code.
+        records (list[namedtuple]): The new records, whose fields are the table's columns,
+            beginning with its primary key (which is ignored) and its code.
+        check (callable): Given a record, returns the reason it can't be saved, or None.
+        duplicate_reason (str): The reason given for a record whose code is already used.
+        rejected_reason (str or None): The reason given for a record the database rejects
+            for any other reason, or None to give the database's own error message.
+        generations (TableGenerations): Bumped for the table when the database is written to.
+
+    Returns:
+        list[tuple]: For each record, in order, either the saved record (with its primary
+        key) and None, or None and the reason it wasn't saved.
+    """
+    id_column = f'{table}_id'
+    code_column = f'{table}_code'
+    existing = fetch_ids_by_code(connection, table, id_column, code_column,
+                                 {record[1] for record in records if record[1]})
+
+    reasons = []
+    seen = set()
+    for record in records:
+        reason = check(record)
+        if reason is None and (record[1] in existing or record[1] in seen):
+            reason = duplicate_reason
+        if reason is None:
+            seen.add(record[1])
+        reasons.append(reason)
+
+    valid = [record for record, reason in zip(records, reasons) if reason is None]
+    if valid:
+        columns = valid[0]._fields[1:]
+        insert_query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        errors = iter(insert_batch(connection, insert_query, [tuple(record[1:]) for record in valid]))
+        for index, reason in enumerate(reasons):
+            if reason is None:
+                error = next(errors)
+                if error is None:
+                    continue
+                elif is_duplicate(error):
+                    reasons[index] = duplicate_reason
+                else:
+                    reasons[index] = str(error) if rejected_reason is None else rejected_reason
+
+    saved = {record[1] for record, reason in zip(records, reasons) if reason is None}
+    if saved and generations is not None:
+        generations.bump(table)
+
+    ids = fetch_ids_by_code(connection, table, id_column, code_column, saved)
+    results = []
+    for record, reason in zip(records, reasons):
+        if reason is None:
+            results.append((record._replace(**{id_column: ids[record[1]]}), None))
+        else:
+            results.append((None, reason))
+    return results
@@ -0,0 +1,202 @@
+# p2app/engine/cache.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Caches that let the engine answer repeated requests without going back to the
+# database.  Every write the engine makes goes through it, so it keeps the caches
+# up to date itself rather than having them expire.
+
+from collections import OrderedDict
+from collections import namedtuple
+
+
+CacheStats = namedtuple('CacheStats', ['hits', 'misses', 'evictions', 'size', 'max_entries'])
+
+
+class TableGenerations:
+    """A write-generation counter for each table.  Anything that writes to a table
+    bumps its counter, so anything derived from the table's contents can tell it's
+    out of date by remembering the generation it was derived from."""
+
+    def __init__(self):
+        """Initializes every table's generation to zero"""
+        self._generations = {}
+
+    def current(self, table):
+        """Returns the current generation of a table"""
+        return self._generations.get(table, 0)
+
+    def bump(self, table):
+        """Records that a table has been written to"""
+        self._generations[table] = self._generations.get(table, 0) + 1
+
+
+class EntityCache:
+    """A bounded least-recently-used cache of records (e.g., Continent, Country or
+    Region namedtuples), keyed by the name of their table and their primary key."""
+
+    def __init__(self, max_entries = 1024):
+        """Initializes an empty cache holding at most max_entries records"""
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, table, entity_id):
+        """
+        Look up a record, marking it as the most recently used.
+
+        Args:
+            table (str): The name of the record's table.
+            entity_id (int): The record's primary key.
+
+        Returns:
+            The cached record, or None if it isn't cached.
+        """
+        key = (table, entity_id)
+        try:
+            record = self._entries[key]
+        except KeyError:
+            self._misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return record
+
+    def put(self, table, entity_id, record):
+        """
+        Cache a record, replacing any cached record with the same key and evicting
+        the least recently used records if the cache is full.
+
+        Args:
+            table (str): The name of the record's table.
+            entity_id (int): The record's primary key.
+            record: The record.
+        """
+        if self._max_entries <= 0:
+            return
+
+        key = (table, entity_id)
+        self._entries[key] = record
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last = False)
+            self._evictions += 1
+
+    def invalidate(self, table, entity_id):
+        """
+        Remove a record from the cache, if it's cached.
+
+        Args:
+            table (str): The name of the record's table.
+            entity_id (int): The record's primary key.
+        """
+        self._entries.pop((table, entity_id), None)
+
+    def clear(self):
+        """Removes every record from the cache (the counters are kept)"""
+        self._entries.clear()
+
+    def stats(self):
+        """
+        Report how well the cache is doing.
+
+        Returns:
+            CacheStats: The hit, miss and eviction counts, and the current and maximum sizes.
+        """
+        return CacheStats(self._hits, self._misses, self._evictions, len(self._entries), self._max_entries)
+
+
+class SearchCache:
+    """A bounded least-recently-used cache of search results, keyed by the name of
+    the table searched and a tuple of the search criteria.  Each entry remembers the
+    generation of its table when the search ran, and is ignored (and discarded) once
+    the table has been written to since, so a write invalidates every cached search
+    of its table at the cost of one counter increment."""
+
+    def __init__(self, generations, max_entries = 256, max_rows_per_entry = 1000):
+        """Initializes an empty cache of at most max_entries searches, each of at most
+        max_rows_per_entry results; larger results are not cached at all"""
+        self._generations = generations
+        self._max_entries = max_entries
+        self._max_rows_per_entry = max_rows_per_entry
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def max_rows_per_entry(self):
+        """Returns the largest number of results that will be cached for one search"""
+        return self._max_rows_per_entry
+
+    def generation(self, table):
+        """Returns the current generation of a table, to be passed to put once the
+        search started now has finished"""
+        return self._generations.current(table)
+
+    def get(self, table, criteria):
+        """
+        Look up the results of a search, marking them as the most recently used.
+
+        Args:
+            table (str): The name of the table searched.
+            criteria (tuple): The normalized search criteria.
+
+        Returns:
+            list or None: The cached results, or None if they aren't cached or are stale.
+        """
+        key = (table, criteria)
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return None
+
+        generation, results = entry
+        if generation != self._generations.current(table):
+            del self._entries[key]
+            self._misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return results
+
+    def put(self, table, criteria, generation, results):
+        """
+        Cache the results of a search.
+
+        Args:
+            table (str): The name of the table searched.
+            criteria (tuple): The normalized search criteria.
+            generation (int): The generation of the table when the search started.
+            results (list): The results of the search.
+        """
+        if self._max_entries <= 0 or len(results) > self._max_rows_per_entry:
+            return
+        if generation != self._generations.current(table):
+            return
+
+        key = (table, criteria)
+        self._entries[key] = (generation, results)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last = False)
+            self._evictions += 1
+
+    def clear(self):
+        """Removes every search from the cache (the counters are kept)"""
+        self._entries.clear()
+
+    def stats(self):
+        """
+        Report how well the cache is doing.
+
+        Returns:
+            CacheStats: The hit, miss and eviction counts, and the current and maximum sizes.
+        """
+        return CacheStats(self._hits, self._misses, self._evictions, len(self._entries), self._max_entries)
@@ -0,0 +1,90 @@
+# p2app/engine/cancellation.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Cooperative cancellation and time budgets for long-running searches.
+#
+# A search is stopped in one of two places: while SQLite is still executing its
+# query, by a progress handler that SQLite calls every few thousand virtual
+# machine instructions (returning a true value makes SQLite abandon the query
+# with an "interrupted" error), or between rows, by the generator that streams
+# the results checking before it yields each one.
+
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+
+# How many SQLite virtual machine instructions run between calls to the progress handler
+PROGRESS_HANDLER_INTERVAL = 1000
+
+CANCELLED = 'cancelled'
+TIME_BUDGET_EXCEEDED = 'time budget exceeded'
+
+
+class SearchControl:
+    """Tracks whether a search should stop, either because it was cancelled (from
+    any thread) or because it has run past its time budget."""
+
+    def __init__(self, time_budget = None):
+        """Initializes the control for a search that starts now and may run for at most
+        time_budget seconds, or with no limit if time_budget is None"""
+        self._cancelled = threading.Event()
+        if time_budget is None:
+            self._deadline = None
+        else:
+            self._deadline = time.monotonic() + time_budget
+
+    def cancel(self):
+        """Asks the search to stop as soon as it can; safe to call from any thread"""
+        self._cancelled.set()
+
+    def stop_reason(self):
+        """
+        Determine whether, and why, the search should stop.
+
+        Returns:
+            str or None: CANCELLED, TIME_BUDGET_EXCEEDED, or None if the search should go on.
+        """
+        if self._cancelled.is_set():
+            return CANCELLED
+        elif self._deadline is not None and time.monotonic() >= self._deadline:
+            return TIME_BUDGET_EXCEEDED
+        else:
+            return None
+
+    def should_stop(self):
+        """Returns True if the search should stop"""
+        return self.stop_reason() is not None
+
+
+@contextmanager
+def interruptible(connection, control):
+    """
+    A context manager that, while it's active, makes SQLite abandon whatever query
+    the connection is executing once the control says the search should stop.
+
+    Args:
+        connection (sqlite3.Connection): The connection running the search.
+        control (SearchControl): The control for the search.
+    """
+    connection.set_progress_handler(control.should_stop, PROGRESS_HANDLER_INTERVAL)
+    try:
+        yield
+    finally:
+        connection.set_progress_handler(None, 0)
+
+
+def is_interruption(error):
+    """
+    Determine whether an error was raised because a progress handler interrupted a query.
+
+    Args:
+        error (sqlite3.Error): The error.
+
+    Returns:
+        bool: True if the query was interrupted.
+    """
+    return isinstance(error, sqlite3.OperationalError) and 'interrupted' in str(error)
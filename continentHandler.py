@@ -1,48 +1,36 @@
 import sqlite3
 
-from p2app.events.continents import Continent
+from p2app.events.continents import Continent, ContinentSaveResult
+from p2app.engine import batch
+from p2app.engine import query_builder
 
 
-def continent_search(myCursor, event): #Works perfectly
+def continent_search(myCursor, event, chunk_size = query_builder.DEFAULT_CHUNK_SIZE): #Works perfectly
     """
-    Search for continents in the database based on the given event attributes.
+    Search for continents in the database based on the given event attributes, streaming
+    the results from the cursor in chunks rather than fetching them all at once.
 
     Args:
         myCursor (sqlite3.Cursor): The SQLite cursor to execute the query.
         event: An event object containing attributes for the search.
+        chunk_size (int): The number of rows fetched from the cursor at a time.
 
-    Returns:
-        list[Continent] or None: A list of Continent objects matching the search criteria, or None if no matches are found.
+    Yields:
+        Continent: Each Continent matching the search criteria, fetched while the query is still running.
     """
-    continent_code = event.continent_code()
-    name = event.name()
-    if continent_code and name:
-        myCursor.execute("SELECT * FROM continent WHERE continent_code = ? and name = ?", (continent_code, name))
-    elif continent_code:
-        myCursor.execute("SELECT * FROM continent WHERE continent_code = ?", (continent_code,))
-    elif name:
-        myCursor.execute("SELECT * FROM continent WHERE name = ?", (name,))
-    else:
-        return None
+    predicates = query_builder.predicates_from(
+        'continent', {'continent_code': event.continent_code(), 'name': event.name()})
+    yield from query_builder.search(myCursor, 'continent', predicates, chunk_size)
 
-    continent_list = []
-    rows = myCursor.fetchall()
-    if rows:
-        for row in rows:
-            continent = Continent(*row)
-            continent_list.append(continent)
-        return continent_list
-    else:
-        return
-
-def load_new_continent(myCursor, myCursor2, event): #Perfect, Duplicate Continent Code, Empty fields dealt with
+def load_new_continent(myCursor, event, generations = None): #Perfect, Duplicate Continent Code, Empty fields dealt with
     """
-    Load a new continent into the database, ensuring uniqueness of the continent_code.
+    Load a new continent into the database with a single INSERT, relying on the UNIQUE
+    constraint on continent_code to reject a duplicate code.
 
     Args:
         myCursor (sqlite3.Cursor): The SQLite cursor for inserting the new continent.
-        myCursor2 (sqlite3.Cursor): The SQLite cursor for checking the existence of continent_code.
         event: An event object with continent information.
+        generations (TableGenerations): Bumped for the table when the database is written to.
 
     Returns:
         Continent or str: The newly loaded Continent object or a message indicating if the continent_code already exists.
@@ -51,23 +39,19 @@ def load_new_continent(myCursor, myCursor2, event): #Perfect, Duplicate Continen
     continent_code = myCon.continent_code
     name = myCon.name
 
-#cursor 2 checks if code exists
-    myCursor2.execute(f'SELECT * FROM continent WHERE continent_code = "{continent_code}"')
-    conCode = myCursor2.fetchone()
-
-    # and continent_code and name
-    if conCode is None:
-        # Creates new row
-        insert_query = "INSERT INTO continent (continent_code, name) VALUES (?, ?)"
-        myCursor.execute(insert_query, (continent_code, name))
-
-        myCursor.execute("SELECT * FROM continent WHERE continent_code = ? AND name = ?", (continent_code, name))
-        myRow = myCursor.fetchone() #fetches the id of continent we want
-        myCursor.connection.commit()  # Commit the changes to the database
-        myContinent = Continent(continent_id = myRow[0], continent_code = continent_code, name = name)
-        return myContinent
-    else:
-        return "Continent Code already exists"
+    try:
+        myCursor.execute("INSERT INTO continent (continent_code, name) VALUES (?, ?)", (continent_code, name))
+    except sqlite3.IntegrityError as e:
+        if batch.is_duplicate(e):
+            return "Continent Code already exists"
+        return str(e)
+    except sqlite3.Error as e:
+        return f"The continent couldn't be saved: {e}"
+
+    myCursor.connection.commit()  # Commit the changes to the database
+    if generations is not None:
+        generations.bump('continent')
+    return Continent(continent_id = myCursor.lastrowid, continent_code = continent_code, name = name)
 
 def fetchContinent(myCursor,event): #Works perfectly
     """
@@ -85,7 +69,7 @@ def fetchContinent(myCursor,event): #Works perfectly
     myContinent = Continent(*myCursor.fetchone())
     return myContinent
 
-def saveContinent(myCursor, myCursor2, event):
+def saveContinent(myCursor, myCursor2, event, generations = None):
     """
     Save changes to a Continent in the database, checks if continent code is unique.
 
@@ -93,6 +77,7 @@ def saveContinent(myCursor, myCursor2, event):
         myCursor (sqlite3.Cursor): The SQLite cursor to execute the update.
         myCursor2 (sqlite3.Cursor): The SQLite cursor for checking the existence of continent_code.
         event: An event object with the Continent to save.
+        generations (TableGenerations): Bumped for the table when the database is written to.
 
     Returns:
         Continent or str: The saved Continent object or a message indicating if the continent_code already exists.
@@ -102,6 +87,36 @@ def saveContinent(myCursor, myCursor2, event):
 
     try:
         myCursor.execute("UPDATE continent SET continent_code = ?, name = ? WHERE continent_id = ?",(myContinent.continent_code, myContinent.name, myContinent_id))
+        if myCursor.rowcount != 1:
+            return "That continent no longer exists"
+        if generations is not None:
+            generations.bump('continent')
         return myContinent
-    except Exception:
+    except sqlite3.IntegrityError:
         return "Make sure the continent code is unique"
+    except sqlite3.Error as e:
+        return f"The continent couldn't be saved: {e}"
+
+def load_new_continents(myConnection, event, generations = None):
+    """
+    Load many new continents into the database at once.  A continent must have a
+    continent_code that's not already used (in the database or earlier in the batch)
+    and a name.
+
+    Args:
+        myConnection (sqlite3.Connection): The connection to the database.
+        event: An event object with the list of continents to save.
+        generations (TableGenerations): Bumped for the table when the database is written to.
+
+    Returns:
+        list[ContinentSaveResult]: For each continent, in order, either the saved Continent or
+        the reason it wasn't saved.
+    """
+    def check(con):
+        if not con.continent_code or not con.name:
+            return "Continent code and name are required"
+        return None
+
+    results = batch.save_new_records(myConnection, 'continent', event.continents(), check,
+                                     "Continent Code already exists", generations = generations)
+    return [ContinentSaveResult(*result) for result in results]
@@ -24,10 +24,21 @@ Continent.__annotations__ = {
 
 
 
+ContinentSaveResult = namedtuple('ContinentSaveResult', ['continent', 'reason'])
+
+ContinentSaveResult.__annotations__ = {
+    'continent': Continent | None,
+    'reason': str | None
+}
+
+
+
 class StartContinentSearchEvent:
-    def __init__(self, continent_code: str, name: str):
+    def __init__(self, continent_code: str, name: str,
+                 time_budget: float | None = None):
         self._continent_code = continent_code
         self._name = name
+        self._time_budget = time_budget
 
 
     def continent_code(self) -> str:
@@ -38,6 +49,10 @@ class StartContinentSearchEvent:
         return self._name
 
 
+    def time_budget(self) -> float | None:
+        return self._time_budget
+
+
     def __repr__(self) -> str:
         return f'{type(self).__name__}: continent_code = {repr(self._continent_code)}, name = {repr(self._name)}'
 
@@ -138,3 +153,31 @@ class SaveContinentFailedEvent:
 
     def __repr__(self) -> str:
         return f'{type(self).__name__}: reason = {repr(self._reason)}'
+
+
+
+class SaveNewContinentsEvent:
+    def __init__(self, continents: list[Continent]):
+        self._continents = continents
+
+
+    def continents(self) -> list[Continent]:
+        return self._continents
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: continents = {repr(self._continents)}'
+
+
+
+class ContinentsSavedEvent:
+    def __init__(self, results: list[ContinentSaveResult]):
+        self._results = results
+
+
+    def results(self) -> list[ContinentSaveResult]:
+        return self._results
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: results = {repr(self._results)}'
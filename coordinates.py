@@ -0,0 +1,260 @@
+# p2app/engine/coordinates.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# A store of every airport's coordinates as NumPy arrays, and great-circle
+# distances computed over whole arrays of them at once, rather than one pair of
+# airports at a time in Python.
+#
+# The arrays (airport_id, latitude and longitude, ordered by airport_id) are
+# saved as .npy files in a directory beside the database and memory-mapped when
+# they're opened again, so they're read from disk only as they're used.  A
+# fingerprint of the airport table is saved with them; when the table no longer
+# matches it, the arrays are rebuilt.
+#
+# NumPy is optional: the rest of the engine works without it, and only using
+# this module, or the modules that call require_numpy, requires it.
+
+import json
+import os
+from pathlib import Path
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from p2app.engine.geo import EARTH_RADIUS_KM
+
+
+# The number of rows of a distance matrix computed at a time, which bounds the
+# size of the temporary arrays needed to compute them
+DEFAULT_BATCH_ROWS = 512
+
+_ARRAYS = ('airport_id', 'latitude', 'longitude')
+_FINGERPRINT_FILE = 'fingerprint.json'
+
+
+def require_numpy(feature = 'Computing distances over many airports at once'):
+    """
+    Make sure NumPy can be used.
+
+    Args:
+        feature (str): What needs NumPy, to explain the error if it can't be used.
+
+    Raises:
+        ImportError: If NumPy isn't installed, explaining how to install it.
+    """
+    if numpy is None:
+        raise ImportError(f'{feature} requires NumPy, which is not installed; install it with "pip install numpy"')
+
+
+def store_directory(database_path):
+    """Returns the directory in which the coordinates of a database's airports are stored"""
+    database_path = Path(database_path)
+    return database_path.with_name(database_path.name + '.coordinates')
+
+
+def _fingerprint(connection):
+    """Summarizes the airport table, so a change to any airport's id or coordinates
+    (or the addition or removal of any airport) changes the summary"""
+    count, id_total, latitude_total, longitude_total = connection.execute(
+        "SELECT COUNT(*), TOTAL(airport_id), TOTAL(latitude_deg * airport_id), TOTAL(longitude_deg * airport_id) "
+        "FROM airport").fetchone()
+    return [count, id_total, latitude_total, longitude_total]
+
+
+def haversine_one_to_many(latitude, longitude, latitudes, longitudes):
+    """
+    Find the great-circle distances from one point to many.
+
+    Args:
+        latitude, longitude (float): The point, in degrees.
+        latitudes, longitudes (numpy.ndarray): The other points, in degrees.
+
+    Returns:
+        numpy.ndarray: The distance, in kilometers, to each of the other points.
+    """
+    require_numpy()
+    phi = numpy.radians(latitude)
+    phis = numpy.radians(latitudes)
+    half_dphi = (phis - phi) / 2
+    half_dlambda = numpy.radians(numpy.asarray(longitudes) - longitude) / 2
+    a = numpy.sin(half_dphi) ** 2 + numpy.cos(phi) * numpy.cos(phis) * numpy.sin(half_dlambda) ** 2
+    return 2 * EARTH_RADIUS_KM * numpy.arcsin(numpy.sqrt(numpy.minimum(a, 1.0)))
+
+
+def haversine_matrix(latitudes1, longitudes1, latitudes2, longitudes2, batch_rows = DEFAULT_BATCH_ROWS):
+    """
+    Find the great-circle distance between every point of one set and every point of
+    another, computing the matrix a batch of rows at a time.
+
+    Args:
+        latitudes1, longitudes1 (numpy.ndarray): The first set of points, in degrees.
+        latitudes2, longitudes2 (numpy.ndarray): The second set of points, in degrees.
+        batch_rows (int): The number of rows computed at a time.
+
+    Returns:
+        numpy.ndarray: A matrix whose element [i, j] is the distance, in kilometers,
+        between point i of the first set and point j of the second.
+    """
+    require_numpy()
+    phis1 = numpy.radians(numpy.asarray(latitudes1, dtype = numpy.float64))[:, numpy.newaxis]
+    lambdas1 = numpy.radians(numpy.asarray(longitudes1, dtype = numpy.float64))[:, numpy.newaxis]
+    phis2 = numpy.radians(numpy.asarray(latitudes2, dtype = numpy.float64))[numpy.newaxis, :]
+    lambdas2 = numpy.radians(numpy.asarray(longitudes2, dtype = numpy.float64))[numpy.newaxis, :]
+    cos_phis2 = numpy.cos(phis2)
+
+    distances = numpy.empty((phis1.shape[0], phis2.shape[1]))
+    for start in range(0, phis1.shape[0], batch_rows):
+        rows = slice(start, start + batch_rows)
+        a = (numpy.sin((phis2 - phis1[rows]) / 2) ** 2
+             + numpy.cos(phis1[rows]) * cos_phis2 * numpy.sin((lambdas2 - lambdas1[rows]) / 2) ** 2)
+        numpy.minimum(a, 1.0, out = a)
+        distances[rows] = 2 * EARTH_RADIUS_KM * numpy.arcsin(numpy.sqrt(a))
+    return distances
+
+
+class CoordinateStore:
+    """The ids and coordinates of every airport in a database, as NumPy arrays ordered
+    by airport_id."""
+
+    def __init__(self, airport_ids, latitudes, longitudes):
+        """Initializes a store of the given arrays"""
+        self.airport_ids = airport_ids
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+
+    @classmethod
+    def open(cls, connection, database_path):
+        """
+        Open the stored coordinates of a database's airports, memory-mapping the saved
+        arrays if they still match the airport table, or else rebuilding and saving them.
+
+        Args:
+            connection (sqlite3.Connection): The connection to the database.
+            database_path (Path or str): The path to the database.
+
+        Returns:
+            CoordinateStore: The store.
+
+        Raises:
+            ImportError: If NumPy isn't installed.
+            OSError: If the arrays couldn't be saved.
+            sqlite3.Error: If the airports couldn't be read.
+        """
+        require_numpy()
+        directory = store_directory(database_path)
+        fingerprint = _fingerprint(connection)
+        try:
+            with open(directory / _FINGERPRINT_FILE) as fingerprint_file:
+                saved_fingerprint = json.load(fingerprint_file)
+        except (OSError, ValueError):
+            saved_fingerprint = None
+
+        if saved_fingerprint != fingerprint:
+            cls._save(connection, directory, fingerprint)
+        return cls(*(numpy.load(directory / f'{name}.npy', mmap_mode = 'r') for name in _ARRAYS))
+
+    @staticmethod
+    def _save(connection, directory, fingerprint):
+        """Reads the coordinates of every airport and saves them, along with the
+        fingerprint of the table they were read from"""
+        rows = connection.execute(
+            "SELECT airport_id, latitude_deg, longitude_deg FROM airport ORDER BY airport_id").fetchall()
+        arrays = {
+            'airport_id': numpy.fromiter((row[0] for row in rows), dtype = numpy.int64, count = len(rows)),
+            'latitude': numpy.fromiter((row[1] for row in rows), dtype = numpy.float64, count = len(rows)),
+            'longitude': numpy.fromiter((row[2] for row in rows), dtype = numpy.float64, count = len(rows))
+        }
+
+        # Each file is written under a temporary name, then renamed, so a reader never
+        # sees one half-written; the fingerprint is written last, so it never describes
+        # arrays that weren't all saved
+        directory.mkdir(exist_ok = True)
+        for name, array in arrays.items():
+            temporary_path = directory / f'{name}.tmp.npy'
+            numpy.save(temporary_path, array)
+            os.replace(temporary_path, directory / f'{name}.npy')
+        temporary_path = directory / f'{_FINGERPRINT_FILE}.tmp'
+        with open(temporary_path, 'w') as fingerprint_file:
+            json.dump(fingerprint, fingerprint_file)
+        os.replace(temporary_path, directory / _FINGERPRINT_FILE)
+
+    def __len__(self):
+        """Returns the number of airports in the store"""
+        return len(self.airport_ids)
+
+    def indexes_of(self, airport_ids):
+        """
+        Find the positions of airports in the store's arrays.
+
+        Args:
+            airport_ids (Iterable[int]): The airports' ids.
+
+        Returns:
+            numpy.ndarray: The position of each airport.
+
+        Raises:
+            ValueError: If any of the airports isn't in the store.
+        """
+        airport_ids = numpy.asarray(list(airport_ids), dtype = numpy.int64)
+        positions = numpy.searchsorted(self.airport_ids, airport_ids)
+        found = positions < len(self.airport_ids)
+        found[found] = self.airport_ids[positions[found]] == airport_ids[found]
+        if not numpy.all(found):
+            raise ValueError(f'There are no airports with the ids {airport_ids[~found].tolist()}')
+        return positions
+
+    def distances_from(self, latitude, longitude):
+        """
+        Find the distance from a point to every airport.
+
+        Args:
+            latitude, longitude (float): The point, in degrees.
+
+        Returns:
+            numpy.ndarray: The distance, in kilometers, to each airport, in the order of
+            airport_ids.
+        """
+        return haversine_one_to_many(latitude, longitude, self.latitudes, self.longitudes)
+
+    def distances_from_airport(self, airport_id):
+        """
+        Find the distance from one airport to every airport.
+
+        Args:
+            airport_id (int): The airport's id.
+
+        Returns:
+            numpy.ndarray: The distance, in kilometers, to each airport, in the order of
+            airport_ids.
+
+        Raises:
+            ValueError: If the airport isn't in the store.
+        """
+        position, = self.indexes_of([airport_id])
+        return self.distances_from(self.latitudes[position], self.longitudes[position])
+
+    def distance_matrix(self, from_ids, to_ids = None, batch_rows = DEFAULT_BATCH_ROWS):
+        """
+        Find the distance between every pair of airports from two lists.
+
+        Args:
+            from_ids (Iterable[int]): The ids of the airports in the matrix's rows.
+            to_ids (Iterable[int] or None): The ids of the airports in its columns;
+                None means the same airports as the rows.
+            batch_rows (int): The number of rows computed at a time.
+
+        Returns:
+            numpy.ndarray: A matrix whose element [i, j] is the distance, in kilometers,
+            between airport from_ids[i] and airport to_ids[j].
+
+        Raises:
+            ValueError: If any of the airports isn't in the store.
+        """
+        rows = self.indexes_of(from_ids)
+        columns = rows if to_ids is None else self.indexes_of(to_ids)
+        return haversine_matrix(self.latitudes[rows], self.longitudes[rows],
+                                self.latitudes[columns], self.longitudes[columns], batch_rows)
@@ -29,10 +29,21 @@ Country.__annotations__ = {
 
 
 
+CountrySaveResult = namedtuple('CountrySaveResult', ['country', 'reason'])
+
+CountrySaveResult.__annotations__ = {
+    'country': Country | None,
+    'reason': str | None
+}
+
+
+
 class StartCountrySearchEvent:
-    def __init__(self, country_code: str, name: str):
+    def __init__(self, country_code: str, name: str,
+                 time_budget: float | None = None):
         self._country_code = country_code
         self._name = name
+        self._time_budget = time_budget
 
 
     def country_code(self) -> str:
@@ -43,6 +54,10 @@ class StartCountrySearchEvent:
         return self._name
 
 
+    def time_budget(self) -> float | None:
+        return self._time_budget
+
+
     def __repr__(self) -> str:
         return f'{type(self).__name__}: country_code = {repr(self._country_code)}, name = {repr(self._name)}'
 
@@ -143,3 +158,83 @@ class SaveCountryFailedEvent:
 
     def __repr__(self) -> str:
         return f'{type(self).__name__}: reason = {repr(self._reason)}'
+
+
+
+class StartCountrySearchPageEvent:
+    def __init__(self, country_code: str, name: str, page_size: int,
+                 page_token: str | None = None):
+        self._country_code = country_code
+        self._name = name
+        self._page_size = page_size
+        self._page_token = page_token
+
+
+    def country_code(self) -> str:
+        return self._country_code
+
+
+    def name(self) -> str:
+        return self._name
+
+
+    def page_size(self) -> int:
+        return self._page_size
+
+
+    def page_token(self) -> str | None:
+        return self._page_token
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: country_code = {repr(self._country_code)}, ' + \
+               f'name = {repr(self._name)}, page_size = {repr(self._page_size)}, ' + \
+               f'page_token = {repr(self._page_token)}'
+
+
+
+class CountrySearchPageEvent:
+    def __init__(self, countries: list[Country], next_page_token: str | None):
+        self._countries = countries
+        self._next_page_token = next_page_token
+
+
+    def countries(self) -> list[Country]:
+        return self._countries
+
+
+    def next_page_token(self) -> str | None:
+        return self._next_page_token
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: countries = {repr(self._countries)}, ' + \
+               f'next_page_token = {repr(self._next_page_token)}'
+
+
+
+class SaveNewCountriesEvent:
+    def __init__(self, countries: list[Country]):
+        self._countries = countries
+
+
+    def countries(self) -> list[Country]:
+        return self._countries
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: countries = {repr(self._countries)}'
+
+
+
+class CountriesSavedEvent:
+    def __init__(self, results: list[CountrySaveResult]):
+        self._results = results
+
+
+    def results(self) -> list[CountrySaveResult]:
+        return self._results
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: results = {repr(self._results)}'
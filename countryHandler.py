@@ -1,47 +1,38 @@
-from p2app.events.countries import Country
+import sqlite3
 
+from p2app.events.countries import Country, CountrySaveResult
+from p2app.engine import batch
+from p2app.engine import query_builder
+from p2app.engine.pagination import encode_page_token, decode_page_token
 
-def country_search(myCursor, event): #Works perfectly
+
+def country_search(myCursor, event, chunk_size = query_builder.DEFAULT_CHUNK_SIZE): #Works perfectly
     """
-    Search for countries in the database based on the given event attributes.
+    Search for countries in the database based on the given event attributes, streaming
+    the results from the cursor in chunks rather than fetching them all at once.
 
     Args:
         myCursor (sqlite3.Cursor): The SQLite cursor to execute the query.
         event: An event object containing attributes for the search.
+        chunk_size (int): The number of rows fetched from the cursor at a time.
 
-    Returns:
-        list[Country] or None: A list of Country objects matching the search criteria, or None if no matches are found.
+    Yields:
+        Country: Each Country matching the search criteria, fetched while the query is still running.
     """
-    country_code = event.country_code()
-    name = event.name()
-    if country_code and name:
-        myCursor.execute("SELECT * FROM country WHERE country_code = ? and name = ?", (country_code, name))
-    elif country_code:
-        myCursor.execute("SELECT * FROM country WHERE country_code = ?", (country_code,))
-    elif name:
-        myCursor.execute("SELECT * FROM country WHERE name = ?", (name,))
-    else:
-        return None
+    predicates = query_builder.predicates_from(
+        'country', {'country_code': event.country_code(), 'name': event.name()})
+    yield from query_builder.search(myCursor, 'country', predicates, chunk_size)
 
-    country_list = []
-    rows = myCursor.fetchall()
-    if rows:
-        for row in rows:
-            country = Country(*row)
-            country_list.append(country)
-        return country_list
-    else:
-        return
-
-def load_new_country(myCursor, myCursor2, event):  # Perfect, Duplicate country Code, Empty fields dealt with
+def load_new_country(myCursor, event, generations = None):  # Perfect, Duplicate country Code, Empty fields dealt with
     #'country_code', 'name', 'continent_id', 'wikipedia_link', 'keywords'])
     """
-    Load a new country into the database, ensuring uniqueness of the country_code.
+    Load a new country into the database with a single INSERT, relying on the UNIQUE
+    constraint on country_code to reject a duplicate code.
 
     Args:
-        myCursor (sqlite3.Cursor): The SQLite cursor for inserting the new continent.
-        myCursor2 (sqlite3.Cursor): The SQLite cursor for checking the existence of continent_code.
-        event: An event object with continent information.
+        myCursor (sqlite3.Cursor): The SQLite cursor for inserting the new country.
+        event: An event object with country information.
+        generations (TableGenerations): Bumped for the table when the database is written to.
 
     Returns:
         Country or str: The newly loaded Country object or a message indicating if the country_code already exists.
@@ -53,27 +44,24 @@ def load_new_country(myCursor, myCursor2, event):  # Perfect, Duplicate country
     wikipedia_link = myCon.wikipedia_link
     keywords = myCon.keywords
 
-    # cursor 2 checks if code exists
-    myCursor2.execute(f'SELECT * FROM country WHERE country_code = "{country_code}"')
-    conCode = myCursor2.fetchone()
-
-    if conCode is None and keywords:
-        print("Started if statement")
-
-        # Creates new row
-        insert_query = "INSERT INTO country (country_code, name, continent_id, wikipedia_link, keywords) VALUES (?, ?, ?, ?, ?)"
-        try:
-            myCursor.execute(insert_query, (country_code, name, continent_id, wikipedia_link, keywords))
-        except Exception:
-            return "Please enter valid continent id"
+    if not keywords:
+        return "Please enter a keyword"
 
-        myCursor.execute("SELECT * FROM country WHERE country_code = ? AND name = ?",(country_code,name))
-        myRow = myCursor.fetchone() #gets the id of the new one
-        myCursor.connection.commit()  # Commit the changes to the database
-        myCountry = Country(country_id = myRow[0], country_code = country_code,name = name, continent_id = continent_id, wikipedia_link = wikipedia_link, keywords = keywords)
-        return myCountry
-    else:
-        return "Country Code already exists"
+    insert_query = "INSERT INTO country (country_code, name, continent_id, wikipedia_link, keywords) VALUES (?, ?, ?, ?, ?)"
+    try:
+        myCursor.execute(insert_query, (country_code, name, continent_id, wikipedia_link, keywords))
+    except sqlite3.IntegrityError as e:
+        if batch.is_duplicate(e):
+            return "Country Code already exists"
+        return "Please enter valid continent id"
+    except sqlite3.Error as e:
+        return f"The country couldn't be saved: {e}"
+
+    myCursor.connection.commit()  # Commit the changes to the database
+    if generations is not None:
+        generations.bump('country')
+    myCountry = Country(country_id = myCursor.lastrowid, country_code = country_code,name = name, continent_id = continent_id, wikipedia_link = wikipedia_link, keywords = keywords)
+    return myCountry
 
 def fetchCountry(myCursor, event):  # Works perfectly
     """
@@ -91,7 +79,7 @@ def fetchCountry(myCursor, event):  # Works perfectly
     myCountry = Country(*myCursor.fetchone())
     return myCountry
 
-def saveCountry(myCursor, event): #Duplicate country code will not work
+def saveCountry(myCursor, event, generations = None): #Duplicate country code will not work
     """
     Save changes to a country in the database, checks if country code is unique.
 
@@ -99,6 +87,7 @@ def saveCountry(myCursor, event): #Duplicate country code will not work
         myCursor (sqlite3.Cursor): The SQLite cursor to execute the update.
         myCursor2 (sqlite3.Cursor): The SQLite cursor for checking the existence of country_code.
         event: An event object with the country to save.
+        generations (TableGenerations): Bumped for the table when the database is written to.
 
     Returns:
         country or str: The saved country object or a message indicating if the country_code already exists.
@@ -108,9 +97,72 @@ def saveCountry(myCursor, event): #Duplicate country code will not work
     myKeywords = myCountry.keywords
     if myKeywords:
         try:
-            myCursor.execute(f"UPDATE country SET country_code = ?, name = ?, continent_id = ?, wikipedia_link = ?, keywords = ? WHERE country_id = {myCountry_id}",(myCountry.country_code, myCountry.name, myCountry.continent_id, myCountry.wikipedia_link, myCountry.keywords))
+            myCursor.execute("UPDATE country SET country_code = ?, name = ?, continent_id = ?, wikipedia_link = ?, keywords = ? WHERE country_id = ?",(myCountry.country_code, myCountry.name, myCountry.continent_id, myCountry.wikipedia_link, myCountry.keywords, myCountry_id))
+            if myCursor.rowcount != 1:
+                return "That country no longer exists"
+            if generations is not None:
+                generations.bump('country')
             return myCountry
-        except Exception:
+        except sqlite3.IntegrityError:
             return "Make sure the country code is unique"
+        except sqlite3.Error as e:
+            return f"The country couldn't be saved: {e}"
     else:
         return "Please enter a keyword"
+
+def country_search_page(myCursor, event):
+    """
+    Search for one page of countries matching the given event attributes, ordered by country_id.
+    The next page is found by seeking past the last country_id on this one, so only the rows
+    on the page are read and materialized no matter how far into the results it is.
+
+    Args:
+        myCursor (sqlite3.Cursor): The SQLite cursor to execute the query.
+        event: An event object containing attributes for the search, a page size and a page token.
+
+    Returns:
+        tuple[list[Country], str or None]: The countries on the page and the token for the next
+        page, or None if this is the last page.
+
+    Raises:
+        ValueError: If the page token is not valid for this country search, or the page size
+            is not a positive whole number.
+    """
+    predicates = query_builder.predicates_from(
+        'country', {'country_code': event.country_code(), 'name': event.name()})
+    last_id = decode_page_token('country', predicates, event.page_token())
+    country_list, more = query_builder.search_page(myCursor, 'country', predicates, last_id, event.page_size())
+    if more:
+        return country_list, encode_page_token('country', predicates, country_list[-1].country_id)
+    else:
+        return country_list, None
+
+def load_new_countries(myConnection, event, generations = None):
+    """
+    Load many new countries into the database at once.  A country must have a
+    country_code that's not already used (in the database or earlier in the batch),
+    a name, a wikipedia link and keywords, and its continent_id must exist.
+
+    Args:
+        myConnection (sqlite3.Connection): The connection to the database.
+        event: An event object with the list of countries to save.
+        generations (TableGenerations): Bumped for the table when the database is written to.
+
+    Returns:
+        list[CountrySaveResult]: For each country, in order, either the saved Country or
+        the reason it wasn't saved.
+    """
+    continent_ids = batch.fetch_all_ids(myConnection, 'continent', 'continent_id')
+
+    def check(con):
+        if not con.country_code or not con.name or con.wikipedia_link is None:
+            return "Country code, name and wikipedia link are required"
+        elif not con.keywords:
+            return "Please enter a keyword"
+        elif con.continent_id not in continent_ids:
+            return "Please enter valid continent id"
+        return None
+
+    results = batch.save_new_records(myConnection, 'country', event.countries(), check,
+                                     "Country Code already exists", "Please enter valid continent id", generations)
+    return [CountrySaveResult(*result) for result in results]
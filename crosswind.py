@@ -0,0 +1,137 @@
+# p2app/engine/crosswind.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Picks the best runway end at many airports at once for the wind at each, by
+# splitting the wind into its headwind and crosswind components along every
+# runway end in a few whole-array NumPy operations.
+#
+# The heading of every end of every open runway is read from the database once,
+# into arrays ordered by airport_id, so each batch of airports only has to find
+# its runway ends in them (by binary search) and compute.  A runway end missing
+# its heading is given the reciprocal of the other end's, or failing that, the
+# heading its identifier names (e.g., 90 for "09L").
+
+import re
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from p2app.engine.coordinates import require_numpy
+from p2app.events.runways import BestRunwayEnd
+
+_RUNWAY_NUMBER = re.compile(r'^(\d{1,2})')
+
+
+def _heading_from_ident(ident):
+    """Returns the heading a runway end's identifier names, or None if it names none"""
+    match = _RUNWAY_NUMBER.match(ident or '')
+    if match is None or not 1 <= int(match.group(1)) <= 36:
+        return None
+    return int(match.group(1)) * 10.0
+
+
+class RunwayHeadings:
+    """The airport, runway, identifier and heading of every end of every open runway,
+    as arrays ordered by airport_id."""
+
+    def __init__(self, airport_ids, runway_ids, idents, headings):
+        """Initializes a store of the given arrays"""
+        self.airport_ids = airport_ids
+        self.runway_ids = runway_ids
+        self.idents = idents
+        self.headings = headings
+
+    @classmethod
+    def load(cls, connection):
+        """
+        Read the headings of the ends of every open runway.
+
+        Args:
+            connection (sqlite3.Connection): The connection to the database.
+
+        Returns:
+            RunwayHeadings: The headings.
+
+        Raises:
+            ImportError: If NumPy isn't installed.
+            sqlite3.Error: If the runways couldn't be read.
+        """
+        require_numpy('Choosing runways for the wind at many airports at once')
+        airport_ids = []
+        runway_ids = []
+        idents = []
+        headings = []
+        for runway_id, airport_id, le_ident, le_heading, he_ident, he_heading in connection.execute(
+                "SELECT runway_id, airport_id, le_ident, le_heading_deg, he_ident, he_heading_deg "
+                "FROM runway WHERE closed = 0 ORDER BY airport_id, runway_id"):
+            if le_heading is None and he_heading is not None:
+                le_heading = (he_heading + 180.0) % 360.0
+            elif he_heading is None and le_heading is not None:
+                he_heading = (le_heading + 180.0) % 360.0
+            for ident, heading in ((le_ident, le_heading), (he_ident, he_heading)):
+                if heading is None:
+                    heading = _heading_from_ident(ident)
+                if heading is not None:
+                    airport_ids.append(airport_id)
+                    runway_ids.append(runway_id)
+                    idents.append(ident)
+                    headings.append(heading)
+
+        return cls(numpy.array(airport_ids, dtype = numpy.int64), numpy.array(runway_ids, dtype = numpy.int64),
+                   numpy.array(idents, dtype = object), numpy.array(headings, dtype = numpy.float64))
+
+    def __len__(self):
+        """Returns the number of runway ends in the store"""
+        return len(self.airport_ids)
+
+    def best_runway_ends(self, airport_ids, wind_directions_deg, wind_speeds):
+        """
+        Find the best runway end at each of many airports for the wind there: the one
+        with the most headwind, which is also the one with the least crosswind among
+        those facing into the wind.
+
+        Args:
+            airport_ids (Sequence[int]): The airports.
+            wind_directions_deg (Sequence[float]): The direction the wind at each airport
+                is blowing from, in degrees true.
+            wind_speeds (Sequence[float]): The speed of the wind at each airport, in any unit.
+
+        Returns:
+            list[BestRunwayEnd or None]: For each airport, in order, its best runway end,
+            with the headwind (negative for a tailwind) and crosswind (positive from the
+            right) components in the unit of the wind's speed; or None if it has no open
+            runway with a known heading.
+        """
+        airport_ids = numpy.asarray(airport_ids, dtype = numpy.int64)
+        directions = numpy.asarray(wind_directions_deg, dtype = numpy.float64)
+        speeds = numpy.asarray(wind_speeds, dtype = numpy.float64)
+
+        # Each airport's runway ends are a contiguous run of the arrays, since they're
+        # ordered by airport_id; list the positions of every run's ends together
+        starts = numpy.searchsorted(self.airport_ids, airport_ids, side = 'left')
+        stops = numpy.searchsorted(self.airport_ids, airport_ids, side = 'right')
+        counts = stops - starts
+        owners = numpy.repeat(numpy.arange(len(airport_ids)), counts)
+        offsets = numpy.arange(counts.sum()) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+        ends = numpy.repeat(starts, counts) + offsets
+
+        angles = numpy.radians(directions[owners] - self.headings[ends])
+        headwinds = speeds[owners] * numpy.cos(angles)
+        crosswinds = speeds[owners] * numpy.sin(angles)
+
+        # Order the runway ends by airport, then by most headwind, so each airport's
+        # best end is the first of its run
+        order = numpy.lexsort((-headwinds, owners))
+        firsts = order[(numpy.cumsum(counts) - counts)[counts > 0]]
+
+        results = [None] * len(airport_ids)
+        for best in firsts:
+            end = ends[best]
+            results[owners[best]] = BestRunwayEnd(
+                int(self.airport_ids[end]), int(self.runway_ids[end]), self.idents[end],
+                float(self.headings[end]), float(headwinds[best]), float(crosswinds[best]))
+        return results
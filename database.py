@@ -14,16 +14,21 @@ from pathlib import Path
 
 
 class OpenDatabaseEvent:
-    def __init__(self, path: Path):
+    def __init__(self, path: Path, profile: str | None = None):
         self._path = path
+        self._profile = profile
 
 
     def path(self) -> Path:
         return self._path
 
 
+    def profile(self) -> str | None:
+        return self._profile
+
+
     def __repr__(self) -> str:
-        return f'{type(self).__name__}: path = {repr(self._path)}'
+        return f'{type(self).__name__}: path = {repr(self._path)}, profile = {repr(self._profile)}'
 
 
 
@@ -64,3 +69,37 @@ class DatabaseOpenFailedEvent:
 class DatabaseClosedEvent:
     def __repr__(self) -> str:
         return f'{type(self).__name__}'
+
+
+
+class IndexesBuiltEvent:
+    def __init__(self, index_names: list[str]):
+        self._index_names = index_names
+
+
+    def index_names(self) -> list[str]:
+        return self._index_names
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: index_names = {repr(self._index_names)}'
+
+
+
+class WriteSnapshotEvent:
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}'
+
+
+
+class SnapshotWrittenEvent:
+    def __init__(self, path: Path):
+        self._path = path
+
+
+    def path(self) -> Path:
+        return self._path
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: path = {repr(self._path)}'
@@ -0,0 +1,88 @@
+# p2app/engine/dispatcher.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# A registry that maps event classes to the handlers that process them, so the
+# engine can find the right handler for an event with a single lookup instead
+# of testing the event against every kind of event it knows about.
+
+
+class EventDispatcher:
+    """Maps event classes to handlers.
+
+    A handler is any callable that takes an event and returns an iterable of
+    result events (usually a generator function or a bound generator method).
+    Lookups are made by the exact class of the event first; if no handler was
+    registered for that class, the event's base classes are searched in method
+    resolution order, so a handler registered for a base class also handles its
+    subclasses. The result of each lookup is remembered, so every later event
+    of the same class costs one dictionary lookup.
+    """
+
+    def __init__(self):
+        """Initializes an empty dispatcher"""
+        self._handlers = {}
+        self._resolved = {}
+
+    def register(self, event_type, handler):
+        """
+        Register a handler for an event class, replacing any handler previously
+        registered for exactly that class.
+
+        Args:
+            event_type (type): The class of event the handler processes.
+            handler (callable): Takes an event and returns an iterable of events.
+        """
+        self._handlers[event_type] = handler
+        self._resolved.clear()
+
+    def unregister(self, event_type):
+        """
+        Remove the handler registered for an event class, if there is one.
+
+        Args:
+            event_type (type): The class of event whose handler is removed.
+        """
+        self._handlers.pop(event_type, None)
+        self._resolved.clear()
+
+    def handler_for(self, event):
+        """
+        Find the handler for an event.
+
+        Args:
+            event: The event to be handled.
+
+        Returns:
+            callable or None: The handler for the event, or None if no handler was
+            registered for its class or any of its base classes.
+        """
+        event_type = type(event)
+        try:
+            return self._resolved[event_type]
+        except KeyError:
+            pass
+
+        handler = None
+        for base in event_type.__mro__:
+            if base in self._handlers:
+                handler = self._handlers[base]
+                break
+
+        self._resolved[event_type] = handler
+        return handler
+
+    def dispatch(self, event):
+        """
+        A generator function that passes an event to its handler, yielding the
+        handler's results; events without a handler yield nothing.
+
+        Args:
+            event: The event to be handled.
+        """
+        handler = self.handler_for(event)
+        if handler is not None:
+            results = handler(event)
+            if results is not None:
+                yield from results
@@ -13,22 +13,43 @@
 #
 # YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
 
+import queue
+import threading
+import traceback
+
+from p2app.events.app import EndApplicationEvent, ErrorEvent
+
 
 
 class EventBus:
-    def __init__(self):
+    def __init__(self, asynchronous: bool = False, batch_size: int = 100,
+                 poll_interval_ms: int = 10, max_pending_results: int = 1000):
         self._view = None
         self._engine = None
         self._is_debug_mode = False
+        self._is_asynchronous = asynchronous
+        self._batch_size = batch_size
+        self._poll_interval_ms = poll_interval_ms
+        self._requests = queue.Queue()
+        self._results = queue.Queue(maxsize = max_pending_results)
+        self._search_generation = 0
+        self._worker = None
 
 
     def register_view(self, view):
         self._view = view
 
+        if self._is_asynchronous:
+            self._view.after(self._poll_interval_ms, self._deliver_results)
+
 
     def register_engine(self, engine):
         self._engine = engine
 
+        if self._is_asynchronous and self._worker is None:
+            self._worker = threading.Thread(target = self._run_engine, daemon = True)
+            self._worker.start()
+
 
     def enable_debug_mode(self):
         self._is_debug_mode = True
@@ -42,8 +63,78 @@ class EventBus:
         if self._is_debug_mode:
             print(f'Sent by view  : {event}')
 
+        if self._is_asynchronous:
+            supersedes = self._engine.preempt(event)
+            if supersedes:
+                self._search_generation += 1
+            self._requests.put((event, self._search_generation if supersedes else None))
+            return
+
         for result_event in self._engine.process_event(event):
-            if self._is_debug_mode:
-                print(f'Sent by engine: {result_event}')
+            self._send_to_view(result_event)
+
+
+    def _send_to_view(self, result_event):
+        if self._is_debug_mode:
+            print(f'Sent by engine: {result_event}')
+
+        self._view.handle_event(result_event)
+
+
+    # In asynchronous mode, the engine runs on a worker thread of its own, so a slow
+    # query never blocks the user interface; since the engine is only ever called
+    # from that thread, any database connection it opens belongs to it.  Events are
+    # processed one at a time in the order they were sent, and their results are
+    # queued in the order the engine generated them.  The engine is told about each
+    # event as it's sent, though, so a new search can stop one still in progress.
+    #
+    # Each search is tagged with a generation that's advanced whenever a newer search
+    # (or a cancellation) supersedes it, so a search that's still waiting its turn when
+    # it's superseded is never run, and the results of one that was already running are
+    # discarded rather than reaching the view after the newer search has started.  The
+    # results queue is bounded, so the engine waits for the view to catch up rather than
+    # holding a whole large search in memory.
+    #
+    # tkinter may only be used from the thread running its main loop, so the results
+    # are delivered from there, by a callback the main loop runs every few
+    # milliseconds, in batches small enough to keep the user interface responsive
+    # while a large search is coming in.
+
+    def _is_superseded(self, generation):
+        return generation is not None and generation != self._search_generation
+
+
+    def _run_engine(self):
+        while True:
+            event, generation = self._requests.get()
+
+            if self._is_superseded(generation):
+                continue
+
+            try:
+                for result_event in self._engine.process_event(event):
+                    self._results.put((result_event, generation))
+            except Exception as e:
+                self._results.put((ErrorEvent(f'Unexpected error: {e}'), generation))
+
+
+    def _deliver_results(self):
+        for _ in range(self._batch_size):
+            try:
+                result_event, generation = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            if self._is_superseded(generation):
+                continue
+
+            try:
+                self._send_to_view(result_event)
+            except Exception:
+                # One event the view fails to handle mustn't stop the rest from being delivered
+                traceback.print_exc()
+
+            if isinstance(result_event, EndApplicationEvent):
+                return
 
-            self._view.handle_event(result_event)
+        self._view.after(self._poll_interval_ms, self._deliver_results)
@@ -0,0 +1,88 @@
+# export.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Exports a table, or the results of a search, from a database to a CSV or JSON
+# Lines file without starting the user interface, e.g.:
+#
+#     python export.py airport.db region regions.csv
+#     python export.py airport.db airport airports.jsonl.gz --format jsonl --gzip
+#     python export.py airport.db region us_regions.csv --search --code US-CA
+#
+# With --search, the table must be continent, country or region, and the rows
+# exported are the ones that the corresponding search in the user interface
+# would find.
+
+import argparse
+import sys
+from pathlib import Path
+
+from p2app import Engine
+from p2app.events.continents import StartContinentSearchEvent
+from p2app.events.countries import StartCountrySearchEvent
+from p2app.events.regions import StartRegionSearchEvent
+from p2app.events.database import OpenDatabaseEvent, DatabaseOpenFailedEvent, CloseDatabaseEvent
+from p2app.events.exports import ExportTableEvent, ExportSearchEvent, ExportCompletedEvent, ExportFailedEvent
+
+
+def _parse_arguments():
+    parser = argparse.ArgumentParser(description = 'Export a table or search results to CSV or JSON Lines.')
+    parser.add_argument('database', type = Path, help = 'the path to the database')
+    parser.add_argument('table', help = 'the table to export (or search, with --search)')
+    parser.add_argument('output', type = Path, help = 'the path to the file to write')
+    parser.add_argument('--format', choices = ['csv', 'jsonl'], default = 'csv')
+    parser.add_argument('--gzip', action = 'store_true', help = 'compress the output with gzip')
+    parser.add_argument('--search', action = 'store_true', help = 'export search results rather than the whole table')
+    parser.add_argument('--code', help = 'the continent, country or region code to search for')
+    parser.add_argument('--local-code', help = 'the local code to search for (regions only)')
+    parser.add_argument('--name', help = 'the name to search for')
+    return parser.parse_args()
+
+
+def _search_event(arguments):
+    if arguments.table == 'continent':
+        return StartContinentSearchEvent(arguments.code, arguments.name)
+    elif arguments.table == 'country':
+        return StartCountrySearchEvent(arguments.code, arguments.name)
+    elif arguments.table == 'region':
+        return StartRegionSearchEvent(arguments.code, arguments.local_code, arguments.name)
+    else:
+        raise ValueError(f'{arguments.table} cannot be searched')
+
+
+def main():
+    arguments = _parse_arguments()
+    engine = Engine()
+
+    for event in engine.process_event(OpenDatabaseEvent(arguments.database, 'read-only')):
+        if isinstance(event, DatabaseOpenFailedEvent):
+            print(event.reason(), file = sys.stderr)
+            return 1
+
+    if arguments.search:
+        try:
+            export_event = ExportSearchEvent(
+                _search_event(arguments), arguments.output, arguments.format, arguments.gzip)
+        except ValueError as e:
+            print(e, file = sys.stderr)
+            return 1
+    else:
+        export_event = ExportTableEvent(arguments.table, arguments.output, arguments.format, arguments.gzip)
+
+    status = 1
+    for event in engine.process_event(export_event):
+        if isinstance(event, ExportCompletedEvent):
+            print(f'Exported {event.row_count()} rows to {event.path()}')
+            status = 0
+        elif isinstance(event, ExportFailedEvent):
+            print(event.reason(), file = sys.stderr)
+
+    for event in engine.process_event(CloseDatabaseEvent()):
+        pass
+
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
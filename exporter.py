@@ -0,0 +1,141 @@
+# p2app/engine/exporter.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Writes whole tables, or the results of searches, to CSV or JSON Lines files.
+#
+# Rows are written as they're read from the cursor, so memory use is the same no
+# matter how many rows there are.
+
+import csv
+import gzip
+import json
+
+from p2app.events import airports, continents, countries, regions
+from p2app.engine import airportHandler, continentHandler, countryHandler, regionHandler
+
+
+FORMATS = ('csv', 'jsonl')
+
+# The number of rows fetched from the cursor at a time
+_FETCH_SIZE = 1000
+
+# Each kind of search event that can be exported, with the function that carries it
+# out and the namedtuple type of its results
+_SEARCHES = {
+    continents.StartContinentSearchEvent: (continentHandler.continent_search, continents.Continent),
+    countries.StartCountrySearchEvent: (countryHandler.country_search, countries.Country),
+    regions.StartRegionSearchEvent: (regionHandler.region_search, regions.Region),
+    airports.StartAirportSearchEvent: (airportHandler.airport_search, airports.Airport)
+}
+
+
+def _open_output(path, compress):
+    """Opens a file to write text to, gzip-compressed if compress is True"""
+    if compress:
+        return gzip.open(path, 'wt', encoding = 'utf-8', newline = '')
+    else:
+        return open(path, 'w', encoding = 'utf-8', newline = '')
+
+
+def write_rows(rows, column_names, path, format = 'csv', compress = False):
+    """
+    Write rows to a file, one at a time.
+
+    Args:
+        rows (Iterable[tuple]): The rows.
+        column_names (list[str]): The name of each column, in order.
+        path (Path or str): The path to the file.
+        format (str): 'csv' (with a header row) or 'jsonl' (one JSON object per row).
+        compress (bool): Whether to gzip the file.
+
+    Returns:
+        int: The number of rows written.
+
+    Raises:
+        ValueError: If the format isn't one of FORMATS.
+        OSError: If the file couldn't be written.
+    """
+    if format not in FORMATS:
+        raise ValueError(f'Unknown export format: {format}')
+
+    count = 0
+    with _open_output(path, compress) as output:
+        if format == 'csv':
+            writer = csv.writer(output)
+            writer.writerow(column_names)
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        else:
+            for row in rows:
+                output.write(json.dumps(dict(zip(column_names, row)), ensure_ascii = False))
+                output.write('\n')
+                count += 1
+
+    return count
+
+
+def _fetch_rows(cursor):
+    """A generator function that yields the rows of a cursor, fetching them in chunks"""
+    rows = cursor.fetchmany(_FETCH_SIZE)
+    while rows:
+        yield from rows
+        rows = cursor.fetchmany(_FETCH_SIZE)
+
+
+def export_table(connection, table, path, format = 'csv', compress = False):
+    """
+    Write every row of a table to a file.
+
+    Args:
+        connection (sqlite3.Connection): The connection to the database.
+        table (str): The name of the table.
+        path (Path or str): The path to the file.
+        format (str): 'csv' or 'jsonl'.
+        compress (bool): Whether to gzip the file.
+
+    Returns:
+        int: The number of rows written.
+
+    Raises:
+        ValueError: If there's no such table or the format isn't one of FORMATS.
+        OSError: If the file couldn't be written.
+    """
+    exists = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+    if exists is None:
+        raise ValueError(f'There is no table named {table}')
+
+    cursor = connection.execute(f"SELECT * FROM {table}")
+    column_names = [description[0] for description in cursor.description]
+    return write_rows(_fetch_rows(cursor), column_names, path, format, compress)
+
+
+def export_search(connection, search_event, path, format = 'csv', compress = False):
+    """
+    Write the results of a continent, country, region or airport search to a file.
+
+    Args:
+        connection (sqlite3.Connection): The connection to the database.
+        search_event: A StartContinentSearchEvent, StartCountrySearchEvent, StartRegionSearchEvent
+            or StartAirportSearchEvent.
+        path (Path or str): The path to the file.
+        format (str): 'csv' or 'jsonl'.
+        compress (bool): Whether to gzip the file.
+
+    Returns:
+        int: The number of rows written.
+
+    Raises:
+        ValueError: If the search can't be exported or the format isn't one of FORMATS.
+        OSError: If the file couldn't be written.
+    """
+    try:
+        search, record_type = _SEARCHES[type(search_event)]
+    except KeyError:
+        raise ValueError(f'{type(search_event).__name__} searches cannot be exported')
+
+    results = search(connection.cursor(), search_event, _FETCH_SIZE)
+    return write_rows(results, list(record_type._fields), path, format, compress)
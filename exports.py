@@ -0,0 +1,101 @@
+# p2app/events/exports.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Events related to exporting tables, or the results of searches, to files.
+
+from pathlib import Path
+
+
+
+class ExportTableEvent:
+    def __init__(self, table: str, path: Path, format: str = 'csv', compress: bool = False):
+        self._table = table
+        self._path = path
+        self._format = format
+        self._compress = compress
+
+
+    def table(self) -> str:
+        return self._table
+
+
+    def path(self) -> Path:
+        return self._path
+
+
+    def format(self) -> str:
+        return self._format
+
+
+    def compress(self) -> bool:
+        return self._compress
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: table = {repr(self._table)}, path = {repr(self._path)}, ' + \
+               f'format = {repr(self._format)}, compress = {repr(self._compress)}'
+
+
+
+class ExportSearchEvent:
+    def __init__(self, search_event, path: Path, format: str = 'csv', compress: bool = False):
+        self._search_event = search_event
+        self._path = path
+        self._format = format
+        self._compress = compress
+
+
+    def search_event(self):
+        return self._search_event
+
+
+    def path(self) -> Path:
+        return self._path
+
+
+    def format(self) -> str:
+        return self._format
+
+
+    def compress(self) -> bool:
+        return self._compress
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: search_event = {repr(self._search_event)}, ' + \
+               f'path = {repr(self._path)}, format = {repr(self._format)}, compress = {repr(self._compress)}'
+
+
+
+class ExportCompletedEvent:
+    def __init__(self, path: Path, row_count: int):
+        self._path = path
+        self._row_count = row_count
+
+
+    def path(self) -> Path:
+        return self._path
+
+
+    def row_count(self) -> int:
+        return self._row_count
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: path = {repr(self._path)}, row_count = {repr(self._row_count)}'
+
+
+
+class ExportFailedEvent:
+    def __init__(self, reason: str):
+        self._reason = reason
+
+
+    def reason(self) -> str:
+        return self._reason
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: reason = {repr(self._reason)}'
@@ -0,0 +1,161 @@
+# p2app/engine/fulltext.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Full-text search over the names, keywords and municipalities of countries,
+# regions and airports, using SQLite's FTS5 extension.
+#
+# Each searchable table has an FTS5 index that refers to the table's own rows
+# rather than storing a copy of them ("external content"), and triggers on the
+# table keep the index up to date however the table is changed.  Results are
+# ranked by bm25, with a match in a name counting for more than one in keywords.
+
+from collections import namedtuple
+
+from p2app.engine import batch
+from p2app.events.airports import Airport
+from p2app.events.countries import Country
+from p2app.events.regions import Region
+
+
+FullTextTable = namedtuple('FullTextTable', ['table', 'id_column', 'columns', 'weights', 'record_type'])
+
+
+FULLTEXT_TABLES = {
+    'country': FullTextTable('country', 'country_id', ('name', 'keywords'), (10.0, 2.0), Country),
+    'region': FullTextTable('region', 'region_id', ('name', 'keywords'), (10.0, 2.0), Region),
+    'airport': FullTextTable('airport', 'airport_id', ('name', 'keywords', 'municipality'), (10.0, 2.0, 4.0), Airport)
+}
+
+
+def _index_name(fulltext_table):
+    return f'{fulltext_table.table}_fts'
+
+
+def _existing(connection):
+    """Returns the names of the tables and triggers in the database"""
+    return {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")}
+
+
+def _create(connection, fulltext_table):
+    """Creates the index and triggers for one table, then fills the index from the table"""
+    index = _index_name(fulltext_table)
+    table = fulltext_table.table
+    columns = ', '.join(fulltext_table.columns)
+    new_values = ', '.join(f'new.{column}' for column in fulltext_table.columns)
+    old_values = ', '.join(f'old.{column}' for column in fulltext_table.columns)
+    id_column = fulltext_table.id_column
+
+    connection.execute(
+        f"CREATE VIRTUAL TABLE {index} USING fts5({columns}, content = '{table}', content_rowid = '{id_column}', "
+        f"tokenize = 'unicode61 remove_diacritics 2')")
+    connection.execute(
+        f"CREATE TRIGGER {index}_insert AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {index} (rowid, {columns}) VALUES (new.{id_column}, {new_values}); END")
+    connection.execute(
+        f"CREATE TRIGGER {index}_delete AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {index} ({index}, rowid, {columns}) VALUES ('delete', old.{id_column}, {old_values}); END")
+    connection.execute(
+        f"CREATE TRIGGER {index}_update AFTER UPDATE ON {table} BEGIN "
+        f"INSERT INTO {index} ({index}, rowid, {columns}) VALUES ('delete', old.{id_column}, {old_values}); "
+        f"INSERT INTO {index} (rowid, {columns}) VALUES (new.{id_column}, {new_values}); END")
+    connection.execute(f"INSERT INTO {index} ({index}) VALUES ('rebuild')")
+
+
+def ensure_fulltext(connection, tables = None):
+    """
+    Create the full-text index (and the triggers maintaining it) for each of the given
+    tables that doesn't already have one.  If every index already exists, the database
+    isn't touched; otherwise they're created within a savepoint, so that edits the
+    connection hasn't committed yet are neither committed nor rolled back along with them.
+
+    Args:
+        connection (sqlite3.Connection): The connection to the database.
+        tables (Iterable[str] or None): The tables to index; None means all of FULLTEXT_TABLES.
+
+    Returns:
+        list[str]: The tables whose indexes were created.
+
+    Raises:
+        sqlite3.Error: If an index couldn't be created (e.g., the database is read-only).
+    """
+    existing = _existing(connection)
+    missing = [table for table in (FULLTEXT_TABLES if tables is None else tables)
+               if table in existing and _index_name(FULLTEXT_TABLES[table]) not in existing]
+    if missing:
+        with batch.savepoint(connection, 'ensure_fulltext'):
+            for table in missing:
+                _create(connection, FULLTEXT_TABLES[table])
+    return missing
+
+
+def drop_fulltext(connection):
+    """
+    Drop every full-text index and its triggers, e.g., so a bulk load doesn't have to
+    maintain them row by row; ensure_fulltext rebuilds them afterward.
+
+    Args:
+        connection (sqlite3.Connection): The connection to the database.
+
+    Returns:
+        list[str]: The tables whose indexes were dropped.
+    """
+    existing = _existing(connection)
+    dropped = []
+    for table, fulltext_table in FULLTEXT_TABLES.items():
+        index = _index_name(fulltext_table)
+        for trigger in (f'{index}_insert', f'{index}_delete', f'{index}_update'):
+            if trigger in existing:
+                connection.execute(f"DROP TRIGGER {trigger}")
+        if index in existing:
+            connection.execute(f"DROP TABLE {index}")
+            dropped.append(table)
+    return dropped
+
+
+def _match_expression(query):
+    """Turns what a user typed into an FTS5 query matching rows containing every word,
+    with the last word treated as a prefix (since it may not be finished yet)"""
+    words = query.split()
+    if not words:
+        return None
+    terms = ['"' + word.replace('"', '""') + '"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def fulltext_search(myCursor, table, query, limit = 50):
+    """
+    Search the names and keywords (and, for airports, municipalities) of a table,
+    ranked by relevance.
+
+    Args:
+        myCursor (sqlite3.Cursor): The SQLite cursor to execute the query.
+        table (str): 'country', 'region' or 'airport'.
+        query (str): The words to search for.
+        limit (int): The largest number of results to return.
+
+    Returns:
+        list[tuple]: (record, score) for each result, most relevant first; lower scores
+        are more relevant, as with bm25.
+
+    Raises:
+        ValueError: If the table can't be searched this way.
+    """
+    try:
+        fulltext_table = FULLTEXT_TABLES[table]
+    except KeyError:
+        raise ValueError(f'{table} cannot be searched by full text')
+
+    expression = _match_expression(query)
+    if expression is None:
+        return []
+
+    index = _index_name(fulltext_table)
+    weights = ', '.join(str(weight) for weight in fulltext_table.weights)
+    myCursor.execute(
+        f"SELECT {table}.*, bm25({index}, {weights}) AS score "
+        f"FROM {index} JOIN {table} ON {table}.{fulltext_table.id_column} = {index}.rowid "
+        f"WHERE {index} MATCH ? ORDER BY score LIMIT ?", (expression, limit))
+    return [(fulltext_table.record_type(*row[:-1]), row[-1]) for row in myCursor.fetchall()]
@@ -0,0 +1,162 @@
+# p2app/engine/fuzzy.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Fuzzy matching of country and region names, so a search still finds what the
+# user meant when they've misspelled a name or left out its accents.
+#
+# Each name is normalized and broken into trigrams (every run of three characters
+# in each word, ignoring punctuation, with the word padded by two spaces in front
+# and one behind, so short words and the starts of words count).  An inverted
+# index for each table maps every trigram to the records whose names contain it,
+# so the candidates for a query are found by counting, for each record, how many
+# of the query's trigrams it shares, and they're ranked by the similarity of the
+# two sets of trigrams.
+
+from collections import namedtuple
+
+from p2app.engine.text import fold
+from p2app.events.countries import Country
+from p2app.events.regions import Region
+
+
+FuzzyTable = namedtuple('FuzzyTable', ['table', 'id_column', 'record_type'])
+
+
+FUZZY_TABLES = {
+    'country': FuzzyTable('country', 'country_id', Country),
+    'region': FuzzyTable('region', 'region_id', Region)
+}
+
+
+# The similarity below which a record isn't considered a match by default
+DEFAULT_THRESHOLD = 0.3
+
+
+def trigrams(text):
+    """
+    Break text into the set of its trigrams, after normalizing it.
+
+    Args:
+        text (str or None): The text.
+
+    Returns:
+        frozenset[str]: The trigrams.
+    """
+    # Punctuation separates words, like spaces do
+    words = ''.join(character if character.isalnum() else ' ' for character in fold(text)).split()
+    result = set()
+    for word in words:
+        padded = f'  {word} '
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(result)
+
+
+class TrigramIndex:
+    """An inverted index from the trigrams of names to the records (e.g., Country or
+    Region namedtuples) with those names, keyed by the name of their table and their
+    primary key."""
+
+    def __init__(self):
+        """Initializes an empty index"""
+        self._postings = {table: {} for table in FUZZY_TABLES}
+        self._records = {}
+
+    @classmethod
+    def load(cls, connection):
+        """
+        Build an index of every record in the tables of FUZZY_TABLES.
+
+        Args:
+            connection (sqlite3.Connection): The connection to the database.
+
+        Returns:
+            TrigramIndex: The index.
+        """
+        index = cls()
+        for fuzzy_table in FUZZY_TABLES.values():
+            for row in connection.execute(f"SELECT * FROM {fuzzy_table.table}"):
+                index._add(fuzzy_table.table, fuzzy_table.record_type(*row))
+        return index
+
+    def _add(self, table, record):
+        key = (table, getattr(record, FUZZY_TABLES[table].id_column))
+        record_trigrams = trigrams(record.name)
+        self._records[key] = (record, record_trigrams)
+        postings = self._postings[table]
+        for trigram in record_trigrams:
+            postings.setdefault(trigram, set()).add(key[1])
+
+    def update(self, table, record):
+        """
+        Replace the entry of a record that has been saved, whether it was a new record
+        or a change to an existing one.
+
+        Args:
+            table (str): The name of the record's table.
+            record: The record.
+        """
+        if table not in FUZZY_TABLES:
+            return
+        self.remove(table, getattr(record, FUZZY_TABLES[table].id_column))
+        self._add(table, record)
+
+    def remove(self, table, entity_id):
+        """
+        Remove the entry of a record, if it's in the index.
+
+        Args:
+            table (str): The name of the record's table.
+            entity_id (int): The record's primary key.
+        """
+        entry = self._records.pop((table, entity_id), None)
+        if entry is None:
+            return
+        postings = self._postings[table]
+        for trigram in entry[1]:
+            entity_ids = postings[trigram]
+            entity_ids.discard(entity_id)
+            if not entity_ids:
+                del postings[trigram]
+
+    def search(self, table, name, limit = 20, threshold = DEFAULT_THRESHOLD):
+        """
+        Find the records of a table whose names are most similar to a name.
+
+        Args:
+            table (str): 'country' or 'region'.
+            name (str): The name, possibly misspelled.
+            limit (int): The largest number of matches to return.
+            threshold (float): The smallest similarity, between 0 and 1, of a match.
+
+        Returns:
+            list[tuple]: (record, similarity) for each match, most similar first, where
+            similarity is the number of trigrams the names share divided by the number
+            of trigrams in either.
+
+        Raises:
+            ValueError: If the table can't be searched this way.
+        """
+        if table not in FUZZY_TABLES:
+            raise ValueError(f'{table} cannot be searched by similar names')
+
+        query_trigrams = trigrams(name)
+        if not query_trigrams:
+            return []
+
+        postings = self._postings[table]
+        shared = {}
+        for trigram in query_trigrams:
+            for entity_id in postings.get(trigram, ()):
+                shared[entity_id] = shared.get(entity_id, 0) + 1
+
+        matches = []
+        for entity_id, count in shared.items():
+            record, record_trigrams = self._records[(table, entity_id)]
+            similarity = count / (len(query_trigrams) + len(record_trigrams) - count)
+            if similarity >= threshold:
+                matches.append((similarity, entity_id, record))
+
+        matches.sort(key = lambda match: (-match[0], match[1]))
+        return [(record, similarity) for similarity, entity_id, record in matches[:limit]]
@@ -0,0 +1,70 @@
+# p2app/engine/geo.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Great-circle geometry on a spherical Earth, shared by the engine's spatial
+# queries.  Distances are in kilometers and angles in degrees.
+
+import math
+
+
+# The mean radius of the Earth
+EARTH_RADIUS_KM = 6371.0088
+
+# Half the Earth's circumference: no two points are farther apart than this
+MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM
+
+
+def haversine_km(latitude1, longitude1, latitude2, longitude2):
+    """
+    Find the great-circle distance between two points.
+
+    Args:
+        latitude1, longitude1 (float): The first point.
+        latitude2, longitude2 (float): The second point.
+
+    Returns:
+        float: The distance between them, in kilometers.
+    """
+    phi1 = math.radians(latitude1)
+    phi2 = math.radians(latitude2)
+    half_dphi = (phi2 - phi1) / 2
+    half_dlambda = math.radians(longitude2 - longitude1) / 2
+    a = math.sin(half_dphi) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(half_dlambda) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_boxes(latitude, longitude, radius_km):
+    """
+    Find latitude/longitude boxes that together contain every point within a distance
+    of a point.  A circle that crosses the antimeridian is covered by two boxes, one on
+    each side of it; one that reaches a pole is covered by a box spanning every longitude.
+
+    Args:
+        latitude, longitude (float): The center of the circle.
+        radius_km (float): The radius of the circle, in kilometers.
+
+    Returns:
+        list[tuple[float, float, float, float]]: Each box's (min_latitude, min_longitude,
+        max_latitude, max_longitude).
+    """
+    angular_radius = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_latitude = latitude - angular_radius
+    max_latitude = latitude + angular_radius
+    if min_latitude <= -90.0 or max_latitude >= 90.0:
+        return [(max(min_latitude, -90.0), -180.0, min(max_latitude, 90.0), 180.0)]
+
+    # The farthest east or west a circle that doesn't reach a pole extends
+    longitude_radius = math.degrees(math.asin(
+        math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(latitude))))
+
+    min_longitude = longitude - longitude_radius
+    max_longitude = longitude + longitude_radius
+    if min_longitude < -180.0:
+        return [(min_latitude, min_longitude + 360.0, max_latitude, 180.0),
+                (min_latitude, -180.0, max_latitude, max_longitude)]
+    if max_longitude > 180.0:
+        return [(min_latitude, min_longitude, max_latitude, 180.0),
+                (min_latitude, -180.0, max_latitude, max_longitude - 360.0)]
+    return [(min_latitude, min_longitude, max_latitude, max_longitude)]
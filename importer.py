@@ -0,0 +1,356 @@
+# p2app/engine/importer.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Loads a release of the OurAirports data (https://ourairports.com/data/) into
+# the database, replacing what's already there.
+#
+# Each CSV file is read a row at a time and written in batches, so memory use
+# doesn't grow with the size of the file.  The OurAirports files refer to other
+# rows by code (e.g., a region's iso_country) rather than by id, so as each table
+# is loaded, a map from its codes to its ids is kept for the tables loaded after
+# it.  The engine's secondary indexes are dropped during the load and rebuilt
+# once at the end, which is much faster than maintaining them row by row.
+
+import csv
+from collections import namedtuple
+from pathlib import Path
+
+from p2app.engine import fulltext
+from p2app.engine import indexes
+from p2app.engine import parallel_loader
+from p2app.engine import runway_summary
+from p2app.engine import spatial
+from p2app.events.imports import TableImportResult
+
+
+# The default number of rows passed to each executemany call
+DEFAULT_BATCH_SIZE = 10000
+
+
+# OurAirports has no file of continents; these are the codes its other files use.
+CONTINENTS = [
+    ('AF', 'Africa'),
+    ('AN', 'Antarctica'),
+    ('AS', 'Asia'),
+    ('EU', 'Europe'),
+    ('NA', 'North America'),
+    ('OC', 'Oceania'),
+    ('SA', 'South America')
+]
+
+
+TableImport = namedtuple('TableImport', ['table', 'file_name', 'columns', 'convert'])
+
+
+def _text(value):
+    """Converts an optional text field, in which an empty string means NULL"""
+    return value if value != '' else None
+
+
+def _int(value):
+    """Converts an optional integer field"""
+    return int(float(value)) if value != '' else None
+
+
+def _real(value):
+    """Converts an optional real field"""
+    return float(value) if value != '' else None
+
+
+def _flag(value):
+    """Converts a yes/no or 1/0 field to 1 or 0"""
+    return 1 if value in ('1', 'yes', 'true') else 0
+
+
+# Each of these converts one row of an OurAirports file (as a dict) into the tuple
+# of values for its table's columns, using lookups (a dict of maps from codes to
+# ids, keyed by table name) to fill in foreign keys.  They return None for a row
+# that refers to something that isn't in the release, so it's skipped rather than
+# failing the foreign key constraint.  Each one also records the new row's id in
+# lookups, if later tables refer to it by code.
+#
+# They're module-level functions, rather than methods or lambdas, so they can be
+# sent to other processes.
+
+def _country_row(row, lookups):
+    continent_id = lookups['continent'].get(row['continent'])
+    if continent_id is None:
+        return None
+    country_id = int(row['id'])
+    lookups['country'][row['code']] = country_id
+    return (country_id, row['code'], row['name'], continent_id, row['wikipedia_link'], _text(row['keywords']))
+
+
+def _region_row(row, lookups):
+    continent_id = lookups['continent'].get(row['continent'])
+    country_id = lookups['country'].get(row['iso_country'])
+    if continent_id is None or country_id is None:
+        return None
+    region_id = int(row['id'])
+    lookups['region'][row['code']] = region_id
+    return (region_id, row['code'], row['local_code'], row['name'], continent_id, country_id,
+            _text(row['wikipedia_link']), _text(row['keywords']))
+
+
+def _airport_row(row, lookups):
+    continent_id = lookups['continent'].get(row['continent'])
+    country_id = lookups['country'].get(row['iso_country'])
+    region_id = lookups['region'].get(row['iso_region'])
+    if continent_id is None or country_id is None or region_id is None:
+        return None
+    airport_id = int(row['id'])
+    lookups['airport'][row['ident']] = airport_id
+    # airport.continent_id is declared as TEXT in the schema
+    return (airport_id, row['ident'], row['type'], row['name'], float(row['latitude_deg']),
+            float(row['longitude_deg']), _int(row['elevation_ft']), str(continent_id), country_id,
+            region_id, _text(row['municipality']), _flag(row['scheduled_service']), _text(row['gps_code']),
+            _text(row['iata_code']), _text(row['local_code']), _text(row['home_link']),
+            _text(row['wikipedia_link']), _text(row['keywords']))
+
+
+def _airport_frequency_row(row, lookups):
+    airport_id = lookups['airport'].get(row['airport_ident'])
+    if airport_id is None:
+        return None
+    return (int(row['id']), airport_id, row['type'], _text(row['description']), float(row['frequency_mhz']))
+
+
+def _runway_row(row, lookups):
+    airport_id = lookups['airport'].get(row['airport_ident'])
+    if airport_id is None:
+        return None
+    return (int(row['id']), airport_id, _int(row['length_ft']), _int(row['width_ft']), _text(row['surface']),
+            _flag(row['lighted']), _flag(row['closed']),
+            _text(row['le_ident']), _real(row['le_latitude_deg']), _real(row['le_longitude_deg']),
+            _int(row['le_elevation_ft']), _real(row['le_heading_degT']), _int(row['le_displaced_threshold_ft']),
+            _text(row['he_ident']), _real(row['he_latitude_deg']), _real(row['he_longitude_deg']),
+            _int(row['he_elevation_ft']), _real(row['he_heading_degT']), _int(row['he_displaced_threshold_ft']))
+
+
+def _navigation_aid_row(row, lookups):
+    if row['associated_airport']:
+        airport_id = lookups['airport'].get(row['associated_airport'])
+    else:
+        airport_id = None
+    return (int(row['id']), row['filename'], row['ident'], row['name'], row['type'], int(float(row['frequency_khz'])),
+            float(row['latitude_deg']), float(row['longitude_deg']), _int(row['elevation_ft']), row['iso_country'],
+            _int(row['dme_frequency_khz']), _text(row['dme_channel']), _real(row['dme_latitude_deg']),
+            _real(row['dme_longitude_deg']), _int(row['dme_elevation_ft']), _real(row['slaved_variation_deg']),
+            _real(row['magnetic_variation_deg']), _text(row['usageType']), _text(row['power']), airport_id)
+
+
+# The tables loaded from files, in an order in which every table is loaded after
+# the tables it refers to.
+TABLE_IMPORTS = [
+    TableImport('country', 'countries.csv',
+                ('country_id', 'country_code', 'name', 'continent_id', 'wikipedia_link', 'keywords'),
+                _country_row),
+    TableImport('region', 'regions.csv',
+                ('region_id', 'region_code', 'local_code', 'name', 'continent_id', 'country_id',
+                 'wikipedia_link', 'keywords'),
+                _region_row),
+    TableImport('airport', 'airports.csv',
+                ('airport_id', 'airport_ident', 'type', 'name', 'latitude_deg', 'longitude_deg', 'elevation_ft',
+                 'continent_id', 'country_id', 'region_id', 'municipality', 'scheduled_service', 'gps_code',
+                 'iata_code', 'local_code', 'home_link', 'wikipedia_link', 'keywords'),
+                _airport_row),
+    TableImport('airport_frequency', 'airport-frequencies.csv',
+                ('airport_frequency_id', 'airport_id', 'type', 'description', 'frequency_mhz'),
+                _airport_frequency_row),
+    TableImport('runway', 'runways.csv',
+                ('runway_id', 'airport_id', 'length_ft', 'width_ft', 'surface', 'lighted', 'closed',
+                 'le_ident', 'le_latitude_deg', 'le_longitude_deg', 'le_elevation_ft', 'le_heading_deg',
+                 'le_displaced_threshold_ft', 'he_ident', 'he_latitude_deg', 'he_longitude_deg',
+                 'he_elevation_ft', 'he_heading_deg', 'he_displaced_threshold_ft'),
+                _runway_row),
+    TableImport('navigation_aid', 'navaids.csv',
+                ('navigation_aid_id', 'filename', 'ident', 'name', 'type', 'frequency_khz', 'latitude_deg',
+                 'longitude_deg', 'elevation_ft', 'iso_country', 'dme_frequency_khz', 'dme_channel',
+                 'dme_latitude_deg', 'dme_longitude_deg', 'dme_elevation_ft', 'adjusted_variation_deg',
+                 'magnetic_variation_deg', 'usage_type', 'power', 'airport_id'),
+                _navigation_aid_row)
+]
+
+# The tables with enough rows, and enough numeric columns to convert, that parsing
+# them in parallel pays for starting the worker processes
+PARALLEL_TABLES = {'airport', 'runway', 'navigation_aid'}
+
+# Every table the importer replaces, in an order in which every table is emptied
+# before the tables it refers to.
+REPLACED_TABLES = ['navigation_aid', 'runway', 'airport_frequency', 'airport', 'region', 'country', 'continent']
+
+
+def new_lookups():
+    """Returns an empty set of the maps from codes to ids that the converters fill in"""
+    return {'continent': {}, 'country': {}, 'region': {}, 'airport': {}}
+
+
+def insert_query(table_import, schema = 'main'):
+    """Returns the parameterized INSERT statement for one of the tables loaded from a file"""
+    columns = ', '.join(table_import.columns)
+    placeholders = ', '.join('?' * len(table_import.columns))
+    return f"INSERT INTO {schema}.{table_import.table} ({columns}) VALUES ({placeholders})"
+
+
+def read_rows(path):
+    """A generator function that yields each row of a CSV file as a dict keyed by its header,
+    ignoring the byte order mark that some editors write at the start of a UTF-8 file"""
+    with open(path, newline = '', encoding = 'utf-8-sig') as csv_file:
+        yield from csv.DictReader(csv_file)
+
+
+def convert_rows(rows, table_import, lookups, skipped):
+    """A generator function that converts rows from a file into tuples for its table,
+    leaving out (and counting in skipped[0]) rows that can't be loaded"""
+    convert = table_import.convert
+    for row in rows:
+        values = convert(row, lookups)
+        if values is None:
+            skipped[0] += 1
+        else:
+            yield values
+
+
+def batches(values, batch_size):
+    """A generator function that groups an iterable into lists of at most batch_size items"""
+    batch = []
+    for value in values:
+        batch.append(value)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def load_continents(connection, lookups, schema = 'main'):
+    """
+    Load the continents, which aren't in a file of their own.
+
+    Args:
+        connection (sqlite3.Connection): The connection to the database.
+        lookups (dict): The maps from codes to ids, whose continent map is filled in.
+        schema (str): The name of the database schema to load them into.
+
+    Returns:
+        TableImportResult: The number of continents loaded.
+    """
+    rows = []
+    for continent_id, (continent_code, name) in enumerate(CONTINENTS, start = 1):
+        rows.append((continent_id, continent_code, name))
+        lookups['continent'][continent_code] = continent_id
+
+    connection.executemany(
+        f"INSERT INTO {schema}.continent (continent_id, continent_code, name) VALUES (?, ?, ?)", rows)
+    return TableImportResult('continent', len(rows), 0)
+
+
+def load_table(connection, table_import, path, lookups, batch_size = DEFAULT_BATCH_SIZE, schema = 'main',
+               workers = 1):
+    """
+    Stream one file into its table, a batch at a time.
+
+    Args:
+        connection (sqlite3.Connection): The connection to the database.
+        table_import (TableImport): Describes the table and the file.
+        path (Path): The path to the file.
+        lookups (dict): The maps from codes to ids.
+        batch_size (int): The number of rows passed to each executemany call.
+        schema (str): The name of the database schema to load the table into.
+        workers (int): The number of processes parsing the file, if it's one of the
+            PARALLEL_TABLES; with 1, it's parsed by this process.
+
+    Returns:
+        TableImportResult: The number of rows loaded and skipped.
+    """
+    if workers > 1 and table_import.table in PARALLEL_TABLES:
+        return _load_table_parallel(connection, table_import, path, lookups, schema, workers)
+
+    query = insert_query(table_import, schema)
+    skipped = [0]
+    loaded = 0
+    for batch in batches(convert_rows(read_rows(path), table_import, lookups, skipped), batch_size):
+        connection.executemany(query, batch)
+        loaded += len(batch)
+    return TableImportResult(table_import.table, loaded, skipped[0])
+
+
+def _load_table_parallel(connection, table_import, path, lookups, schema, workers):
+    """Loads one file into its table, parsing it in a pool of worker processes while
+    this process writes the converted rows"""
+    query = insert_query(table_import, schema)
+    loaded = 0
+    skipped = 0
+    for rows, range_skipped in parallel_loader.parse_parallel(path, table_import.convert, lookups, workers):
+        connection.executemany(query, rows)
+        loaded += len(rows)
+        skipped += range_skipped
+        if table_import.table == 'airport':
+            # The workers' additions to the lookups are lost, so the airport idents
+            # that later tables refer to are recorded here instead
+            lookups['airport'].update((values[1], values[0]) for values in rows)
+    return TableImportResult(table_import.table, loaded, skipped)
+
+
+def import_release(connection, directory, batch_size = DEFAULT_BATCH_SIZE, workers = 1):
+    """
+    Replace the contents of the database with a release of the OurAirports data.  The
+    whole load, including dropping the indexes, full-text and spatial indexes and runway
+    summary that are rebuilt afterward, is one transaction, so if it fails, the database
+    is left as it was.
+
+    Args:
+        connection (sqlite3.Connection): The connection to the database.
+        directory (Path or str): The directory containing the release's CSV files.
+        batch_size (int): The number of rows passed to each executemany call.
+        workers (int): The number of processes parsing the largest files.
+
+    Returns:
+        list[TableImportResult]: The number of rows loaded into, and skipped from, each table.
+
+    Raises:
+        FileNotFoundError: If one of the release's files is missing.
+        ValueError: If a file contains a value that can't be converted.
+        sqlite3.Error: If the rows couldn't be written to the database.
+    """
+    directory = Path(directory)
+    for table_import in TABLE_IMPORTS:
+        if not (directory / table_import.file_name).is_file():
+            raise FileNotFoundError(f'{table_import.file_name} is missing from {directory}')
+
+    connection.commit()
+    lookups = new_lookups()
+    results = []
+    fulltext_tables = []
+    spatial_index = False
+    runway_summary_table = False
+    try:
+        with connection:
+            # sqlite3 doesn't begin a transaction before DDL, so it's begun explicitly,
+            # making the drops below part of it, undone along with everything else
+            connection.execute("BEGIN")
+            indexes.drop_indexes(connection)
+            # The full-text and spatial indexes and the runway summary are rebuilt in one
+            # pass afterward, rather than by their triggers once for every row deleted
+            # and inserted
+            fulltext_tables = fulltext.drop_fulltext(connection)
+            spatial_index = spatial.drop_spatial_index(connection)
+            runway_summary_table = runway_summary.drop_runway_summary(connection)
+            for table in REPLACED_TABLES:
+                connection.execute(f"DELETE FROM {table}")
+
+            results.append(load_continents(connection, lookups))
+            for table_import in TABLE_IMPORTS:
+                path = directory / table_import.file_name
+                results.append(load_table(connection, table_import, path, lookups, batch_size, workers = workers))
+    finally:
+        indexes.ensure_indexes(connection)
+        fulltext.ensure_fulltext(connection, fulltext_tables)
+        if spatial_index:
+            spatial.ensure_spatial_index(connection)
+        if runway_summary_table:
+            runway_summary.ensure_runway_summary(connection)
+
+    return results
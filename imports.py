@@ -0,0 +1,105 @@
+# p2app/events/imports.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Events related to loading a release of the OurAirports data into the database.
+
+from collections import namedtuple
+from pathlib import Path
+
+
+
+TableImportResult = namedtuple('TableImportResult', ['table', 'loaded', 'skipped'])
+
+TableImportResult.__annotations__ = {
+    'table': str,
+    'loaded': int,
+    'skipped': int
+}
+
+
+
+TableSyncResult = namedtuple('TableSyncResult', ['table', 'inserted', 'updated', 'deleted'])
+
+TableSyncResult.__annotations__ = {
+    'table': str,
+    'inserted': list[str],
+    'updated': list[str],
+    'deleted': list[str]
+}
+
+
+
+class ImportReleaseEvent:
+    def __init__(self, directory: Path, workers: int = 1):
+        self._directory = directory
+        self._workers = workers
+
+
+    def directory(self) -> Path:
+        return self._directory
+
+
+    def workers(self) -> int:
+        return self._workers
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: directory = {repr(self._directory)}, workers = {repr(self._workers)}'
+
+
+
+class ReleaseImportedEvent:
+    def __init__(self, results: list[TableImportResult]):
+        self._results = results
+
+
+    def results(self) -> list[TableImportResult]:
+        return self._results
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: results = {repr(self._results)}'
+
+
+
+class ImportFailedEvent:
+    def __init__(self, reason: str):
+        self._reason = reason
+
+
+    def reason(self) -> str:
+        return self._reason
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: reason = {repr(self._reason)}'
+
+
+
+class SyncReleaseEvent:
+    def __init__(self, directory: Path):
+        self._directory = directory
+
+
+    def directory(self) -> Path:
+        return self._directory
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: directory = {repr(self._directory)}'
+
+
+
+class ReleaseSyncedEvent:
+    def __init__(self, results: list[TableSyncResult]):
+        self._results = results
+
+
+    def results(self) -> list[TableSyncResult]:
+        return self._results
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: results = {repr(self._results)}'
@@ -0,0 +1,97 @@
+# p2app/engine/indexes.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# The secondary indexes the engine relies on, beyond the primary keys and UNIQUE
+# columns declared in the schema, and the code that makes sure they exist.
+#
+# Each search the engine performs is an exact match on one or more columns, so
+# without these indexes every one of them would be a full scan of its table.
+
+import sqlite3
+from collections import namedtuple
+
+
+IndexDefinition = namedtuple('IndexDefinition', ['name', 'table', 'columns'])
+
+
+# Every index the engine manages.  region(local_code, name) serves searches by
+# local code alone or by local code and name; the foreign key indexes serve
+# joins and the foreign key checks made when a parent row is updated.
+MANAGED_INDEXES = [
+    IndexDefinition('continent_name_idx', 'continent', ('name',)),
+    IndexDefinition('country_name_idx', 'country', ('name',)),
+    IndexDefinition('country_continent_id_idx', 'country', ('continent_id',)),
+    IndexDefinition('region_local_code_name_idx', 'region', ('local_code', 'name')),
+    IndexDefinition('region_name_idx', 'region', ('name',)),
+    IndexDefinition('region_continent_id_idx', 'region', ('continent_id',)),
+    IndexDefinition('region_country_id_idx', 'region', ('country_id',)),
+    IndexDefinition('airport_country_id_idx', 'airport', ('country_id',)),
+    IndexDefinition('airport_region_id_idx', 'airport', ('region_id',)),
+    IndexDefinition('airport_frequency_airport_id_idx', 'airport_frequency', ('airport_id',)),
+    IndexDefinition('runway_airport_id_idx', 'runway', ('airport_id',)),
+    IndexDefinition('navigation_aid_airport_id_idx', 'navigation_aid', ('airport_id',))
+]
+
+
+def _existing(connection, kind):
+    """Returns the names of the schema objects of the given kind ('table' or 'index')"""
+    rows = connection.execute("SELECT name FROM sqlite_master WHERE type = ?", (kind,))
+    return {row[0] for row in rows}
+
+
+def ensure_indexes(connection, definitions = MANAGED_INDEXES):
+    """
+    Create any of the given indexes that don't already exist, then run ANALYZE so the
+    query planner has statistics for them.  Indexes on tables that aren't in the
+    database are skipped.
+
+    Args:
+        connection (sqlite3.Connection): The connection to the database.
+        definitions (list[IndexDefinition]): The indexes that should exist.
+
+    Returns:
+        list[str]: The names of the indexes that were created.
+
+    Raises:
+        sqlite3.Error: If an index couldn't be created (e.g., the database is read-only).
+    """
+    tables = _existing(connection, 'table')
+    indexes = _existing(connection, 'index')
+
+    built = []
+    for definition in definitions:
+        if definition.table in tables and definition.name not in indexes:
+            columns = ', '.join(definition.columns)
+            connection.execute(f"CREATE INDEX {definition.name} ON {definition.table} ({columns})")
+            built.append(definition.name)
+
+    if built:
+        connection.execute("ANALYZE")
+        connection.commit()
+
+    return built
+
+
+def drop_indexes(connection, definitions = MANAGED_INDEXES):
+    """
+    Drop any of the given indexes that exist, e.g., so a bulk load doesn't have to
+    maintain them row by row; ensure_indexes rebuilds them afterward.
+
+    Args:
+        connection (sqlite3.Connection): The connection to the database.
+        definitions (list[IndexDefinition]): The indexes to drop.
+
+    Returns:
+        list[str]: The names of the indexes that were dropped.
+    """
+    indexes = _existing(connection, 'index')
+
+    dropped = []
+    for definition in definitions:
+        if definition.name in indexes:
+            connection.execute(f"DROP INDEX {definition.name}")
+            dropped.append(definition.name)
+
+    return dropped
@@ -24,6 +24,33 @@ from p2app.events import regions
 from p2app.engine import regionHandler
 from p2app.events.regions import Region
 
+from p2app.events import airports
+from p2app.engine import airportHandler
+from p2app.engine import spatial
+from p2app.engine.coordinates import CoordinateStore
+from p2app.events import routes
+from p2app.engine import route_planner
+from p2app.events import runways
+from p2app.engine import runway_summary
+from p2app.engine.crosswind import RunwayHeadings
+
+from p2app.events import imports
+from p2app.engine import importer
+from p2app.engine import sync
+from p2app.events import exports
+from p2app.engine import exporter
+from p2app.events import searches
+from p2app.engine import fulltext
+from p2app.engine.autocomplete import AutocompleteIndex
+from p2app.engine import fuzzy
+from p2app.engine import query_builder
+
+from p2app.engine.dispatcher import EventDispatcher
+from p2app.engine import indexes
+from p2app.engine import profiles
+from p2app.engine import cancellation
+from p2app.engine.cache import EntityCache, SearchCache, TableGenerations
+
 class Engine:
     """An object that represents the application's engine, whose main role is to
     process events sent to it by the user interface, then generate events that are
@@ -31,120 +58,606 @@ class Engine:
     unaware of any details of how the engine is implemented.
     """
 
+    # The events that start a search that can be cancelled or given a time budget
+    _SEARCH_EVENTS = (
+        continents.StartContinentSearchEvent,
+        countries.StartCountrySearchEvent,
+        regions.StartRegionSearchEvent,
+        airports.StartAirportSearchEvent
+    )
+
+    # The events that write to the database, each with the event that reports the
+    # failure when the database is open read-only
+    _WRITE_FAILURE_EVENTS = {
+        continents.SaveNewContinentEvent: continents.SaveContinentFailedEvent,
+        continents.SaveContinentEvent: continents.SaveContinentFailedEvent,
+        continents.SaveNewContinentsEvent: app.ErrorEvent,
+        countries.SaveNewCountryEvent: countries.SaveCountryFailedEvent,
+        countries.SaveCountryEvent: countries.SaveCountryFailedEvent,
+        countries.SaveNewCountriesEvent: app.ErrorEvent,
+        regions.SaveNewRegionEvent: regions.SaveRegionFailedEvent,
+        regions.SaveRegionEvent: regions.SaveRegionFailedEvent,
+        regions.SaveNewRegionsEvent: app.ErrorEvent,
+        imports.ImportReleaseEvent: imports.ImportFailedEvent,
+        imports.SyncReleaseEvent: imports.ImportFailedEvent
+    }
+
     def __init__(self):
         """Initializes the engine"""
         self.connection = None
         self.cursor = None
+        self._path = None
+        self._profile = None
+        self.search_chunk_size = query_builder.DEFAULT_CHUNK_SIZE
+        self.manage_indexes = True
+        self.entity_cache = EntityCache()
+        self.table_generations = TableGenerations()
+        self.search_cache = SearchCache(self.table_generations)
+        self.search_time_budget = None
+        self._active_search = None
+        self.autocomplete_index = None
+        self.fuzzy_index = None
+        self.coordinate_store = None
+        self.runway_headings = None
+        self._dispatcher = EventDispatcher()
+        self._register_handlers()
+
+    def _register_handlers(self):
+        """Registers the engine's own handler for each kind of event it processes"""
+        self.register_handler(database.OpenDatabaseEvent, self._open_database)
+        self.register_handler(app.QuitInitiatedEvent, self._quit)
+        self.register_handler(database.CloseDatabaseEvent, self._close_database)
+        self.register_handler(database.WriteSnapshotEvent, self._write_snapshot)
+        self.register_handler(app.CancelSearchEvent, self._cancel_search)
+        self.register_handler(imports.ImportReleaseEvent, self._import_release)
+        self.register_handler(imports.SyncReleaseEvent, self._sync_release)
+        self.register_handler(exports.ExportTableEvent, self._export_table)
+        self.register_handler(exports.ExportSearchEvent, self._export_search)
+        self.register_handler(searches.StartRankedSearchEvent, self._ranked_search)
+        self.register_handler(searches.StartAutocompleteEvent, self._autocomplete)
+        self.register_handler(searches.StartFuzzySearchEvent, self._fuzzy_search)
+
+        self.register_handler(continents.StartContinentSearchEvent, self._search_continents)
+        self.register_handler(continents.SaveNewContinentEvent, self._save_new_continent)
+        self.register_handler(continents.SaveNewContinentsEvent, self._save_new_continents)
+        self.register_handler(continents.LoadContinentEvent, self._load_continent)
+        self.register_handler(continents.SaveContinentEvent, self._save_continent)
+
+        self.register_handler(countries.StartCountrySearchEvent, self._search_countries)
+        self.register_handler(countries.SaveNewCountryEvent, self._save_new_country)
+        self.register_handler(countries.SaveNewCountriesEvent, self._save_new_countries)
+        self.register_handler(countries.LoadCountryEvent, self._load_country)
+        self.register_handler(countries.SaveCountryEvent, self._save_country)
+        self.register_handler(countries.StartCountrySearchPageEvent, self._search_country_page)
+
+        self.register_handler(regions.StartRegionSearchEvent, self._search_regions)
+        self.register_handler(regions.SaveNewRegionEvent, self._save_new_region)
+        self.register_handler(regions.SaveNewRegionsEvent, self._save_new_regions)
+        self.register_handler(regions.LoadRegionEvent, self._load_region)
+        self.register_handler(regions.SaveRegionEvent, self._save_region)
+        self.register_handler(regions.StartRegionSearchPageEvent, self._search_region_page)
+
+        self.register_handler(airports.StartAirportSearchEvent, self._search_airports)
+        self.register_handler(airports.StartNearestAirportsEvent, self._nearest_airports)
+        self.register_handler(airports.StartAirportsWithinRadiusEvent, self._airports_within_radius)
+        self.register_handler(airports.StartAirportsInBoxEvent, self._airports_in_box)
+        self.register_handler(airports.StartDistanceMatrixEvent, self._distance_matrix)
+        self.register_handler(routes.StartRoutePlanEvent, self._plan_route)
+        self.register_handler(runways.StartRunwayCapabilitySearchEvent, self._search_runway_capabilities)
+        self.register_handler(runways.StartBestRunwaysEvent, self._best_runways)
+
+    def register_handler(self, event_type, handler):
+        """Registers a handler for a class of events (and its subclasses, unless
+        they have handlers of their own). The handler takes the event and returns
+        an iterable of the events sent back in response, so new kinds of events
+        (e.g., for airports or runways) can be plugged into the engine without
+        changing process_event."""
+        self._dispatcher.register(event_type, handler)
 
     def process_event(self, event):
         """A generator function that processes one event sent from the user interface,
         yielding zero or more events in response."""
-        if type(event) == database.OpenDatabaseEvent:
-            pathStr = str(event.path())
-            if not pathStr.endswith(".db"):
-                yield database.DatabaseOpenFailedEvent("Path was not to a database")
+        failure_event = self._read_only_failure(event)
+        if failure_event is not None:
+            yield failure_event("The database is open read-only, so it can't be changed")
+        else:
+            yield from self._dispatcher.dispatch(event)
+
+    def _read_only_failure(self, event):
+        """Returns the class of event reporting that event can't be processed because it
+        would write to a database opened read-only, or None if it can be processed.
+        (A read-only snapshot is an in-memory copy, so it may still be changed.)"""
+        if self._profile is None or not self._profile.read_only or self._profile.snapshot:
+            return None
+        for event_type in type(event).__mro__:
+            if event_type in self._WRITE_FAILURE_EVENTS:
+                return self._WRITE_FAILURE_EVENTS[event_type]
+        return None
+
+    def _open_database(self, event):
+        pathStr = str(event.path())
+        if not pathStr.endswith(".db"):
+            yield database.DatabaseOpenFailedEvent("Path was not to a database")
+        else:
+            try:
+                profile = profiles.get_profile(event.profile())
+            except ValueError as e:
+                yield database.DatabaseOpenFailedEvent(str(e))
+                return
+            self._disconnect()
+            try:
+                self.connection = profiles.open_connection(event.path(), profile)
+            except Exception as e:
+                yield database.DatabaseOpenFailedEvent("The file couldn't be opened")
             else:
-                try:
-                    self.connection = sqlite3.connect(event.path())
-                    self.connection.execute("PRAGMA foreign_keys = ON;")
-                    yield database.DatabaseOpenedEvent(event.path())
-                except Exception as e:
-                    yield database.DatabaseOpenFailedEvent("The file couldn't be opened")
+                self._path = event.path()
+                self._profile = profile
+                yield database.DatabaseOpenedEvent(event.path())
+                if profile.snapshot or not profile.read_only:
+                    yield from self._build_indexes()
 
-        if isinstance(event, app.QuitInitiatedEvent):
-            yield app.EndApplicationEvent()
+    def _build_indexes(self):
+        """Creates any of the engine's secondary indexes that are missing from the
+        open database, reporting the ones it built"""
+        if not self.manage_indexes:
+            return
+        try:
+            built = indexes.ensure_indexes(self.connection)
+            built += [f'{table}_fts' for table in fulltext.ensure_fulltext(self.connection)]
+        except sqlite3.Error:
+            # e.g., the database is read-only; searches still work, just without the indexes
+            return
+        if built:
+            yield database.IndexesBuiltEvent(built)
 
-        if isinstance(event, database.CloseDatabaseEvent):
-            yield database.DatabaseClosedEvent()
+    def _quit(self, event):
+        yield app.EndApplicationEvent()
 
-        #CONTINENTS
-        if isinstance(event, continents.StartContinentSearchEvent):
-            cursor = self.connection.cursor()
-            myContinentList = continentHandler.continent_search(cursor, event)
-            print(type(myContinentList))
-            if type(myContinentList) is list and len(myContinentList) > 0:
-                for con in myContinentList:
-                    yield continents.ContinentSearchResultEvent(con)
+    def _close_database(self, event):
+        if self._profile is not None and self._profile.write_back:
+            try:
+                profiles.write_back_snapshot(self.connection, self._path)
+            except sqlite3.Error as e:
+                yield app.ErrorEvent(f"The snapshot couldn't be written back: {e}")
+                return
+        self._disconnect()
+        yield database.DatabaseClosedEvent()
 
-        if isinstance(event, continents.SaveNewContinentEvent):
-            cursor = self.connection.cursor()
-            cursor2 = self.connection.cursor()
-            myContinent = continentHandler.load_new_continent(cursor, cursor2, event)
-            if type(myContinent) == Continent:
-                yield continents.ContinentSavedEvent(myContinent) #continent parameter
-            else:
-                yield continents.SaveContinentFailedEvent(myContinent) #string parameter
+    def _write_snapshot(self, event):
+        if self._profile is None or not self._profile.write_back:
+            yield app.ErrorEvent("The open database is not a snapshot that can be written back")
+            return
+        try:
+            profiles.write_back_snapshot(self.connection, self._path)
+        except sqlite3.Error as e:
+            yield app.ErrorEvent(f"The snapshot couldn't be written back: {e}")
+        else:
+            yield database.SnapshotWrittenEvent(self._path)
+
+    def _import_release(self, event):
+        try:
+            results = importer.import_release(self.connection, event.directory(), workers = event.workers())
+        except (OSError, ValueError, KeyError, sqlite3.Error) as e:
+            yield imports.ImportFailedEvent(f"The release couldn't be imported: {e}")
+        else:
+            self._tables_replaced(importer.REPLACED_TABLES)
+            yield imports.ReleaseImportedEvent(results)
+
+    def _sync_release(self, event):
+        try:
+            results = sync.sync_release(self.connection, event.directory())
+        except (OSError, ValueError, KeyError, sqlite3.Error) as e:
+            yield imports.ImportFailedEvent(f"The release couldn't be synchronized: {e}")
+        else:
+            changed = [result.table for result in results
+                       if result.inserted or result.updated or result.deleted]
+            for result in results:
+                if result.deleted:
+                    changed += sync.DEPENDENT_TABLES.get(result.table, [])
+            self._tables_replaced(changed)
+            yield imports.ReleaseSyncedEvent(results)
+
+    def _export_table(self, event):
+        try:
+            row_count = exporter.export_table(
+                self.connection, event.table(), event.path(), event.format(), event.compress())
+        except (OSError, ValueError, sqlite3.Error) as e:
+            yield exports.ExportFailedEvent(f"The table couldn't be exported: {e}")
+        else:
+            yield exports.ExportCompletedEvent(event.path(), row_count)
+
+    def _export_search(self, event):
+        try:
+            row_count = exporter.export_search(
+                self.connection, event.search_event(), event.path(), event.format(), event.compress())
+        except (OSError, ValueError, sqlite3.Error) as e:
+            yield exports.ExportFailedEvent(f"The search results couldn't be exported: {e}")
+        else:
+            yield exports.ExportCompletedEvent(event.path(), row_count)
+
+    def _ranked_search(self, event):
+        if event.table() not in fulltext.FULLTEXT_TABLES:
+            yield app.ErrorEvent(f'{event.table()} cannot be searched by full text')
+            return
+        try:
+            # The full-text indexes are built when the database is opened, but one may
+            # still be missing, e.g., if the engine's indexes aren't being managed
+            fulltext.ensure_fulltext(self.connection, [event.table()])
+            results = fulltext.fulltext_search(self.connection.cursor(), event.table(), event.query(), event.limit())
+        except sqlite3.Error as e:
+            yield app.ErrorEvent(f"The full-text search couldn't be made: {e}")
+            return
+        for record, score in results:
+            yield searches.RankedSearchResultEvent(event.table(), record, score)
+
+    def _autocomplete(self, event):
+        if self.autocomplete_index is None:
+            # The index is only built the first time it's needed after the database is opened
+            try:
+                self.autocomplete_index = AutocompleteIndex.load(self.connection)
+            except sqlite3.Error as e:
+                yield app.ErrorEvent(f"The autocomplete index couldn't be built: {e}")
+                return
+        matches = self.autocomplete_index.complete(event.prefix(), event.limit(), event.tables())
+        yield searches.AutocompleteResultsEvent(event.prefix(), matches)
+
+    def _fuzzy_search(self, event):
+        if event.table() not in fuzzy.FUZZY_TABLES:
+            yield app.ErrorEvent(f'{event.table()} cannot be searched by similar names')
+            return
+        if self.fuzzy_index is None:
+            try:
+                self.fuzzy_index = fuzzy.TrigramIndex.load(self.connection)
+            except sqlite3.Error as e:
+                yield app.ErrorEvent(f"The fuzzy search index couldn't be built: {e}")
+                return
+        threshold = fuzzy.DEFAULT_THRESHOLD if event.threshold() is None else event.threshold()
+        for record, similarity in self.fuzzy_index.search(event.table(), event.name(), event.limit(), threshold):
+            yield searches.FuzzySearchResultEvent(event.table(), record, similarity)
+
+    def _disconnect(self):
+        """Closes the connection to the open database, if there is one"""
+        if self.connection is not None:
+            self.connection.close()
+        self.connection = None
+        self._path = None
+        self._profile = None
+        self.entity_cache.clear()
+        self.search_cache.clear()
+        self.autocomplete_index = None
+        self.fuzzy_index = None
+        self.coordinate_store = None
+        self.runway_headings = None
+
+    def _tables_replaced(self, tables):
+        """Keeps the engine's caches consistent after the contents of whole tables
+        have been replaced (e.g., by an import)"""
+        self.entity_cache.clear()
+        for table in tables:
+            self.table_generations.bump(table)
+        self.autocomplete_index = None
+        self.fuzzy_index = None
+        if 'airport' in tables:
+            self.coordinate_store = None
+        if 'runway' in tables:
+            self.runway_headings = None
+
+    def _record_saved(self, table, entity_id, record):
+        """Keeps the engine's caches consistent after a record has been written
+        to the database, whether it was a new record or a change to an existing one"""
+        self.entity_cache.put(table, entity_id, record)
+        if self.autocomplete_index is not None:
+            self.autocomplete_index.update(table, record)
+        if self.fuzzy_index is not None:
+            self.fuzzy_index.update(table, record)
+
+    def _cached_search(self, table, criteria, search, event, result_event):
+        """A generator function that yields a result event for each result of a search,
+        from the search cache if the same search has been made since the table was last
+        written to, or else by streaming them from search (one of the *_search functions),
+        caching them afterward if there weren't too many of them.  A search that is
+        cancelled or runs out of time yields the results found so far, followed by a
+        SearchTruncatedEvent, and isn't cached."""
+        cached = self.search_cache.get(table, criteria)
+        if cached is not None:
+            for record in cached:
+                yield result_event(record)
+            return
+
+        time_budget = event.time_budget()
+        if time_budget is None:
+            time_budget = self.search_time_budget
+        control = cancellation.SearchControl(time_budget)
+        if self._active_search is not None:
+            self._active_search.cancel()
+        self._active_search = control
+
+        generation = self.search_cache.generation(table)
+        collected = []
+        # Only a search that actually stopped early is truncated; the deadline may pass
+        # afterward simply because whoever consumed the results was slow.
+        reason = None
+        try:
+            with cancellation.interruptible(self.connection, control):
+                cursor = self.connection.cursor()
+                for record in search(cursor, event, self.search_chunk_size):
+                    reason = control.stop_reason()
+                    if reason is not None:
+                        break
+                    if collected is not None:
+                        collected.append(record)
+                        if len(collected) > self.search_cache.max_rows_per_entry():
+                            collected = None
+                    yield result_event(record)
+        except sqlite3.OperationalError as e:
+            if not cancellation.is_interruption(e):
+                raise
+            reason = control.stop_reason()
+        finally:
+            if self._active_search is control:
+                self._active_search = None
+
+        if reason is not None:
+            yield app.SearchTruncatedEvent(reason)
+        elif collected is not None:
+            self.search_cache.put(table, criteria, generation, collected)
+
+    def cancel_search(self):
+        """Asks the search in progress, if any, to stop.  This is safe to call from a
+        thread other than the one processing events."""
+        control = self._active_search
+        if control is not None:
+            control.cancel()
 
-        if isinstance(event, continents.LoadContinentEvent):
+    def preempt(self, event):
+        """Called by the event bus, from the thread sending events, when an event is
+        sent while the engine may still be busy with earlier ones; a new search or a
+        CancelSearchEvent stops the search in progress rather than waiting behind it.
+        Returns True if the event supersedes any earlier searches, so the bus can drop
+        the ones still waiting and any of their results not yet delivered."""
+        if isinstance(event, self._SEARCH_EVENTS + (app.CancelSearchEvent,)):
+            self.cancel_search()
+            return True
+        return False
+
+    def _cancel_search(self, event):
+        self.cancel_search()
+        return ()
+
+    #CONTINENTS
+    def _search_continents(self, event):
+        criteria = (event.continent_code() or None, event.name() or None)
+        yield from self._cached_search('continent', criteria, continentHandler.continent_search, event, continents.ContinentSearchResultEvent)
+
+    def _save_new_continent(self, event):
+        cursor = self.connection.cursor()
+        myContinent = continentHandler.load_new_continent(cursor, event, self.table_generations)
+        if type(myContinent) == Continent:
+            self._record_saved('continent', myContinent.continent_id, myContinent)
+            yield continents.ContinentSavedEvent(myContinent) #continent parameter
+        else:
+            yield continents.SaveContinentFailedEvent(myContinent) #string parameter
+
+    def _save_new_continents(self, event):
+        results = continentHandler.load_new_continents(self.connection, event, self.table_generations)
+        for result in results:
+            if result.continent is not None:
+                self._record_saved('continent', result.continent.continent_id, result.continent)
+        yield continents.ContinentsSavedEvent(results)
+
+    def _load_continent(self, event):
+        myContinent = self.entity_cache.get('continent', event.continent_id())
+        if myContinent is None:
             cursor = self.connection.cursor()
             myContinent = continentHandler.fetchContinent(cursor, event)
-            yield continents.ContinentLoadedEvent(myContinent)
+            self.entity_cache.put('continent', myContinent.continent_id, myContinent)
+        yield continents.ContinentLoadedEvent(myContinent)
 
-        if isinstance(event, continents.SaveContinentEvent):
-            cursor = self.connection.cursor()
-            cursor2 = self.connection.cursor()
-            myContinent = continentHandler.saveContinent(cursor, cursor2, event)
-            if type(myContinent) == Continent:
-                yield continents.ContinentSavedEvent(myContinent) #continent parameter
-            else:
-                yield continents.SaveContinentFailedEvent(myContinent) #string parameter
+    def _save_continent(self, event):
+        cursor = self.connection.cursor()
+        cursor2 = self.connection.cursor()
+        myContinent = continentHandler.saveContinent(cursor, cursor2, event, self.table_generations)
+        if type(myContinent) == Continent:
+            self._record_saved('continent', myContinent.continent_id, myContinent)
+            yield continents.ContinentSavedEvent(myContinent) #continent parameter
+        else:
+            yield continents.SaveContinentFailedEvent(myContinent) #string parameter
 
     #COUNTRY
-        if isinstance(event, countries.StartCountrySearchEvent):
-            cursor = self.connection.cursor()
-            myCountryList = countryHandler.country_search(cursor, event)
-            if type(myCountryList) is list and len(myCountryList) > 0:
-                for con in myCountryList:
-                    yield countries.CountrySearchResultEvent(con)
+    def _search_countries(self, event):
+        criteria = (event.country_code() or None, event.name() or None)
+        yield from self._cached_search('country', criteria, countryHandler.country_search, event, countries.CountrySearchResultEvent)
 
-        if isinstance(event, countries.SaveNewCountryEvent):
-            cursor = self.connection.cursor()
-            cursor2 = self.connection.cursor()
-            myCountry = countryHandler.load_new_country(cursor, cursor2, event)
-            if type(myCountry) == Country:
-                yield countries.CountrySavedEvent(myCountry) #continent parameter
-            else:
-                yield countries.SaveCountryFailedEvent(myCountry) #string parameter
+    def _save_new_country(self, event):
+        cursor = self.connection.cursor()
+        myCountry = countryHandler.load_new_country(cursor, event, self.table_generations)
+        if type(myCountry) == Country:
+            self._record_saved('country', myCountry.country_id, myCountry)
+            yield countries.CountrySavedEvent(myCountry) #continent parameter
+        else:
+            yield countries.SaveCountryFailedEvent(myCountry) #string parameter
 
-        if isinstance(event, countries.LoadCountryEvent):
+    def _save_new_countries(self, event):
+        results = countryHandler.load_new_countries(self.connection, event, self.table_generations)
+        for result in results:
+            if result.country is not None:
+                self._record_saved('country', result.country.country_id, result.country)
+        yield countries.CountriesSavedEvent(results)
+
+    def _load_country(self, event):
+        myCountry = self.entity_cache.get('country', event.country_id())
+        if myCountry is None:
             cursor = self.connection.cursor()
             myCountry = countryHandler.fetchCountry(cursor, event)
-            yield countries.CountryLoadedEvent(myCountry)
+            self.entity_cache.put('country', myCountry.country_id, myCountry)
+        yield countries.CountryLoadedEvent(myCountry)
+
+    def _save_country(self, event):
+        cursor = self.connection.cursor()
+        myCountry = countryHandler.saveCountry(cursor, event, self.table_generations)
+        if type(myCountry) == Country:
+            self._record_saved('country', myCountry.country_id, myCountry)
+            yield countries.CountrySavedEvent(myCountry) #continent parameter
+        else:
+            yield countries.SaveCountryFailedEvent(myCountry) #string parameter
+
+    def _search_country_page(self, event):
+        cursor = self.connection.cursor()
+        try:
+            myCountryList, next_page_token = countryHandler.country_search_page(cursor, event)
+        except ValueError as e:
+            yield app.ErrorEvent(str(e))
+        else:
+            yield countries.CountrySearchPageEvent(myCountryList, next_page_token)
 
-        if isinstance(event, countries.SaveCountryEvent):
-            cursor = self.connection.cursor()
-            myCountry = countryHandler.saveCountry(cursor, event)
-            if type(myCountry) == Country:
-                yield countries.CountrySavedEvent(myCountry) #continent parameter
-            else:
-                yield countries.SaveCountryFailedEvent(myCountry) #string parameter
     #Region
-        if isinstance(event, regions.StartRegionSearchEvent):
-            cursor = self.connection.cursor()
-            myRegionList = regionHandler.region_search(cursor, event)
-            print(type(myRegionList))
-            if type(myRegionList) is list and len(myRegionList) > 0:
-                for con in myRegionList:
-                    yield regions.RegionSearchResultEvent(con)
+    def _search_regions(self, event):
+        criteria = (event.region_code() or None, event.local_code() or None, event.name() or None)
+        yield from self._cached_search('region', criteria, regionHandler.region_search, event, regions.RegionSearchResultEvent)
 
-        if isinstance(event, regions.SaveNewRegionEvent):
-            cursor = self.connection.cursor()
-            cursor2 = self.connection.cursor()
-            myRegion = regionHandler.load_new_region(cursor, cursor2, event)
-            if type(myRegion) == Region:
-                yield regions.RegionSavedEvent(myRegion) #continent parameter
-            else:
-                yield regions.SaveRegionFailedEvent(myRegion) #string parameter
+    def _save_new_region(self, event):
+        cursor = self.connection.cursor()
+        myRegion = regionHandler.load_new_region(cursor, event, self.table_generations)
+        if type(myRegion) == Region:
+            self._record_saved('region', myRegion.region_id, myRegion)
+            yield regions.RegionSavedEvent(myRegion) #continent parameter
+        else:
+            yield regions.SaveRegionFailedEvent(myRegion) #string parameter
 
-        if isinstance(event, regions.LoadRegionEvent):
+    def _save_new_regions(self, event):
+        results = regionHandler.load_new_regions(self.connection, event, self.table_generations)
+        for result in results:
+            if result.region is not None:
+                self._record_saved('region', result.region.region_id, result.region)
+        yield regions.RegionsSavedEvent(results)
+
+    def _load_region(self, event):
+        myRegion = self.entity_cache.get('region', event.region_id())
+        if myRegion is None:
             cursor = self.connection.cursor()
             myRegion = regionHandler.fetchRegion(cursor, event)
-            yield regions.RegionLoadedEvent(myRegion)
+            self.entity_cache.put('region', myRegion.region_id, myRegion)
+        yield regions.RegionLoadedEvent(myRegion)
 
-        if isinstance(event, regions.SaveRegionEvent):
-            cursor = self.connection.cursor()
-            myRegion = regionHandler.saveRegion(cursor, event)
-            if type(myRegion) == Region:
-                yield regions.RegionSavedEvent(myRegion) #continent parameter
-            else:
-                yield regions.SaveRegionFailedEvent(myRegion) #string parameter
\ No newline at end of file
+    def _save_region(self, event):
+        cursor = self.connection.cursor()
+        myRegion = regionHandler.saveRegion(cursor, event, self.table_generations)
+        if type(myRegion) == Region:
+            self._record_saved('region', myRegion.region_id, myRegion)
+            yield regions.RegionSavedEvent(myRegion) #continent parameter
+        else:
+            yield regions.SaveRegionFailedEvent(myRegion) #string parameter
+
+    def _search_region_page(self, event):
+        cursor = self.connection.cursor()
+        try:
+            myRegionList, next_page_token = regionHandler.region_search_page(cursor, event)
+        except ValueError as e:
+            yield app.ErrorEvent(str(e))
+        else:
+            yield regions.RegionSearchPageEvent(myRegionList, next_page_token)
+
+    #Airport
+    def _search_airports(self, event):
+        try:
+            criteria = query_builder.predicates_from('airport', event.criteria())
+        except ValueError as e:
+            yield app.ErrorEvent(str(e))
+            return
+        yield from self._cached_search('airport', criteria, airportHandler.airport_search, event, airports.AirportSearchResultEvent)
+
+    def _spatial_query(self, query, *arguments):
+        """Runs one of the spatial module's queries, building the spatial index the first
+        time it's needed, and returns its results, or an ErrorEvent if it couldn't run"""
+        try:
+            spatial.ensure_spatial_index(self.connection)
+            return query(self.connection.cursor(), *arguments)
+        except sqlite3.Error as e:
+            return app.ErrorEvent(f"The airports couldn't be searched by location: {e}")
+
+    def _nearest_airports(self, event):
+        results = self._spatial_query(spatial.nearest_airports, event.latitude(), event.longitude(), event.count(),
+                                      event.airport_type(), event.scheduled_service())
+        if isinstance(results, app.ErrorEvent):
+            yield results
+        else:
+            for airport, distance in results:
+                yield airports.NearbyAirportEvent(airport, distance)
+
+    def _airports_within_radius(self, event):
+        results = self._spatial_query(spatial.airports_within, event.latitude(), event.longitude(), event.radius_km(),
+                                      event.airport_type(), event.scheduled_service())
+        if isinstance(results, app.ErrorEvent):
+            yield results
+        else:
+            for airport, distance in results:
+                yield airports.NearbyAirportEvent(airport, distance)
+
+    def _airports_in_box(self, event):
+        results = self._spatial_query(spatial.airports_in_box, event.min_latitude(), event.min_longitude(),
+                                      event.max_latitude(), event.max_longitude(),
+                                      event.airport_type(), event.scheduled_service())
+        if isinstance(results, app.ErrorEvent):
+            yield results
+        else:
+            for airport in results:
+                yield airports.AirportSearchResultEvent(airport)
+
+    def _coordinates(self):
+        """Returns the store of the open database's airport coordinates, opening (and, if
+        the airports have changed, rebuilding) it the first time it's needed"""
+        if self.coordinate_store is None:
+            self.coordinate_store = CoordinateStore.open(self.connection, self._path)
+        return self.coordinate_store
+
+    def _distance_matrix(self, event):
+        try:
+            store = self._coordinates()
+            to_ids = event.from_ids() if event.to_ids() is None else event.to_ids()
+            distances = store.distance_matrix(event.from_ids(), to_ids)
+        except (ImportError, OSError, ValueError, sqlite3.Error) as e:
+            yield app.ErrorEvent(f"The distances couldn't be computed: {e}")
+        else:
+            yield airports.DistanceMatrixEvent(event.from_ids(), to_ids, distances)
+
+    def _plan_route(self, event):
+        try:
+            spatial.ensure_spatial_index(self.connection)
+            runway_summary.ensure_runway_summary(self.connection)
+            route = route_planner.plan_route(
+                self.connection.cursor(), event.from_airport_id(), event.to_airport_id(),
+                event.range_km(), event.min_runway_length_ft(), event.objective())
+        except (ValueError, sqlite3.Error) as e:
+            yield routes.RoutePlanFailedEvent(str(e))
+            return
+        if route is None:
+            yield routes.RoutePlanFailedEvent('There is no route within range of a suitable runway')
+        else:
+            yield routes.RoutePlannedEvent(route.airports, route.leg_distances_km, route.total_distance_km)
+
+    def _search_runway_capabilities(self, event):
+        try:
+            # The summary is only built the first time it's needed
+            runway_summary.ensure_runway_summary(self.connection)
+            results = runway_summary.capability_search(
+                self.connection.cursor(), event.min_length_ft(), event.min_width_ft(), event.lighted(),
+                event.surface_class(), event.airport_type())
+            for airport, summary in results:
+                yield runways.RunwayCapabilityResultEvent(airport, summary)
+        except (ValueError, sqlite3.Error) as e:
+            yield app.ErrorEvent(f"The airports couldn't be searched by runway: {e}")
+
+    def _best_runways(self, event):
+        if not (len(event.airport_ids()) == len(event.wind_directions_deg()) == len(event.wind_speeds())):
+            yield app.ErrorEvent('There must be a wind direction and speed for every airport')
+            return
+        try:
+            # The headings are only read the first time they're needed
+            if self.runway_headings is None:
+                self.runway_headings = RunwayHeadings.load(self.connection)
+            best_runway_ends = self.runway_headings.best_runway_ends(
+                event.airport_ids(), event.wind_directions_deg(), event.wind_speeds())
+        except (ImportError, sqlite3.Error) as e:
+            yield app.ErrorEvent(f"The best runways couldn't be found: {e}")
+        else:
+            yield runways.BestRunwaysEvent(best_runway_ends)
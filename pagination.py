@@ -0,0 +1,69 @@
+# p2app/engine/pagination.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Continuation tokens for paginated searches.
+#
+# A token records the table being searched and the primary key of the last row
+# on the page that was returned, so the next page is found by seeking past that
+# key (keyset pagination) rather than by skipping rows with OFFSET.  That makes
+# every page cost the same as the first one, however deep into the results it is.
+#
+# A token also records a digest of the search's predicates, so a token can only
+# continue the search that produced it, not one with different criteria.
+
+import base64
+import hashlib
+
+
+def _criteria_digest(predicates):
+    canonical = repr(tuple(predicates)).encode('utf-8')
+    return hashlib.blake2b(canonical, digest_size = 8).hexdigest()
+
+
+def encode_page_token(table, predicates, last_id):
+    """
+    Encode an opaque continuation token.
+
+    Args:
+        table (str): The name of the table being searched.
+        predicates (tuple[Predicate]): The search's predicates, in their canonical order.
+        last_id (int): The primary key of the last row on the current page.
+
+    Returns:
+        str: The continuation token.
+    """
+    raw = f'{table}:{_criteria_digest(predicates)}:{last_id}'.encode('ascii')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_page_token(table, predicates, token):
+    """
+    Decode a continuation token produced by encode_page_token.
+
+    Args:
+        table (str): The name of the table being searched.
+        predicates (tuple[Predicate]): The search's predicates, in their canonical order.
+        token (str or None): The continuation token, or None for the first page.
+
+    Returns:
+        int or None: The primary key to seek past, or None for the first page.
+
+    Raises:
+        ValueError: If the token is malformed or belongs to another table or to a
+            search with different criteria.
+    """
+    if token is None:
+        return None
+
+    try:
+        token_table, digest, last_id = base64.urlsafe_b64decode(token.encode('ascii')).decode('ascii').split(':')
+        last_id = int(last_id)
+    except (ValueError, UnicodeError):
+        raise ValueError('Invalid page token')
+
+    if token_table != table or digest != _criteria_digest(predicates):
+        raise ValueError('Page token belongs to a different search')
+
+    return last_id
@@ -0,0 +1,149 @@
+# p2app/engine/parallel_loader.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Parses large CSV files in a pool of processes, so that converting the rows of
+# the biggest tables (airports, runways and navigation aids, with their dozens of
+# numeric columns) isn't limited to what one core can do.
+#
+# The file is split into byte ranges that each begin at the start of a row, each
+# range is parsed and converted into typed rows by a worker process, and the
+# converted batches are handed back, in file order, to the caller, which remains
+# the only thing writing to the database.  Only a bounded number of ranges are in
+# flight at once, so memory use doesn't grow with the size of the file.
+
+import csv
+import io
+from concurrent.futures import ProcessPoolExecutor
+
+
+# The default size, in bytes, of the range of a file parsed by each task
+DEFAULT_CHUNK_BYTES = 1024 * 1024
+
+# How many ranges may be parsed (or waiting to be written) per worker process
+_PENDING_PER_WORKER = 2
+
+# The size of the blocks in which a file is scanned for row boundaries
+_SCAN_BLOCK_BYTES = 1024 * 1024
+
+
+def split_ranges(path, chunk_bytes = DEFAULT_CHUNK_BYTES):
+    """
+    Split a CSV file into byte ranges of roughly chunk_bytes each, every one of which
+    begins at the start of a row.  A newline only ends a row if it's outside quotes
+    (a quoted field may contain newlines), so the quotes are counted along the way.
+
+    Args:
+        path (Path): The path to the file.
+        chunk_bytes (int): The approximate size of each range.
+
+    Returns:
+        tuple[list[str], list[tuple[int, int]]]: The header's field names and the
+        (start, end) byte offsets of each range after the header.
+    """
+    with open(path, 'rb') as csv_file:
+        # Decoding the header as utf-8-sig drops a byte order mark from the first field
+        # name, and every range begins after the header, so none of them include it
+        header = csv_file.readline()
+        data_start = csv_file.tell()
+        fieldnames = next(csv.reader([header.decode('utf-8-sig')]))
+
+        ranges = []
+        range_start = data_start
+        offset = data_start
+        in_quotes = False
+        while True:
+            block = csv_file.read(_SCAN_BLOCK_BYTES)
+            if not block:
+                break
+
+            position = 0
+            while True:
+                target = max(range_start + chunk_bytes - offset, position)
+                if target >= len(block):
+                    break
+                newline = block.find(b'\n', target)
+                if newline == -1:
+                    break
+                # Each quote toggles whether we're inside a quoted field (a quote
+                # escaped within a field is doubled, so it toggles twice)
+                in_quotes ^= (block.count(b'"', position, newline) % 2 == 1)
+                position = newline + 1
+                if not in_quotes:
+                    ranges.append((range_start, offset + position))
+                    range_start = offset + position
+
+            in_quotes ^= (block.count(b'"', position) % 2 == 1)
+            offset += len(block)
+
+        if range_start < offset:
+            ranges.append((range_start, offset))
+
+    return fieldnames, ranges
+
+
+# The conversion function and lookups for the table being parsed, set once in each
+# worker process when the pool starts, rather than being sent with every task
+_convert = None
+_lookups = None
+
+
+def _initialize_worker(convert, lookups):
+    global _convert, _lookups
+    _convert = convert
+    _lookups = lookups
+
+
+def _parse_range(path, start, end, fieldnames):
+    """Parses and converts the rows in one byte range of a file, returning the
+    converted rows and the number of rows skipped"""
+    with open(path, 'rb') as csv_file:
+        csv_file.seek(start)
+        text = csv_file.read(end - start).decode('utf-8')
+
+    rows = []
+    skipped = 0
+    for row in csv.DictReader(io.StringIO(text, newline = ''), fieldnames = fieldnames):
+        values = _convert(row, _lookups)
+        if values is None:
+            skipped += 1
+        else:
+            rows.append(values)
+    return rows, skipped
+
+
+def parse_parallel(path, convert, lookups, workers, chunk_bytes = DEFAULT_CHUNK_BYTES):
+    """
+    A generator function that parses a CSV file in a pool of worker processes, yielding
+    the converted rows of each range of the file, in the order they appear in the file.
+
+    Changes that convert makes to lookups in the workers are not seen by the caller, so
+    any lookups that later tables need have to be filled in from the yielded rows.
+
+    Args:
+        path (Path): The path to the file.
+        convert (callable): A module-level function that converts a row (as a dict) into
+            a tuple, given lookups, or returns None if the row should be skipped.
+        lookups (dict): The maps from codes to ids passed to convert.
+        workers (int): The number of worker processes.
+        chunk_bytes (int): The approximate size of the range parsed by each task.
+
+    Yields:
+        tuple[list[tuple], int]: The converted rows of a range, and the number of rows
+        in the range that were skipped.
+    """
+    fieldnames, ranges = split_ranges(path, chunk_bytes)
+    max_pending = workers * _PENDING_PER_WORKER
+
+    with ProcessPoolExecutor(max_workers = workers, initializer = _initialize_worker,
+                             initargs = (convert, lookups)) as pool:
+        pending = []
+        next_range = 0
+        while pending or next_range < len(ranges):
+            while next_range < len(ranges) and len(pending) < max_pending:
+                start, end = ranges[next_range]
+                pending.append(pool.submit(_parse_range, path, start, end, fieldnames))
+                next_range += 1
+
+            yield pending.pop(0).result()
@@ -0,0 +1,168 @@
+# p2app/engine/profiles.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Named profiles describing how the engine's connection to the database is
+# tuned when it's opened, and the code that opens a connection with one.
+
+import sqlite3
+from collections import namedtuple
+from pathlib import Path
+
+
+ConnectionProfile = namedtuple(
+    'ConnectionProfile',
+    ['name', 'journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store',
+     'read_only', 'immutable', 'snapshot', 'write_back'])
+
+ConnectionProfile.__annotations__ = {
+    'name': str,
+    'journal_mode': str | None,
+    'synchronous': str | None,
+    'cache_size': int | None,
+    'mmap_size': int | None,
+    'temp_store': str | None,
+    'read_only': bool,
+    'immutable': bool,
+    'snapshot': bool,
+    'write_back': bool
+}
+
+
+# A setting of None leaves SQLite's default in place.  A negative cache_size is a
+# size in KiB rather than a number of pages, as in PRAGMA cache_size.
+PROFILES = {
+    # Exactly what the engine has always done.
+    'default': ConnectionProfile(
+        'default', None, None, None, None, None, False, False, False, False),
+
+    # Interactive use: readers don't block on the occasional write, and most reads
+    # are served from the page cache or the memory map.
+    'read-mostly': ConnectionProfile(
+        'read-mostly', 'WAL', 'NORMAL', -64 * 1024, 256 * 1024 * 1024, 'MEMORY', False, False, False, False),
+
+    # Imports: no fsync per transaction and a large cache for index builds.  A crash
+    # during a load can corrupt the file, so it's only meant for reloadable data.
+    'bulk-load': ConnectionProfile(
+        'bulk-load', 'MEMORY', 'OFF', -256 * 1024, 0, 'MEMORY', False, False, False, False),
+
+    # Lookup hosts: the file is opened read-only and memory-mapped.
+    'read-only': ConnectionProfile(
+        'read-only', None, None, -64 * 1024, 256 * 1024 * 1024, 'MEMORY', True, False, False, False),
+
+    # As read-only, but SQLite is also told that nothing else will change the file,
+    # so it skips locking and change detection entirely.
+    'read-only-immutable': ConnectionProfile(
+        'read-only-immutable', None, None, -64 * 1024, 256 * 1024 * 1024, 'MEMORY', True, True, False, False),
+
+    # Read-heavy sessions: the whole file is copied into an in-memory database when
+    # it's opened, so searches and loads never touch the disk.  Changes are lost
+    # when the database is closed.
+    'snapshot': ConnectionProfile(
+        'snapshot', None, None, None, None, 'MEMORY', True, False, True, False),
+
+    # As snapshot, but changes are copied back to the file when the database is
+    # closed (or when a WriteSnapshotEvent asks for it).
+    'snapshot-write-back': ConnectionProfile(
+        'snapshot-write-back', None, None, None, None, 'MEMORY', False, False, True, True)
+}
+
+
+def get_profile(name):
+    """
+    Look up a connection profile by name.
+
+    Args:
+        name (str or None): The name of the profile; None means the default profile.
+
+    Returns:
+        ConnectionProfile: The profile.
+
+    Raises:
+        ValueError: If there is no profile with that name.
+    """
+    if name is None:
+        name = 'default'
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f'Unknown connection profile: {name}')
+
+
+def open_connection(path, profile):
+    """
+    Open a connection to a database, tuned according to a profile, with foreign
+    key enforcement turned on.  For a snapshot profile, the connection is to an
+    in-memory copy of the database rather than to the file itself.
+
+    Args:
+        path (Path or str): The path to the database file.
+        profile (ConnectionProfile): The profile to apply.
+
+    Returns:
+        sqlite3.Connection: The open connection.
+
+    Raises:
+        sqlite3.Error: If the database couldn't be opened or configured.
+    """
+    if profile.read_only:
+        uri = Path(path).resolve().as_uri() + '?mode=ro'
+        if profile.immutable:
+            uri += '&immutable=1'
+        connection = sqlite3.connect(uri, uri = True)
+    else:
+        connection = sqlite3.connect(path)
+
+    if profile.snapshot:
+        connection = _copy_into_memory(connection)
+
+    try:
+        connection.execute("PRAGMA foreign_keys = ON;")
+        if profile.journal_mode is not None:
+            connection.execute(f"PRAGMA journal_mode = {profile.journal_mode}")
+        if profile.synchronous is not None:
+            connection.execute(f"PRAGMA synchronous = {profile.synchronous}")
+        if profile.cache_size is not None:
+            connection.execute(f"PRAGMA cache_size = {int(profile.cache_size)}")
+        if profile.mmap_size is not None:
+            connection.execute(f"PRAGMA mmap_size = {int(profile.mmap_size)}")
+        if profile.temp_store is not None:
+            connection.execute(f"PRAGMA temp_store = {profile.temp_store}")
+    except sqlite3.Error:
+        connection.close()
+        raise
+
+    return connection
+
+
+def _copy_into_memory(file_connection):
+    """Copies the database behind a connection into a new in-memory database,
+    closing the original connection and returning one to the copy"""
+    try:
+        memory_connection = sqlite3.connect(':memory:')
+        file_connection.backup(memory_connection)
+    finally:
+        file_connection.close()
+
+    return memory_connection
+
+
+def write_back_snapshot(connection, path):
+    """
+    Copy an in-memory snapshot back to the database file it was taken from,
+    committing any pending changes in the snapshot first.
+
+    Args:
+        connection (sqlite3.Connection): The connection to the in-memory snapshot.
+        path (Path or str): The path to the database file.
+
+    Raises:
+        sqlite3.Error: If the file couldn't be written.
+    """
+    connection.commit()
+    file_connection = sqlite3.connect(path)
+    try:
+        connection.backup(file_connection)
+    finally:
+        file_connection.close()
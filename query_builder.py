@@ -0,0 +1,185 @@
+# p2app/engine/query_builder.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Builds the parameterized SQL for searches of any table by any combination of
+# its columns, rather than each search spelling out a statement for every
+# combination of the criteria it accepts.
+#
+# A search is a table and a list of predicates (a column, an operator and a
+# value).  The SQL depends only on the table, the columns and operators used and
+# whether the search is paged (its "shape"), never on the values, which are
+# always passed as parameters.  So each shape is compiled once and remembered,
+# and every search of the same shape executes exactly the same statement, which
+# sqlite3's own statement cache then prepares only once.
+
+import functools
+from collections import namedtuple
+
+from p2app.events.airports import Airport
+from p2app.events.continents import Continent
+from p2app.events.countries import Country
+from p2app.events.regions import Region
+
+
+Predicate = namedtuple('Predicate', ['column', 'operator', 'value'])
+
+SearchTable = namedtuple('SearchTable', ['table', 'id_column', 'record_type'])
+
+
+SEARCH_TABLES = {
+    'continent': SearchTable('continent', 'continent_id', Continent),
+    'country': SearchTable('country', 'country_id', Country),
+    'region': SearchTable('region', 'region_id', Region),
+    'airport': SearchTable('airport', 'airport_id', Airport)
+}
+
+
+# The SQL for each operator a predicate may use, given its column
+OPERATORS = {
+    '=': '{} = ?',
+    '!=': '{} <> ?',
+    '<': '{} < ?',
+    '<=': '{} <= ?',
+    '>': '{} > ?',
+    '>=': '{} >= ?',
+    'like': '{} LIKE ?'
+}
+
+# The number of rows pulled from the cursor at a time while streaming search results
+DEFAULT_CHUNK_SIZE = 100
+
+
+def predicates_from(table, criteria):
+    """
+    Turn search criteria into predicates, leaving out the criteria with no value (so
+    an empty field in a search form doesn't restrict the search).
+
+    Args:
+        table (str): The name of the table searched.
+        criteria (dict or Iterable[tuple]): Maps each column either to a value it must
+            equal, or to an (operator, value) tuple, where the operator is one of OPERATORS.
+
+    Returns:
+        tuple[Predicate]: The predicates, in a canonical order, so that the same criteria
+        always produce the same predicates.
+
+    Raises:
+        ValueError: If the table, a column or an operator isn't known.
+    """
+    search_table = _search_table(table)
+    items = criteria.items() if isinstance(criteria, dict) else criteria
+
+    predicates = []
+    for column, value in items:
+        if column not in search_table.record_type._fields:
+            raise ValueError(f'{table} has no column named {column}')
+        operator = '='
+        if isinstance(value, tuple):
+            operator, value = value
+            if operator not in OPERATORS:
+                raise ValueError(f'{operator} is not a search operator')
+        if value is None or value == '':
+            continue
+        predicates.append(Predicate(column, operator, value))
+
+    return tuple(sorted(predicates, key = lambda predicate: (predicate.column, predicate.operator)))
+
+
+def _search_table(table):
+    try:
+        return SEARCH_TABLES[table]
+    except KeyError:
+        raise ValueError(f'{table} cannot be searched')
+
+
+@functools.lru_cache(maxsize = 256)
+def compile_search(table, shape, paged = False):
+    """
+    Compile the SQL for one shape of search.  The results are remembered, so this is
+    only worked out once for each shape.
+
+    Args:
+        table (str): The name of the table searched.
+        shape (tuple[tuple[str, str]]): The (column, operator) of each predicate.
+        paged (bool): Whether the statement seeks past an id and limits its results,
+            taking those as two more parameters after the predicates' values.
+
+    Returns:
+        str: The statement.
+    """
+    search_table = _search_table(table)
+    conditions = [OPERATORS[operator].format(column) for column, operator in shape]
+    if paged:
+        conditions.append(f'{search_table.id_column} > ?')
+
+    sql = f'SELECT * FROM {table}'
+    if conditions:
+        sql += ' WHERE ' + ' AND '.join(conditions)
+    if paged:
+        sql += f' ORDER BY {search_table.id_column} LIMIT ?'
+    return sql
+
+
+def _execute(myCursor, table, predicates, paged = False, extra_parameters = ()):
+    shape = tuple((predicate.column, predicate.operator) for predicate in predicates)
+    parameters = [predicate.value for predicate in predicates]
+    myCursor.execute(compile_search(table, shape, paged), (*parameters, *extra_parameters))
+
+
+def search(myCursor, table, predicates, chunk_size = DEFAULT_CHUNK_SIZE):
+    """
+    Search a table, streaming the results from the cursor in chunks rather than fetching
+    them all at once.  A search with no predicates finds nothing, rather than everything.
+
+    Args:
+        myCursor (sqlite3.Cursor): The SQLite cursor to execute the query.
+        table (str): The name of the table searched.
+        predicates (tuple[Predicate]): The predicates, usually from predicates_from.
+        chunk_size (int): The number of rows fetched from the cursor at a time.
+
+    Yields:
+        namedtuple: Each record matching every predicate.
+    """
+    if not predicates:
+        return
+
+    record_type = _search_table(table).record_type
+    _execute(myCursor, table, predicates)
+    rows = myCursor.fetchmany(chunk_size)
+    while rows:
+        for row in rows:
+            yield record_type(*row)
+        rows = myCursor.fetchmany(chunk_size)
+
+
+def search_page(myCursor, table, predicates, after_id, page_size):
+    """
+    Search a table for one page of results, ordered by primary key, by seeking past the
+    last primary key on the previous page.
+
+    Args:
+        myCursor (sqlite3.Cursor): The SQLite cursor to execute the query.
+        table (str): The name of the table searched.
+        predicates (tuple[Predicate]): The predicates, usually from predicates_from.
+        after_id (int or None): The last primary key on the previous page, or None for the first.
+        page_size (int): The largest number of records on the page.
+
+    Returns:
+        tuple[list, bool]: The records on the page, and whether there are more after it.
+
+    Raises:
+        ValueError: If the page size is not a positive whole number.
+    """
+    if type(page_size) is not int or page_size < 1:
+        raise ValueError('The page size must be a positive whole number')
+
+    if not predicates:
+        return [], False
+
+    record_type = _search_table(table).record_type
+    _execute(myCursor, table, predicates, paged = True,
+             extra_parameters = (-1 if after_id is None else after_id, page_size + 1))
+    rows = myCursor.fetchall()
+    return [record_type(*row) for row in rows[:page_size]], len(rows) > page_size
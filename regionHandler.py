@@ -1,58 +1,37 @@
 import sqlite3
 
-from p2app.events.regions import Region
+from p2app.events.regions import Region, RegionSaveResult
+from p2app.engine import batch
+from p2app.engine import query_builder
+from p2app.engine.pagination import encode_page_token, decode_page_token
 
 
-def region_search(myCursor, event):
+def region_search(myCursor, event, chunk_size = query_builder.DEFAULT_CHUNK_SIZE):
     """
-    Search for regions in the database based on the given event attributes.
+    Search for regions in the database based on the given event attributes, streaming
+    the results from the cursor in chunks rather than fetching them all at once.
 
     Args:
         myCursor (sqlite3.Cursor): The SQLite cursor to execute the query.
         event: An event object containing attributes for the search.
+        chunk_size (int): The number of rows fetched from the cursor at a time.
 
-    Returns:
-        list[Region] or None: A list of Region objects matching the search criteria, or None if no matches are found.
+    Yields:
+        Region: Each Region matching the search criteria, fetched while the query is still running.
     """
-    region_code = event.region_code()
-    local_code = event.local_code()
-    name = event.name()
-
-    if region_code and local_code and name: #6 possible combinations, 3 available
-        myCursor.execute("SELECT * FROM region WHERE region_code = ? and local_code = ? and name = ?", (region_code, local_code, name))
-    elif region_code and local_code: #2 available
-        myCursor.execute("SELECT * FROM region WHERE region_code = ? and local_code = ?", (region_code, local_code))
-    elif region_code and name:
-        myCursor.execute("SELECT * FROM region WHERE region_code = ? and name = ?", (region_code, name))
-    elif local_code and name:
-        myCursor.execute("SELECT * FROM region WHERE local_code = ? and name = ?", (local_code, name))
-    elif region_code: #1 available
-        myCursor.execute("SELECT * FROM region WHERE region_code = ?", (region_code,))
-    elif local_code:
-        myCursor.execute("SELECT * FROM region WHERE local_code = ?", (local_code,))
-    elif name:
-        myCursor.execute("SELECT * FROM region WHERE name = ?", (name,))
-    else:
-        return None
-
-    region_list = []
-    rows = myCursor.fetchall()
-    if rows:
-        for row in rows:
-            region = Region(*row)
-            region_list.append(region)
-        return region_list
-    else:
-        return
+    predicates = query_builder.predicates_from(
+        'region', {'region_code': event.region_code(), 'local_code': event.local_code(), 'name': event.name()})
+    yield from query_builder.search(myCursor, 'region', predicates, chunk_size)
 
-def load_new_region(myCursor, myCursor2, event):  # Perfect, Duplicate region Code, Empty fields dealt with
+def load_new_region(myCursor, event, generations = None):  # Perfect, Duplicate region Code, Empty fields dealt with
     """
-    Load a new region into the database, ensuring uniqueness of the region_code.
+    Load a new region into the database with a single INSERT, relying on the UNIQUE
+    constraint on region_code to reject a duplicate code.
 
     Args:
         myCursor (sqlite3.Cursor): The SQLite cursor for inserting the new region.
-        myCursor2 (sqlite3.Cursor): The SQLite cursor for checking the existence of region_code.
         event: An event object with region information.
+        generations (TableGenerations): Bumped for the table when the database is written to.
 
     Returns:
         region or str: The newly loaded region object or a message indicating if the region_code already exists.
@@ -67,27 +46,24 @@ def load_new_region(myCursor, myCursor2, event):  # Perfect, Duplicate region Co
     wikipedia_link = myRegion.wikipedia_link
     keywords = myRegion.keywords
 
-    # cursor 2 checks if code exists
-    myCursor2.execute(f'SELECT * FROM region WHERE region_code = "{region_code}"')
-    conCode = myCursor2.fetchone()
-
-    if conCode is None and keywords:
-        print("Started if statement")
-
-        # Creates new row
-        insert_query = "INSERT INTO region (region_code, local_code, name, continent_id, country_id, wikipedia_link, keywords) VALUES (?, ?, ?, ?, ?, ?, ?)"
-        try:
-            myCursor.execute(insert_query, (region_code, local_code, name, continent_id, country_id, wikipedia_link, keywords))
-        except Exception:
-            return "Please enter valid continent id and country_id"
-        myCursor.execute("SELECT * FROM region WHERE region_code = ? AND name = ?", (region_code, name))
-        myRow = myCursor.fetchone() #gets the id of the new one
-        myCursor.connection.commit()  # Commit the changes to the database
-        myRegion = Region(region_id = myRow[0], region_code = region_code, local_code = local_code, name = name, continent_id = continent_id, country_id = country_id, wikipedia_link = wikipedia_link, keywords = keywords)
-        return myRegion
-    else:
-        return "region Code already exists"
+    if not keywords:
+        return "Enter a keyword"
 
+    insert_query = "INSERT INTO region (region_code, local_code, name, continent_id, country_id, wikipedia_link, keywords) VALUES (?, ?, ?, ?, ?, ?, ?)"
+    try:
+        myCursor.execute(insert_query, (region_code, local_code, name, continent_id, country_id, wikipedia_link, keywords))
+    except sqlite3.IntegrityError as e:
+        if batch.is_duplicate(e):
+            return "region Code already exists"
+        return "Please enter valid continent id and country_id"
+    except sqlite3.Error as e:
+        return f"The region couldn't be saved: {e}"
+
+    myCursor.connection.commit()  # Commit the changes to the database
+    if generations is not None:
+        generations.bump('region')
+    myRegion = Region(region_id = myCursor.lastrowid, region_code = region_code, local_code = local_code, name = name, continent_id = continent_id, country_id = country_id, wikipedia_link = wikipedia_link, keywords = keywords)
+    return myRegion
 
 def fetchRegion(myCursor, event):  # Works perfectly
     """
@@ -105,7 +81,7 @@ def fetchRegion(myCursor, event):  # Works perfectly
     myRegion = Region(*myCursor.fetchone())
     return myRegion
 
-def saveRegion(myCursor, event):
+def saveRegion(myCursor, event, generations = None):
     """
     Save changes to a region in the database, checks if region code is unique.
 
@@ -113,6 +89,7 @@ def saveRegion(myCursor, event):
         myCursor (sqlite3.Cursor): The SQLite cursor to execute the update.
         myCursor2 (sqlite3.Cursor): The SQLite cursor for checking the existence of region_code.
         event: An event object with the region to save.
+        generations (TableGenerations): Bumped for the table when the database is written to.
 
     Returns:
         region or str: The saved region object or a message indicating if the region_code already exists.
@@ -127,9 +104,72 @@ def saveRegion(myCursor, event):
         try:
             myCursor.execute("UPDATE region SET region_code = ?, local_code = ?, name = ?, continent_id = ?, country_id = ?, wikipedia_link = ?, keywords = ? WHERE region_id = ?",
                              (myRegion.region_code, myRegion.local_code, myRegion.name, myRegion.continent_id, myRegion.country_id, myRegion.wikipedia_link, myRegion.keywords, myRegion.region_id))
+            if myCursor.rowcount != 1:
+                return "That region no longer exists"
+            if generations is not None:
+                generations.bump('region')
             return myRegion
         except sqlite3.Error as e:
             return str(e)
     else:
         return "Enter a keyword"
 
+
+def region_search_page(myCursor, event):
+    """
+    Search for one page of regions matching the given event attributes, ordered by region_id.
+    The next page is found by seeking past the last region_id on this one, so only the rows
+    on the page are read and materialized no matter how far into the results it is.
+
+    Args:
+        myCursor (sqlite3.Cursor): The SQLite cursor to execute the query.
+        event: An event object containing attributes for the search, a page size and a page token.
+
+    Returns:
+        tuple[list[Region], str or None]: The regions on the page and the token for the next
+        page, or None if this is the last page.
+
+    Raises:
+        ValueError: If the page token is not valid for this region search, or the page size
+            is not a positive whole number.
+    """
+    predicates = query_builder.predicates_from(
+        'region', {'region_code': event.region_code(), 'local_code': event.local_code(), 'name': event.name()})
+    last_id = decode_page_token('region', predicates, event.page_token())
+    region_list, more = query_builder.search_page(myCursor, 'region', predicates, last_id, event.page_size())
+    if more:
+        return region_list, encode_page_token('region', predicates, region_list[-1].region_id)
+    else:
+        return region_list, None
+
+def load_new_regions(myConnection, event, generations = None):
+    """
+    Load many new regions into the database at once.  A region must have a
+    region_code that's not already used (in the database or earlier in the batch),
+    a local_code, a name and keywords, and its continent_id and country_id must exist.
+
+    Args:
+        myConnection (sqlite3.Connection): The connection to the database.
+        event: An event object with the list of regions to save.
+        generations (TableGenerations): Bumped for the table when the database is written to.
+
+    Returns:
+        list[RegionSaveResult]: For each region, in order, either the saved Region or
+        the reason it wasn't saved.
+    """
+    continent_ids = batch.fetch_all_ids(myConnection, 'continent', 'continent_id')
+    country_ids = batch.fetch_all_ids(myConnection, 'country', 'country_id')
+
+    def check(reg):
+        if not reg.region_code or not reg.local_code or not reg.name:
+            return "Region code, local code and name are required"
+        elif not reg.keywords:
+            return "Enter a keyword"
+        elif reg.continent_id not in continent_ids or reg.country_id not in country_ids:
+            return "Please enter valid continent id and country_id"
+        return None
+
+    results = batch.save_new_records(myConnection, 'region', event.regions(), check,
+                                     "region Code already exists", "Please enter valid continent id and country_id",
+                                     generations)
+    return [RegionSaveResult(*result) for result in results]
@@ -32,11 +32,22 @@ Region.__annotations__ = {
 
 
 
+RegionSaveResult = namedtuple('RegionSaveResult', ['region', 'reason'])
+
+RegionSaveResult.__annotations__ = {
+    'region': Region | None,
+    'reason': str | None
+}
+
+
+
 class StartRegionSearchEvent:
-    def __init__(self, region_code: str, local_code: str, name: str):
+    def __init__(self, region_code: str, local_code: str, name: str,
+                 time_budget: float | None = None):
         self._region_code = region_code
         self._local_code = local_code
         self._name = name
+        self._time_budget = time_budget
 
 
     def region_code(self) -> str:
@@ -51,6 +62,10 @@ class StartRegionSearchEvent:
         return self._name
 
 
+    def time_budget(self) -> float | None:
+        return self._time_budget
+
+
     def __repr__(self) -> str:
         return f'{type(self).__name__}: region_code = {repr(self._region_code)}, ' + \
                f'local_name = {repr(self._local_code)}, name = {repr(self._name)}'
@@ -152,3 +167,88 @@ class SaveRegionFailedEvent:
 
     def __repr__(self) -> str:
         return f'{type(self).__name__}: reason = {repr(self._reason)}'
+
+
+
+class StartRegionSearchPageEvent:
+    def __init__(self, region_code: str, local_code: str, name: str,
+                 page_size: int, page_token: str | None = None):
+        self._region_code = region_code
+        self._local_code = local_code
+        self._name = name
+        self._page_size = page_size
+        self._page_token = page_token
+
+
+    def region_code(self) -> str:
+        return self._region_code
+
+
+    def local_code(self) -> str:
+        return self._local_code
+
+
+    def name(self) -> str:
+        return self._name
+
+
+    def page_size(self) -> int:
+        return self._page_size
+
+
+    def page_token(self) -> str | None:
+        return self._page_token
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: region_code = {repr(self._region_code)}, ' + \
+               f'local_name = {repr(self._local_code)}, name = {repr(self._name)}, ' + \
+               f'page_size = {repr(self._page_size)}, page_token = {repr(self._page_token)}'
+
+
+
+class RegionSearchPageEvent:
+    def __init__(self, regions: list[Region], next_page_token: str | None):
+        self._regions = regions
+        self._next_page_token = next_page_token
+
+
+    def regions(self) -> list[Region]:
+        return self._regions
+
+
+    def next_page_token(self) -> str | None:
+        return self._next_page_token
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: regions = {repr(self._regions)}, ' + \
+               f'next_page_token = {repr(self._next_page_token)}'
+
+
+
+class SaveNewRegionsEvent:
+    def __init__(self, regions: list[Region]):
+        self._regions = regions
+
+
+    def regions(self) -> list[Region]:
+        return self._regions
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: regions = {repr(self._regions)}'
+
+
+
+class RegionsSavedEvent:
+    def __init__(self, results: list[RegionSaveResult]):
+        self._results = results
+
+
+    def results(self) -> list[RegionSaveResult]:
+        return self._results
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: results = {repr(self._results)}'
@@ -0,0 +1,165 @@
+# p2app/engine/route_planner.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Plans multi-hop routes between airports for an aircraft with a limited range
+# that needs a runway of some minimum length wherever it lands.
+#
+# The graph of airports isn't built ahead of time (with tens of thousands of
+# airports, it would have hundreds of millions of edges).  Instead, the airports
+# with a suitable runway (and their coordinates) are found once, from the index
+# of the runway summary, and the flights out of an airport are found only when
+# the search reaches it, by asking the spatial index for the airports within
+# range and keeping the suitable ones.  The search is A*, guided by the
+# great-circle distance that remains to the destination, which never
+# overestimates the distance still to fly (or, divided by the range, the number
+# of hops still to make), so the first route found is the best one.
+
+import heapq
+import math
+from collections import namedtuple
+
+from p2app.engine import geo
+from p2app.engine import runway_summary
+from p2app.engine import spatial
+from p2app.events.airports import Airport
+
+
+Route = namedtuple('Route', ['airports', 'leg_distances_km', 'total_distance_km'])
+
+FEWEST_HOPS = 'fewest_hops'
+SHORTEST_DISTANCE = 'shortest_distance'
+OBJECTIVES = (FEWEST_HOPS, SHORTEST_DISTANCE)
+
+
+def _suitable_airports(myCursor, min_runway_length_ft):
+    """Returns the (latitude, longitude) of each airport with an open runway at least as
+    long as required, keyed by airport_id"""
+    myCursor.execute(
+        f"SELECT airport.airport_id, airport.latitude_deg, airport.longitude_deg "
+        f"FROM {runway_summary.SUMMARY_TABLE} JOIN airport ON airport.airport_id = {runway_summary.SUMMARY_TABLE}.airport_id "
+        f"WHERE {runway_summary.SUMMARY_TABLE}.max_open_length_ft >= ?", (min_runway_length_ft,))
+    return {airport_id: (latitude, longitude) for airport_id, latitude, longitude in myCursor.fetchall()}
+
+
+def _reachable(myCursor, latitude, longitude, range_km, suitable):
+    """Returns the (airport_id, latitude, longitude, distance) of each suitable airport
+    within range of a point"""
+    reachable = {}
+    for min_latitude, min_longitude, max_latitude, max_longitude in geo.bounding_boxes(latitude, longitude, range_km):
+        # Only the ids are read from the R*Tree; the exact coordinates of the suitable
+        # airports are already known
+        myCursor.execute(
+            f"SELECT airport_id FROM {spatial.RTREE_TABLE} WHERE max_latitude >= ? AND min_latitude <= ? "
+            f"AND max_longitude >= ? AND min_longitude <= ?",
+            (min_latitude, max_latitude, min_longitude, max_longitude))
+        for airport_id, in myCursor.fetchall():
+            coordinates = suitable.get(airport_id)
+            if coordinates is not None:
+                distance = geo.haversine_km(latitude, longitude, *coordinates)
+                if distance <= range_km:
+                    reachable[airport_id] = (airport_id, *coordinates, distance)
+    return reachable.values()
+
+
+def _fetch_airport(myCursor, airport_id):
+    myCursor.execute("SELECT * FROM airport WHERE airport_id = ?", (airport_id,))
+    row = myCursor.fetchone()
+    return None if row is None else Airport(*row)
+
+
+def plan_route(myCursor, from_airport_id, to_airport_id, range_km, min_runway_length_ft,
+               objective = SHORTEST_DISTANCE):
+    """
+    Find the best route between two airports for an aircraft with a given range, stopping
+    only at airports with an open runway at least as long as required.  The spatial index
+    and the runway summary must already exist (see spatial.ensure_spatial_index and
+    runway_summary.ensure_runway_summary).
+
+    Args:
+        myCursor (sqlite3.Cursor): The SQLite cursor to execute the queries.
+        from_airport_id (int): The airport the route starts at.
+        to_airport_id (int): The airport the route ends at.
+        range_km (float): The longest distance the aircraft can fly without stopping.
+        min_runway_length_ft (int): The shortest runway the aircraft can use.
+        objective (str): FEWEST_HOPS or SHORTEST_DISTANCE; ties in the number of hops are
+            broken by distance, and vice versa.
+
+    Returns:
+        Route or None: The airports along the route (including both ends), the distance
+        of each leg and the total distance, or None if there is no such route.
+
+    Raises:
+        ValueError: If either airport doesn't exist or lacks a suitable runway, or the
+            range or objective isn't valid.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f'{objective} is not a route objective; use one of {", ".join(OBJECTIVES)}')
+    if range_km <= 0:
+        raise ValueError('The range must be greater than zero')
+
+    origin = _fetch_airport(myCursor, from_airport_id)
+    destination = _fetch_airport(myCursor, to_airport_id)
+    suitable = _suitable_airports(myCursor, min_runway_length_ft)
+    for airport_id, airport in ((from_airport_id, origin), (to_airport_id, destination)):
+        if airport is None:
+            raise ValueError(f'There is no airport with the id {airport_id}')
+        if airport_id not in suitable:
+            raise ValueError(f'{airport.name} has no open runway of at least {min_runway_length_ft} ft')
+
+    def ordered(hops, distance):
+        """Returns a cost as a tuple compared in the order the objective calls for"""
+        return (hops, distance) if objective == FEWEST_HOPS else (distance, hops)
+
+    def priority(hops, distance, latitude, longitude):
+        """Returns the cost so far plus the heuristic's estimate of the cost still to come,
+        which is never more than the actual cost"""
+        remaining = geo.haversine_km(latitude, longitude, destination.latitude_deg, destination.longitude_deg)
+        return ordered(hops + math.ceil(remaining / range_km - 1e-9), distance + remaining)
+
+    # Each entry in the frontier is (priority, hops, distance, airport_id, latitude, longitude)
+    frontier = [(priority(0, 0.0, origin.latitude_deg, origin.longitude_deg), 0, 0.0,
+                 origin.airport_id, origin.latitude_deg, origin.longitude_deg)]
+    best = {origin.airport_id: ordered(0, 0.0)}
+    previous = {origin.airport_id: None}
+    finished = set()
+
+    while frontier:
+        _, hops, distance, airport_id, latitude, longitude = heapq.heappop(frontier)
+        if airport_id in finished:
+            continue
+        if airport_id == destination.airport_id:
+            return _route(myCursor, airport_id, previous, distance)
+        finished.add(airport_id)
+
+        for next_id, next_latitude, next_longitude, leg in _reachable(
+                myCursor, latitude, longitude, range_km, suitable):
+            if next_id in finished:
+                continue
+            cost = ordered(hops + 1, distance + leg)
+            if next_id in best and cost >= best[next_id]:
+                continue
+            best[next_id] = cost
+            previous[next_id] = (airport_id, leg)
+            heapq.heappush(frontier, (priority(hops + 1, distance + leg, next_latitude, next_longitude),
+                                      hops + 1, distance + leg, next_id, next_latitude, next_longitude))
+
+    return None
+
+
+def _route(myCursor, airport_id, previous, total_distance):
+    """Follows the links back from the destination to build the route"""
+    airport_ids = []
+    legs = []
+    while airport_id is not None:
+        airport_ids.append(airport_id)
+        link = previous[airport_id]
+        if link is None:
+            break
+        airport_id, leg = link
+        legs.append(leg)
+
+    airport_ids.reverse()
+    legs.reverse()
+    return Route([_fetch_airport(myCursor, airport_id) for airport_id in airport_ids], legs, total_distance)
@@ -0,0 +1,86 @@
+# p2app/events/routes.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Events related to planning routes between airports.
+
+from p2app.events.airports import Airport
+
+
+
+class StartRoutePlanEvent:
+    def __init__(self, from_airport_id: int, to_airport_id: int, range_km: float,
+                 min_runway_length_ft: int, objective: str = 'shortest_distance'):
+        # objective is 'fewest_hops' or 'shortest_distance'
+        self._from_airport_id = from_airport_id
+        self._to_airport_id = to_airport_id
+        self._range_km = range_km
+        self._min_runway_length_ft = min_runway_length_ft
+        self._objective = objective
+
+
+    def from_airport_id(self) -> int:
+        return self._from_airport_id
+
+
+    def to_airport_id(self) -> int:
+        return self._to_airport_id
+
+
+    def range_km(self) -> float:
+        return self._range_km
+
+
+    def min_runway_length_ft(self) -> int:
+        return self._min_runway_length_ft
+
+
+    def objective(self) -> str:
+        return self._objective
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: from_airport_id = {repr(self._from_airport_id)}, ' + \
+               f'to_airport_id = {repr(self._to_airport_id)}, range_km = {repr(self._range_km)}, ' + \
+               f'min_runway_length_ft = {repr(self._min_runway_length_ft)}, objective = {repr(self._objective)}'
+
+
+
+class RoutePlannedEvent:
+    def __init__(self, airports: list[Airport], leg_distances_km: list[float], total_distance_km: float):
+        self._airports = airports
+        self._leg_distances_km = leg_distances_km
+        self._total_distance_km = total_distance_km
+
+
+    def airports(self) -> list[Airport]:
+        return self._airports
+
+
+    def leg_distances_km(self) -> list[float]:
+        return self._leg_distances_km
+
+
+    def total_distance_km(self) -> float:
+        return self._total_distance_km
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: airports = {repr(self._airports)}, ' + \
+               f'leg_distances_km = {repr(self._leg_distances_km)}, ' + \
+               f'total_distance_km = {repr(self._total_distance_km)}'
+
+
+
+class RoutePlanFailedEvent:
+    def __init__(self, reason: str):
+        self._reason = reason
+
+
+    def reason(self) -> str:
+        return self._reason
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: reason = {repr(self._reason)}'
@@ -0,0 +1,200 @@
+# p2app/engine/runway_summary.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# A table summarizing each airport's runways (how long, how wide, how many are
+# lighted or open, and what they're surfaced with), so airports can be searched
+# by what their runways can handle with an indexed lookup, rather than by
+# grouping the whole runway table for every search.
+#
+# Triggers on the runway table keep the summary up to date: whenever a runway
+# is added, changed or removed, the summary of its airport (or, if a runway
+# moves, both airports) is recomputed from that airport's few runways.
+
+from collections import namedtuple
+
+from p2app.events.airports import Airport
+from p2app.events.runways import RunwaySummary
+
+
+SUMMARY_TABLE = 'runway_summary'
+
+_TRIGGERS = (f'{SUMMARY_TABLE}_insert', f'{SUMMARY_TABLE}_delete', f'{SUMMARY_TABLE}_update')
+
+
+# The classes of runway surface, as bits of the summary's surface_classes, and the
+# prefixes of the (free-form) surface descriptions in each class.  A surface that
+# matches none of them, or isn't given, is in OTHER_SURFACE.
+PAVED = 1
+UNPAVED = 2
+WATER = 4
+OTHER_SURFACE = 8
+
+SurfaceClass = namedtuple('SurfaceClass', ['bit', 'prefixes'])
+
+SURFACE_CLASSES = {
+    'paved': SurfaceClass(PAVED, ('ASP', 'BIT', 'CON', 'PEM', 'TAR', 'PAV', 'MAC', 'BRI')),
+    'unpaved': SurfaceClass(UNPAVED, ('TURF', 'GRASS', 'GRS', 'GRE', 'GRV', 'GRAVEL', 'DIRT', 'SAND', 'CLAY',
+                                      'SOIL', 'EARTH', 'COR', 'LAT', 'SNOW', 'ICE')),
+    'water': SurfaceClass(WATER, ('WATER',)),
+    'other': SurfaceClass(OTHER_SURFACE, ())
+}
+
+
+# The indexes that let the summary be searched by ranges of its columns
+_INDEXES = {
+    f'{SUMMARY_TABLE}_max_open_length_ft_idx': 'max_open_length_ft',
+    f'{SUMMARY_TABLE}_max_lighted_open_length_ft_idx': 'max_lighted_open_length_ft',
+    f'{SUMMARY_TABLE}_max_length_ft_idx': 'max_length_ft',
+    f'{SUMMARY_TABLE}_max_width_ft_idx': 'max_width_ft'
+}
+
+
+def _surface_class_expression():
+    """Returns SQL for the surface class bit of runway.surface"""
+    cases = []
+    for surface_class in SURFACE_CLASSES.values():
+        for prefix in surface_class.prefixes:
+            cases.append(f"WHEN UPPER(surface) LIKE '{prefix}%' THEN {surface_class.bit}")
+    return f"(CASE {' '.join(cases)} ELSE {OTHER_SURFACE} END)"
+
+
+def _summary_select(where):
+    """Returns SQL that summarizes the runways matching a condition, one row per airport"""
+    surface_class = _surface_class_expression()
+    surface_bits = ' + '.join(
+        f'MAX({surface_class} = {surface.bit}) * {surface.bit}' for surface in SURFACE_CLASSES.values())
+    return (
+        f"SELECT airport_id, COUNT(*), MAX(length_ft), MAX(width_ft), SUM(lighted <> 0), SUM(closed = 0), "
+        f"MAX(CASE WHEN closed = 0 THEN length_ft END), "
+        f"MAX(CASE WHEN closed = 0 AND lighted <> 0 THEN length_ft END), "
+        f"{surface_bits} "
+        f"FROM runway WHERE {where} GROUP BY airport_id")
+
+
+def _refresh_airport(row):
+    """Returns trigger SQL recomputing the summary of the airport of a runway (row is
+    'new' or 'old')"""
+    return (
+        f"DELETE FROM {SUMMARY_TABLE} WHERE airport_id = {row}.airport_id; "
+        f"INSERT INTO {SUMMARY_TABLE} {_summary_select(f'airport_id = {row}.airport_id')}; ")
+
+
+def ensure_runway_summary(connection):
+    """
+    Create and fill the runway summary table, its indexes, and the triggers maintaining
+    it, if they don't already exist.
+
+    Args:
+        connection (sqlite3.Connection): The connection to the database.
+
+    Returns:
+        bool: Whether the summary was created.
+
+    Raises:
+        sqlite3.Error: If the summary couldn't be created (e.g., the database is read-only).
+    """
+    exists = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (SUMMARY_TABLE,)).fetchone()
+    if exists:
+        return False
+
+    with connection:
+        connection.execute(
+            f"CREATE TABLE {SUMMARY_TABLE} ("
+            f"airport_id INTEGER NOT NULL PRIMARY KEY, "
+            f"runway_count INTEGER NOT NULL, "
+            f"max_length_ft INTEGER NULL, "
+            f"max_width_ft INTEGER NULL, "
+            f"lighted_count INTEGER NOT NULL, "
+            f"open_count INTEGER NOT NULL, "
+            f"max_open_length_ft INTEGER NULL, "
+            f"max_lighted_open_length_ft INTEGER NULL, "
+            f"surface_classes INTEGER NOT NULL"
+            f") STRICT")
+        connection.execute(f"INSERT INTO {SUMMARY_TABLE} {_summary_select('1')}")
+        for index, column in _INDEXES.items():
+            connection.execute(f"CREATE INDEX {index} ON {SUMMARY_TABLE} ({column})")
+
+        connection.execute(
+            f"CREATE TRIGGER {SUMMARY_TABLE}_insert AFTER INSERT ON runway BEGIN {_refresh_airport('new')} END")
+        connection.execute(
+            f"CREATE TRIGGER {SUMMARY_TABLE}_delete AFTER DELETE ON runway BEGIN {_refresh_airport('old')} END")
+        connection.execute(
+            f"CREATE TRIGGER {SUMMARY_TABLE}_update AFTER UPDATE ON runway BEGIN "
+            f"{_refresh_airport('old')} {_refresh_airport('new')} END")
+    return True
+
+
+def drop_runway_summary(connection):
+    """
+    Drop the runway summary table and its triggers, e.g., so a bulk load doesn't have
+    to maintain it row by row; ensure_runway_summary rebuilds it afterward.
+
+    Args:
+        connection (sqlite3.Connection): The connection to the database.
+
+    Returns:
+        bool: Whether there was a summary to drop.
+    """
+    for trigger in _TRIGGERS:
+        connection.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    exists = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (SUMMARY_TABLE,)).fetchone()
+    if exists:
+        connection.execute(f"DROP TABLE {SUMMARY_TABLE}")
+    return exists is not None
+
+
+def capability_search(myCursor, min_length_ft = None, min_width_ft = None, lighted = False,
+                      surface_class = None, airport_type = None):
+    """
+    Find the airports whose runways meet some requirements.  The summary must already
+    exist (see ensure_runway_summary).
+
+    Args:
+        myCursor (sqlite3.Cursor): The SQLite cursor to execute the query.
+        min_length_ft (int or None): The shortest an open runway may be, if given.
+        min_width_ft (int or None): The narrowest the widest runway may be, if given.
+        lighted (bool): Whether the open runway of at least min_length_ft must be lighted.
+        surface_class (str or None): One of the keys of SURFACE_CLASSES; at least one
+            runway must have a surface in that class, if given.
+        airport_type (str or None): Only airports of this type, if given.
+
+    Yields:
+        tuple[Airport, RunwaySummary]: Each matching airport and the summary of its
+        runways, ordered by airport_id.
+
+    Raises:
+        ValueError: If the surface class isn't one of SURFACE_CLASSES.
+    """
+    conditions = []
+    parameters = []
+    if lighted:
+        conditions.append('runway_summary.max_lighted_open_length_ft >= ?')
+        parameters.append(min_length_ft or 0)
+    elif min_length_ft is not None:
+        conditions.append('runway_summary.max_open_length_ft >= ?')
+        parameters.append(min_length_ft)
+    if min_width_ft is not None:
+        conditions.append('runway_summary.max_width_ft >= ?')
+        parameters.append(min_width_ft)
+    if surface_class is not None:
+        if surface_class not in SURFACE_CLASSES:
+            raise ValueError(f'{surface_class} is not a surface class; use one of {", ".join(SURFACE_CLASSES)}')
+        conditions.append('(runway_summary.surface_classes & ?) <> 0')
+        parameters.append(SURFACE_CLASSES[surface_class].bit)
+    if airport_type:
+        conditions.append('airport.type = ?')
+        parameters.append(airport_type)
+
+    where = ' AND '.join(conditions) if conditions else '1'
+    myCursor.execute(
+        f"SELECT airport.*, {SUMMARY_TABLE}.* FROM {SUMMARY_TABLE} "
+        f"JOIN airport ON airport.airport_id = {SUMMARY_TABLE}.airport_id "
+        f"WHERE {where} ORDER BY airport.airport_id", parameters)
+
+    airport_columns = len(Airport._fields)
+    for row in myCursor:
+        yield Airport(*row[:airport_columns]), RunwaySummary(*row[airport_columns:])
@@ -0,0 +1,142 @@
+# p2app/events/runways.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Events related to what airports' runways can handle.
+
+from collections import namedtuple
+
+from p2app.events.airports import Airport
+
+
+
+RunwaySummary = namedtuple(
+    'RunwaySummary',
+    ['airport_id', 'runway_count', 'max_length_ft', 'max_width_ft', 'lighted_count', 'open_count',
+     'max_open_length_ft', 'max_lighted_open_length_ft', 'surface_classes'])
+
+RunwaySummary.__annotations__ = {
+    'airport_id': int,
+    'runway_count': int,
+    'max_length_ft': int | None,
+    'max_width_ft': int | None,
+    'lighted_count': int,
+    'open_count': int,
+    'max_open_length_ft': int | None,
+    'max_lighted_open_length_ft': int | None,
+    'surface_classes': int
+}
+
+
+
+BestRunwayEnd = namedtuple(
+    'BestRunwayEnd', ['airport_id', 'runway_id', 'runway_end', 'heading_deg', 'headwind', 'crosswind'])
+
+BestRunwayEnd.__annotations__ = {
+    'airport_id': int,
+    'runway_id': int,
+    'runway_end': str | None,
+    'heading_deg': float,
+    'headwind': float,
+    'crosswind': float
+}
+
+
+
+class StartRunwayCapabilitySearchEvent:
+    def __init__(self, min_length_ft: int | None = None, min_width_ft: int | None = None,
+                 lighted: bool = False, surface_class: str | None = None, airport_type: str | None = None):
+        # surface_class is 'paved', 'unpaved', 'water' or 'other'
+        self._min_length_ft = min_length_ft
+        self._min_width_ft = min_width_ft
+        self._lighted = lighted
+        self._surface_class = surface_class
+        self._airport_type = airport_type
+
+
+    def min_length_ft(self) -> int | None:
+        return self._min_length_ft
+
+
+    def min_width_ft(self) -> int | None:
+        return self._min_width_ft
+
+
+    def lighted(self) -> bool:
+        return self._lighted
+
+
+    def surface_class(self) -> str | None:
+        return self._surface_class
+
+
+    def airport_type(self) -> str | None:
+        return self._airport_type
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: min_length_ft = {repr(self._min_length_ft)}, ' + \
+               f'min_width_ft = {repr(self._min_width_ft)}, lighted = {repr(self._lighted)}, ' + \
+               f'surface_class = {repr(self._surface_class)}, airport_type = {repr(self._airport_type)}'
+
+
+
+class RunwayCapabilityResultEvent:
+    def __init__(self, airport: Airport, summary: RunwaySummary):
+        self._airport = airport
+        self._summary = summary
+
+
+    def airport(self) -> Airport:
+        return self._airport
+
+
+    def summary(self) -> RunwaySummary:
+        return self._summary
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: airport = {repr(self._airport)}, summary = {repr(self._summary)}'
+
+
+
+class StartBestRunwaysEvent:
+    def __init__(self, airport_ids: list[int], wind_directions_deg: list[float], wind_speeds: list[float]):
+        # The wind at airport_ids[i] blows from wind_directions_deg[i] at wind_speeds[i]
+        self._airport_ids = airport_ids
+        self._wind_directions_deg = wind_directions_deg
+        self._wind_speeds = wind_speeds
+
+
+    def airport_ids(self) -> list[int]:
+        return self._airport_ids
+
+
+    def wind_directions_deg(self) -> list[float]:
+        return self._wind_directions_deg
+
+
+    def wind_speeds(self) -> list[float]:
+        return self._wind_speeds
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: airport_ids = {repr(self._airport_ids)}, ' + \
+               f'wind_directions_deg = {repr(self._wind_directions_deg)}, wind_speeds = {repr(self._wind_speeds)}'
+
+
+
+class BestRunwaysEvent:
+    def __init__(self, best_runway_ends: list[BestRunwayEnd | None]):
+        # One for each airport in the StartBestRunwaysEvent, in the same order; None for
+        # an airport with no open runway of known heading
+        self._best_runway_ends = best_runway_ends
+
+
+    def best_runway_ends(self) -> list[BestRunwayEnd | None]:
+        return self._best_runway_ends
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: best_runway_ends = {repr(self._best_runway_ends)}'
@@ -0,0 +1,169 @@
+# p2app/events/searches.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Events related to searches that rank their results by relevance, rather than
+# finding exact matches, across the tables the engine knows about.
+
+from collections import namedtuple
+
+
+
+AutocompleteMatch = namedtuple('AutocompleteMatch', ['table', 'entity_id', 'code', 'name'])
+
+AutocompleteMatch.__annotations__ = {
+    'table': str,
+    'entity_id': int,
+    'code': str | None,
+    'name': str | None
+}
+
+
+
+class StartRankedSearchEvent:
+    def __init__(self, table: str, query: str, limit: int = 50):
+        self._table = table
+        self._query = query
+        self._limit = limit
+
+
+    def table(self) -> str:
+        return self._table
+
+
+    def query(self) -> str:
+        return self._query
+
+
+    def limit(self) -> int:
+        return self._limit
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: table = {repr(self._table)}, query = {repr(self._query)}, ' + \
+               f'limit = {repr(self._limit)}'
+
+
+
+class RankedSearchResultEvent:
+    def __init__(self, table: str, record, score: float):
+        self._table = table
+        self._record = record
+        self._score = score
+
+
+    def table(self) -> str:
+        return self._table
+
+
+    def record(self):
+        return self._record
+
+
+    def score(self) -> float:
+        return self._score
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: table = {repr(self._table)}, record = {repr(self._record)}, ' + \
+               f'score = {repr(self._score)}'
+
+
+
+class StartAutocompleteEvent:
+    def __init__(self, prefix: str, limit: int = 10, tables: list[str] | None = None):
+        self._prefix = prefix
+        self._limit = limit
+        self._tables = tables
+
+
+    def prefix(self) -> str:
+        return self._prefix
+
+
+    def limit(self) -> int:
+        return self._limit
+
+
+    def tables(self) -> list[str] | None:
+        return self._tables
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: prefix = {repr(self._prefix)}, limit = {repr(self._limit)}, ' + \
+               f'tables = {repr(self._tables)}'
+
+
+
+class AutocompleteResultsEvent:
+    def __init__(self, prefix: str, matches: list[AutocompleteMatch]):
+        self._prefix = prefix
+        self._matches = matches
+
+
+    def prefix(self) -> str:
+        return self._prefix
+
+
+    def matches(self) -> list[AutocompleteMatch]:
+        return self._matches
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: prefix = {repr(self._prefix)}, matches = {repr(self._matches)}'
+
+
+
+class StartFuzzySearchEvent:
+    def __init__(self, table: str, name: str, limit: int = 20, threshold: float | None = None):
+        self._table = table
+        self._name = name
+        self._limit = limit
+        self._threshold = threshold
+
+
+    def table(self) -> str:
+        return self._table
+
+
+    def name(self) -> str:
+        return self._name
+
+
+    def limit(self) -> int:
+        return self._limit
+
+
+    def threshold(self) -> float | None:
+        return self._threshold
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: table = {repr(self._table)}, name = {repr(self._name)}, ' + \
+               f'limit = {repr(self._limit)}, threshold = {repr(self._threshold)}'
+
+
+
+class FuzzySearchResultEvent:
+    def __init__(self, table: str, record, similarity: float):
+        self._table = table
+        self._record = record
+        self._similarity = similarity
+
+
+    def table(self) -> str:
+        return self._table
+
+
+    def record(self):
+        return self._record
+
+
+    def similarity(self) -> float:
+        return self._similarity
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: table = {repr(self._table)}, record = {repr(self._record)}, ' + \
+               f'similarity = {repr(self._similarity)}'
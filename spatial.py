@@ -0,0 +1,201 @@
+# p2app/engine/spatial.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Finds airports near a point, within a distance of it, or inside a box, using
+# an R*Tree index of the airports' coordinates, so a query reads only the
+# airports in the area it asks about rather than scanning the whole table.
+#
+# The R*Tree holds a degenerate box (a point) for each airport, and triggers on
+# the airport table keep it up to date however the table is changed.  A query by
+# distance first asks the R*Tree for the airports inside boxes enclosing the
+# circle, then measures the great-circle distance to each of them.
+
+from p2app.engine import geo
+from p2app.events.airports import Airport
+
+
+RTREE_TABLE = 'airport_rtree'
+
+_TRIGGERS = (f'{RTREE_TABLE}_insert', f'{RTREE_TABLE}_delete', f'{RTREE_TABLE}_update')
+
+# The radius of the first circle searched for an airport's nearest neighbors; it's
+# doubled until the circle holds enough of them
+_INITIAL_NEAREST_RADIUS_KM = 50.0
+
+
+def ensure_spatial_index(connection):
+    """
+    Create the R*Tree index of airport coordinates, and the triggers maintaining it,
+    if they don't already exist.
+
+    Args:
+        connection (sqlite3.Connection): The connection to the database.
+
+    Returns:
+        bool: Whether the index was created.
+
+    Raises:
+        sqlite3.Error: If the index couldn't be created (e.g., the database is read-only).
+    """
+    exists = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (RTREE_TABLE,)).fetchone()
+    if exists:
+        return False
+
+    with connection:
+        connection.execute(
+            f"CREATE VIRTUAL TABLE {RTREE_TABLE} USING rtree(airport_id, min_latitude, max_latitude, "
+            f"min_longitude, max_longitude)")
+        connection.execute(
+            f"CREATE TRIGGER {RTREE_TABLE}_insert AFTER INSERT ON airport BEGIN "
+            f"INSERT INTO {RTREE_TABLE} VALUES (new.airport_id, new.latitude_deg, new.latitude_deg, "
+            f"new.longitude_deg, new.longitude_deg); END")
+        connection.execute(
+            f"CREATE TRIGGER {RTREE_TABLE}_delete AFTER DELETE ON airport BEGIN "
+            f"DELETE FROM {RTREE_TABLE} WHERE airport_id = old.airport_id; END")
+        connection.execute(
+            f"CREATE TRIGGER {RTREE_TABLE}_update AFTER UPDATE OF airport_id, latitude_deg, longitude_deg ON airport BEGIN "
+            f"DELETE FROM {RTREE_TABLE} WHERE airport_id = old.airport_id; "
+            f"INSERT INTO {RTREE_TABLE} VALUES (new.airport_id, new.latitude_deg, new.latitude_deg, "
+            f"new.longitude_deg, new.longitude_deg); END")
+        connection.execute(
+            f"INSERT INTO {RTREE_TABLE} SELECT airport_id, latitude_deg, latitude_deg, longitude_deg, longitude_deg "
+            f"FROM airport")
+    return True
+
+
+def drop_spatial_index(connection):
+    """
+    Drop the R*Tree index and its triggers, e.g., so a bulk load doesn't have to
+    maintain them row by row; ensure_spatial_index rebuilds them afterward.
+
+    Args:
+        connection (sqlite3.Connection): The connection to the database.
+
+    Returns:
+        bool: Whether there was an index to drop.
+    """
+    for trigger in _TRIGGERS:
+        connection.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    exists = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (RTREE_TABLE,)).fetchone()
+    if exists:
+        connection.execute(f"DROP TABLE {RTREE_TABLE}")
+    return exists is not None
+
+
+def _filters(airport_type, scheduled_service):
+    conditions = []
+    parameters = []
+    if airport_type:
+        conditions.append('airport.type = ?')
+        parameters.append(airport_type)
+    if scheduled_service is not None:
+        conditions.append('airport.scheduled_service = ?')
+        parameters.append(int(scheduled_service))
+    return conditions, parameters
+
+
+def _in_boxes(myCursor, boxes, airport_type, scheduled_service):
+    """Returns the airports inside any of the boxes, as (min_latitude, min_longitude,
+    max_latitude, max_longitude) tuples, that pass the filters"""
+    filter_conditions, filter_parameters = _filters(airport_type, scheduled_service)
+    airports = []
+    for min_latitude, min_longitude, max_latitude, max_longitude in boxes:
+        conditions = [f'{RTREE_TABLE}.max_latitude >= ?', f'{RTREE_TABLE}.min_latitude <= ?',
+                      f'{RTREE_TABLE}.max_longitude >= ?', f'{RTREE_TABLE}.min_longitude <= ?',
+                      *filter_conditions]
+        myCursor.execute(
+            f"SELECT airport.* FROM {RTREE_TABLE} JOIN airport ON airport.airport_id = {RTREE_TABLE}.airport_id "
+            f"WHERE {' AND '.join(conditions)}",
+            (min_latitude, max_latitude, min_longitude, max_longitude, *filter_parameters))
+        airports.extend(Airport(*row) for row in myCursor.fetchall())
+    return airports
+
+
+def airports_in_box(myCursor, min_latitude, min_longitude, max_latitude, max_longitude,
+                    airport_type = None, scheduled_service = None):
+    """
+    Find the airports inside a latitude/longitude box.  A box whose minimum longitude is
+    greater than its maximum crosses the antimeridian.
+
+    Args:
+        myCursor (sqlite3.Cursor): The SQLite cursor to execute the query.
+        min_latitude, min_longitude, max_latitude, max_longitude (float): The box.
+        airport_type (str or None): Only airports of this type, if given.
+        scheduled_service (bool or None): Only airports with (or without) scheduled service, if given.
+
+    Returns:
+        list[Airport]: The airports, ordered by airport_id.
+    """
+    if min_longitude <= max_longitude:
+        boxes = [(min_latitude, min_longitude, max_latitude, max_longitude)]
+    else:
+        boxes = [(min_latitude, min_longitude, max_latitude, 180.0),
+                 (min_latitude, -180.0, max_latitude, max_longitude)]
+
+    # The R*Tree stores coordinates rounded outward to 32-bit floats, so the airports it
+    # finds are checked against the box exactly
+    airports = [airport for airport in _in_boxes(myCursor, boxes, airport_type, scheduled_service)
+                if min_latitude <= airport.latitude_deg <= max_latitude
+                and any(box[1] <= airport.longitude_deg <= box[3] for box in boxes)]
+    airports.sort(key = lambda airport: airport.airport_id)
+    return airports
+
+
+def airports_within(myCursor, latitude, longitude, radius_km, airport_type = None, scheduled_service = None):
+    """
+    Find the airports within a great-circle distance of a point.
+
+    Args:
+        myCursor (sqlite3.Cursor): The SQLite cursor to execute the query.
+        latitude, longitude (float): The point.
+        radius_km (float): The distance, in kilometers.
+        airport_type (str or None): Only airports of this type, if given.
+        scheduled_service (bool or None): Only airports with (or without) scheduled service, if given.
+
+    Returns:
+        list[tuple[Airport, float]]: Each airport and its distance from the point, nearest first.
+    """
+    boxes = geo.bounding_boxes(latitude, longitude, radius_km)
+    results = []
+    seen = set()
+    for airport in _in_boxes(myCursor, boxes, airport_type, scheduled_service):
+        if airport.airport_id in seen:
+            continue
+        seen.add(airport.airport_id)
+        distance = geo.haversine_km(latitude, longitude, airport.latitude_deg, airport.longitude_deg)
+        if distance <= radius_km:
+            results.append((airport, distance))
+    results.sort(key = lambda result: (result[1], result[0].airport_id))
+    return results
+
+
+def nearest_airports(myCursor, latitude, longitude, count, airport_type = None, scheduled_service = None):
+    """
+    Find the airports nearest to a point, searching within a circle that doubles in
+    size until it holds enough of them (every airport within the circle is nearer than
+    every airport outside it, so the nearest ones inside are the nearest overall).
+
+    Args:
+        myCursor (sqlite3.Cursor): The SQLite cursor to execute the query.
+        latitude, longitude (float): The point.
+        count (int): The number of airports to find.
+        airport_type (str or None): Only airports of this type, if given.
+        scheduled_service (bool or None): Only airports with (or without) scheduled service, if given.
+
+    Returns:
+        list[tuple[Airport, float]]: Up to count airports and their distances from the
+        point, nearest first.
+    """
+    if count <= 0:
+        return []
+
+    radius_km = _INITIAL_NEAREST_RADIUS_KM
+    while True:
+        results = airports_within(myCursor, latitude, longitude, radius_km, airport_type, scheduled_service)
+        if len(results) >= count or radius_km >= geo.MAX_DISTANCE_KM:
+            return results[:count]
+        radius_km = min(radius_km * 2, geo.MAX_DISTANCE_KM)
@@ -0,0 +1,214 @@
+# p2app/engine/sync.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Brings an existing database up to date with a new release of the OurAirports
+# data by applying only what changed, rather than reloading everything.
+#
+# The release is loaded into a staging schema (an in-memory database attached to
+# the connection), then each table is compared with its staged copy by natural
+# key (its code, or an airport's ident).  Ids differ between the two, so foreign
+# keys are compared by the natural keys of the rows they refer to.  Each row is
+# reduced to a tuple of its columns, so finding what changed takes one pass over
+# each copy of the table.
+
+from collections import namedtuple
+from pathlib import Path
+
+from p2app.engine import batch
+from p2app.engine import importer
+from p2app.events.imports import TableSyncResult
+
+
+SyncTable = namedtuple('SyncTable', ['table', 'id_column', 'key_column', 'columns', 'foreign_keys'])
+
+
+# The tables that are synchronized, in an order in which every table comes after
+# the tables it refers to.  foreign_keys maps each foreign key column to the table
+# it refers to.
+SYNC_TABLES = [
+    SyncTable('continent', 'continent_id', 'continent_code', ('continent_code', 'name'), {}),
+    SyncTable('country', 'country_id', 'country_code',
+              ('country_code', 'name', 'continent_id', 'wikipedia_link', 'keywords'),
+              {'continent_id': 'continent'}),
+    SyncTable('region', 'region_id', 'region_code',
+              ('region_code', 'local_code', 'name', 'continent_id', 'country_id', 'wikipedia_link', 'keywords'),
+              {'continent_id': 'continent', 'country_id': 'country'}),
+    SyncTable('airport', 'airport_id', 'airport_ident',
+              ('airport_ident', 'type', 'name', 'latitude_deg', 'longitude_deg', 'elevation_ft', 'continent_id',
+               'country_id', 'region_id', 'municipality', 'scheduled_service', 'gps_code', 'iata_code',
+               'local_code', 'home_link', 'wikipedia_link', 'keywords'),
+              {'continent_id': 'continent', 'country_id': 'country', 'region_id': 'region'})
+]
+
+_SYNC_TABLES_BY_NAME = {sync_table.table: sync_table for sync_table in SYNC_TABLES}
+
+STAGING_SCHEMA = 'staging'
+
+
+def _create_staging_schema(connection):
+    """Attaches an empty in-memory database with the same tables as the main one"""
+    connection.execute(f"ATTACH DATABASE ':memory:' AS {STAGING_SCHEMA}")
+    for table in reversed(importer.REPLACED_TABLES):
+        sql, = connection.execute(
+            "SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+        connection.execute(sql.replace(f'CREATE TABLE {table}', f'CREATE TABLE {STAGING_SCHEMA}.{table}', 1))
+
+
+def _load_staging(connection, directory):
+    """Loads the natural-keyed tables of a release into the staging schema"""
+    lookups = importer.new_lookups()
+    importer.load_continents(connection, lookups, STAGING_SCHEMA)
+    for table_import in importer.TABLE_IMPORTS:
+        if table_import.table in _SYNC_TABLES_BY_NAME:
+            path = directory / table_import.file_name
+            importer.load_table(connection, table_import, path, lookups, schema = STAGING_SCHEMA)
+
+
+def _key_maps(connection, schema, sync_table):
+    """Returns maps from ids to natural keys and back for one table in one schema"""
+    rows = connection.execute(
+        f"SELECT {sync_table.id_column}, {sync_table.key_column} FROM {schema}.{sync_table.table}").fetchall()
+    return dict(rows), {key: row_id for row_id, key in rows}
+
+
+def _comparable_rows(connection, schema, sync_table, keys_by_id):
+    """
+    Reduce every row of a table to its natural key, id, and its columns with foreign
+    keys replaced by the natural keys they refer to, so the same row compares equal
+    in either schema.
+
+    Returns:
+        dict: Maps each natural key to an (id, values) tuple.
+    """
+    columns = ', '.join(sync_table.columns)
+    foreign_key_positions = [(position, keys_by_id[sync_table.foreign_keys[column]])
+                             for position, column in enumerate(sync_table.columns)
+                             if column in sync_table.foreign_keys]
+
+    rows = {}
+    for row_id, *values in connection.execute(
+            f"SELECT {sync_table.id_column}, {columns} FROM {schema}.{sync_table.table}"):
+        for position, parent_keys in foreign_key_positions:
+            # airport.continent_id is declared as TEXT, so ids are compared as integers
+            values[position] = parent_keys.get(int(values[position]))
+        rows[values[0]] = (row_id, tuple(values))
+    return rows
+
+
+def _apply_changes(connection, sync_table, current, staged, ids_by_key):
+    """Inserts and updates the rows of one table that differ from the staged copy,
+    returning the natural keys inserted and updated"""
+    foreign_key_positions = [(position, ids_by_key[sync_table.foreign_keys[column]])
+                             for position, column in enumerate(sync_table.columns)
+                             if column in sync_table.foreign_keys]
+
+    def to_row(values):
+        values = list(values)
+        for position, parent_ids in foreign_key_positions:
+            values[position] = parent_ids[values[position]]
+            if sync_table.table == 'airport' and sync_table.columns[position] == 'continent_id':
+                values[position] = str(values[position])
+        return values
+
+    inserted = [key for key in staged if key not in current]
+    updated = [key for key, (row_id, values) in staged.items()
+               if key in current and current[key][1] != values]
+
+    columns = ', '.join(sync_table.columns)
+    placeholders = ', '.join('?' * len(sync_table.columns))
+    connection.executemany(
+        f"INSERT INTO main.{sync_table.table} ({columns}) VALUES ({placeholders})",
+        (to_row(staged[key][1]) for key in inserted))
+
+    assignments = ', '.join(f'{column} = ?' for column in sync_table.columns[1:])
+    connection.executemany(
+        f"UPDATE main.{sync_table.table} SET {assignments} WHERE {sync_table.id_column} = ?",
+        ((*to_row(staged[key][1])[1:], current[key][0]) for key in updated))
+
+    ids_by_key[sync_table.table].update(batch.fetch_ids_by_code(
+        connection, f'main.{sync_table.table}', sync_table.id_column, sync_table.key_column, inserted))
+    return inserted, updated
+
+
+# The tables that aren't synchronized, but whose rows are deleted or changed when
+# rows are deleted from a synchronized table
+DEPENDENT_TABLES = {'airport': ['runway', 'airport_frequency', 'navigation_aid']}
+
+
+def _delete_rows(connection, sync_table, ids):
+    """Deletes rows from one table by id, along with the rows of the tables that
+    aren't synchronized that depend on them"""
+    parameters = [(row_id,) for row_id in ids]
+    if sync_table.table == 'airport':
+        connection.executemany("DELETE FROM main.runway WHERE airport_id = ?", parameters)
+        connection.executemany("DELETE FROM main.airport_frequency WHERE airport_id = ?", parameters)
+        connection.executemany("UPDATE main.navigation_aid SET airport_id = NULL WHERE airport_id = ?", parameters)
+    connection.executemany(f"DELETE FROM main.{sync_table.table} WHERE {sync_table.id_column} = ?", parameters)
+
+
+def sync_release(connection, directory):
+    """
+    Update the continents, countries, regions and airports in the database to match a
+    release of the OurAirports data, in one transaction, inserting, updating and
+    deleting only the rows that differ.  (Runways, frequencies and navigation aids have
+    no natural keys to compare by; use importer.import_release to replace them.)
+
+    Args:
+        connection (sqlite3.Connection): The connection to the database.
+        directory (Path or str): The directory containing the release's CSV files.
+
+    Returns:
+        list[TableSyncResult]: The natural keys inserted, updated and deleted in each table.
+
+    Raises:
+        FileNotFoundError: If one of the release's files is missing.
+        ValueError: If a file contains a value that can't be converted.
+        sqlite3.Error: If the changes couldn't be written to the database.
+    """
+    directory = Path(directory)
+    for table_import in importer.TABLE_IMPORTS:
+        if table_import.table in _SYNC_TABLES_BY_NAME and not (directory / table_import.file_name).is_file():
+            raise FileNotFoundError(f'{table_import.file_name} is missing from {directory}')
+
+    connection.commit()
+    _create_staging_schema(connection)
+    try:
+        _load_staging(connection, directory)
+
+        keys_by_id = {'main': {}, STAGING_SCHEMA: {}}
+        ids_by_key = {}
+        comparable_rows = {}
+        for sync_table in SYNC_TABLES:
+            for schema in ('main', STAGING_SCHEMA):
+                keys, ids = _key_maps(connection, schema, sync_table)
+                keys_by_id[schema][sync_table.table] = keys
+                if schema == 'main':
+                    ids_by_key[sync_table.table] = ids
+            comparable_rows[sync_table.table] = (
+                _comparable_rows(connection, 'main', sync_table, keys_by_id['main']),
+                _comparable_rows(connection, STAGING_SCHEMA, sync_table, keys_by_id[STAGING_SCHEMA]))
+
+        results = []
+        with connection:
+            changes = {}
+            for sync_table in SYNC_TABLES:
+                current, staged = comparable_rows[sync_table.table]
+                changes[sync_table.table] = _apply_changes(connection, sync_table, current, staged, ids_by_key)
+
+            deletions = {}
+            for sync_table in reversed(SYNC_TABLES):
+                current, staged = comparable_rows[sync_table.table]
+                deleted = [key for key in current if key not in staged]
+                _delete_rows(connection, sync_table, [current[key][0] for key in deleted])
+                deletions[sync_table.table] = deleted
+
+        for sync_table in SYNC_TABLES:
+            inserted, updated = changes[sync_table.table]
+            results.append(TableSyncResult(sync_table.table, inserted, updated, deletions[sync_table.table]))
+    finally:
+        connection.rollback()
+        connection.execute(f"DETACH DATABASE {STAGING_SCHEMA}")
+
+    return results
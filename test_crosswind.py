@@ -0,0 +1,73 @@
+# p2app/engine/test_crosswind.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Tests of choosing the best runway end for the wind, using the small release
+# written by test_release.
+
+import math
+import unittest
+
+from p2app.engine import importer
+from p2app.engine.crosswind import RunwayHeadings
+from p2app.engine.test_release import ReleaseTestCase, release_rows, write_release
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+@unittest.skipUnless(numpy, 'NumPy is not installed')
+class RunwayHeadingsTests(ReleaseTestCase):
+    def load(self, rows = None):
+        write_release(self.release, release_rows() if rows is None else rows)
+        importer.import_release(self.connection, self.release)
+        return RunwayHeadings.load(self.connection)
+
+    def test_best_end_has_the_most_headwind(self):
+        headings = self.load()
+
+        best = headings.best_runway_ends([101], [300.0], [20.0])[0]
+
+        self.assertEqual((best.airport_id, best.runway_id, best.runway_end, best.heading_deg), (101, 2001, '28R', 298.0))
+        self.assertAlmostEqual(best.headwind, 20.0 * math.cos(math.radians(2.0)))
+        self.assertAlmostEqual(best.crosswind, 20.0 * math.sin(math.radians(2.0)))
+
+    def test_missing_headings_come_from_the_identifiers(self):
+        headings = self.load()
+
+        best = headings.best_runway_ends([100], [160.0], [10.0])[0]
+
+        self.assertEqual((best.runway_end, best.heading_deg), ('16', 160.0))
+        self.assertAlmostEqual(best.headwind, 10.0)
+        self.assertAlmostEqual(best.crosswind, 0.0)
+
+    def test_missing_heading_is_the_reciprocal_of_the_other_end(self):
+        rows = release_rows()
+        rows['runways.csv'][2]['le_heading_degT'] = 125
+        headings = self.load(rows)
+
+        best = headings.best_runway_ends([102], [305.0], [10.0])[0]
+
+        self.assertEqual((best.runway_end, best.heading_deg), ('30', 305.0))
+
+    def test_results_follow_the_order_of_the_airports(self):
+        headings = self.load()
+
+        results = headings.best_runway_ends([102, 999, 100], [120.0, 0.0, 340.0], [10.0, 10.0, 10.0])
+
+        self.assertEqual([None if result is None else result.runway_end for result in results], ['12', None, '34'])
+
+    def test_closed_runways_are_not_used(self):
+        rows = release_rows()
+        rows['runways.csv'][0]['closed'] = 1
+        headings = self.load(rows)
+
+        self.assertEqual(len(headings), 4)
+        self.assertEqual(headings.best_runway_ends([100], [160.0], [10.0]), [None])
+
+
+if __name__ == '__main__':
+    unittest.main()
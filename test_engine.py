@@ -0,0 +1,203 @@
+# p2app/engine/test_engine.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Tests of the engine, run against a scratch database created from schema.sql.
+
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from p2app.engine import batch
+from p2app.engine import continentHandler
+from p2app.engine import fulltext
+from p2app.engine.main import Engine
+from p2app.events.app import ErrorEvent, SearchTruncatedEvent
+from p2app.events.continents import *
+from p2app.events.countries import *
+from p2app.events.regions import *
+from p2app.events.database import CloseDatabaseEvent, IndexesBuiltEvent, OpenDatabaseEvent
+from p2app.events.searches import RankedSearchResultEvent, StartRankedSearchEvent
+
+
+_SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema.sql')
+
+
+class EngineTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'airport.db')
+
+        with open(_SCHEMA_PATH) as schema_file:
+            schema = schema_file.read()
+        connection = sqlite3.connect(self.path)
+        connection.executescript(schema)
+        connection.execute("INSERT INTO continent VALUES (1, 'EU', 'Europe'), (2, 'NA', 'North America')")
+        connection.executemany("INSERT INTO country VALUES (?, ?, ?, 1, '', 'keywords')",
+                               [(country_id, f'C{country_id}', f'Country {country_id % 2}')
+                                for country_id in range(1, 21)])
+        connection.commit()
+        connection.close()
+
+        self.engine = Engine()
+        self.opened = self.process(OpenDatabaseEvent(self.path))
+        self.addCleanup(self.process, CloseDatabaseEvent())
+
+    def process(self, event):
+        return list(self.engine.process_event(event))
+
+    def stored_continent(self, continent_id):
+        connection = sqlite3.connect(self.path)
+        try:
+            return connection.execute(
+                "SELECT * FROM continent WHERE continent_id = ?", (continent_id,)).fetchone()
+        finally:
+            connection.close()
+
+
+class SaveNewRecordTests(EngineTestCase):
+    def test_duplicate_code_keeps_earlier_edits(self):
+        self.process(SaveContinentEvent(Continent(1, 'EU', 'Europa')))
+
+        results = self.process(SaveNewContinentEvent(Continent(None, 'NA', 'Duplicate')))
+        self.assertIsInstance(results[0], SaveContinentFailedEvent)
+
+        loaded = self.process(LoadContinentEvent(1))
+        self.assertEqual(loaded[0].continent(), Continent(1, 'EU', 'Europa'))
+
+        self.engine.connection.commit()
+        self.assertEqual(self.stored_continent(1), (1, 'EU', 'Europa'))
+
+    def test_missing_keywords_are_reported_as_missing(self):
+        results = self.process(SaveNewCountryEvent(Country(None, 'XX', 'New', 1, '', '')))
+        self.assertEqual(results[0].reason(), 'Please enter a keyword')
+
+        results = self.process(SaveNewRegionEvent(Region(None, 'XX-1', '1', 'New', 1, 1, '', '')))
+        self.assertEqual(results[0].reason(), 'Enter a keyword')
+
+
+class SaveRecordTests(EngineTestCase):
+    def test_saving_a_missing_record_fails_and_is_not_cached(self):
+        results = self.process(SaveContinentEvent(Continent(99, 'AN', 'Antarctica')))
+        self.assertIsInstance(results[0], SaveContinentFailedEvent)
+        self.assertIsNone(self.engine.entity_cache.get('continent', 99))
+
+
+class ReadOnlyProfileTests(EngineTestCase):
+    def test_saves_are_refused_when_read_only(self):
+        self.process(OpenDatabaseEvent(self.path, 'read-only'))
+
+        results = self.process(SaveNewContinentEvent(Continent(None, 'AF', 'Africa')))
+        self.assertIsInstance(results[0], SaveContinentFailedEvent)
+        results = self.process(SaveContinentEvent(Continent(1, 'EU', 'Europa')))
+        self.assertIsInstance(results[0], SaveContinentFailedEvent)
+        self.assertEqual(self.stored_continent(1), (1, 'EU', 'Europe'))
+
+    def test_read_only_snapshot_can_be_changed(self):
+        self.process(OpenDatabaseEvent(self.path, 'snapshot'))
+
+        results = self.process(SaveContinentEvent(Continent(1, 'EU', 'Europa')))
+        self.assertIsInstance(results[0], ContinentSavedEvent)
+
+    def test_handler_reports_a_read_only_database(self):
+        connection = sqlite3.connect(f'file:{self.path}?mode=ro', uri = True)
+        self.addCleanup(connection.close)
+
+        result = continentHandler.load_new_continent(
+            connection.cursor(), SaveNewContinentEvent(Continent(None, 'AF', 'Africa')))
+        self.assertIn('readonly', result)
+
+
+class SaveNewRecordsTests(EngineTestCase):
+    def test_each_country_gets_its_own_result(self):
+        new_countries = [
+            Country(None, 'AA', 'Alpha', 1, '', 'keywords'),
+            Country(None, 'C1', 'Taken', 1, '', 'keywords'),
+            Country(None, 'BB', 'No keywords', 1, '', ''),
+            Country(None, 'CC', 'No continent', 99, '', 'keywords'),
+            Country(None, 'AA', 'Repeated', 1, '', 'keywords'),
+            Country(None, 'DD', 'Delta', 2, '', 'keywords')
+        ]
+        results = self.process(SaveNewCountriesEvent(new_countries))[0].results()
+
+        self.assertEqual([result.reason for result in results],
+                         [None, 'Country Code already exists', 'Please enter a keyword',
+                          'Please enter valid continent id', 'Country Code already exists', None])
+        self.assertEqual(results[0].country, new_countries[0]._replace(country_id = 21))
+        self.assertEqual(results[5].country, new_countries[5]._replace(country_id = 22))
+
+        loaded = self.process(LoadCountryEvent(22))
+        self.assertEqual(loaded[0].country(), results[5].country)
+
+
+class FullTextTests(EngineTestCase):
+    def test_indexes_are_built_when_the_database_is_opened(self):
+        built = [event for event in self.opened if isinstance(event, IndexesBuiltEvent)]
+        self.assertIn('country_fts', built[0].index_names())
+
+    def test_search_does_not_commit_pending_edits(self):
+        for build_on_search in (False, True):
+            if build_on_search:
+                fulltext.drop_fulltext(self.engine.connection)
+                self.engine.connection.commit()
+            self.process(SaveContinentEvent(Continent(1, 'EU', 'Europa')))
+
+            results = self.process(StartRankedSearchEvent('country', 'Country'))
+            self.assertEqual(len(results), 20)
+            self.assertIsInstance(results[0], RankedSearchResultEvent)
+
+            self.assertTrue(self.engine.connection.in_transaction)
+            self.assertEqual(self.stored_continent(1), (1, 'EU', 'Europe'))
+            self.engine.connection.rollback()
+
+
+class InsertBatchTests(EngineTestCase):
+    def test_rejected_row_keeps_other_rows_and_earlier_edits(self):
+        self.process(SaveContinentEvent(Continent(1, 'EU', 'Europa')))
+
+        errors = batch.insert_batch(self.engine.connection, "INSERT INTO continent (continent_code, name) VALUES (?, ?)",
+                                    [('AF', 'Africa'), ('NA', 'Duplicate'), ('AS', 'Asia')])
+        self.assertIsNone(errors[0])
+        self.assertTrue(batch.is_duplicate(errors[1]))
+        self.assertIsNone(errors[2])
+
+        self.assertEqual(self.stored_continent(1), (1, 'EU', 'Europa'))
+        codes = {row[0] for row in self.engine.connection.execute("SELECT continent_code FROM continent")}
+        self.assertEqual(codes, {'EU', 'NA', 'AF', 'AS'})
+
+
+class SearchPageTests(EngineTestCase):
+    def test_page_size_must_be_positive(self):
+        for page_size in (0, -1):
+            results = self.process(StartCountrySearchPageEvent(None, 'Country 1', page_size))
+            self.assertIsInstance(results[0], ErrorEvent)
+
+    def test_token_only_continues_its_own_search(self):
+        first = self.process(StartCountrySearchPageEvent(None, 'Country 1', 3))[0]
+        token = first.next_page_token()
+
+        second = self.process(StartCountrySearchPageEvent(None, 'Country 1', 3, token))[0]
+        self.assertEqual([country.country_id for country in second.countries()], [7, 9, 11])
+
+        results = self.process(StartCountrySearchPageEvent(None, 'Country 0', 3, token))
+        self.assertIsInstance(results[0], ErrorEvent)
+
+
+class SearchBudgetTests(EngineTestCase):
+    def test_slow_consumer_does_not_truncate_a_finished_search(self):
+        results = []
+        for result in self.engine.process_event(StartContinentSearchEvent('EU', None, time_budget = 0.05)):
+            results.append(result)
+            time.sleep(0.1)
+
+        self.assertEqual(len(results), 1)
+        self.assertIsInstance(results[0], ContinentSearchResultEvent)
+        self.assertEqual(self.engine.search_cache.stats().size, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+# p2app/engine/test_event_bus.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Tests of the event bus's asynchronous mode, with a stand-in engine and view.
+
+import threading
+import time
+import unittest
+from unittest import mock
+
+from p2app.events.event_bus import EventBus
+
+
+class _Search:
+    def __init__(self, name, count):
+        self.name = name
+        self.count = count
+
+
+class _Engine:
+    """Processes a 'slow' event by waiting until it's released, and a _Search by
+    yielding (name, i) for each of its results; only searches supersede others."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.searches_run = []
+
+    def preempt(self, event):
+        return isinstance(event, _Search)
+
+    def process_event(self, event):
+        if event == 'slow':
+            self.release.wait()
+            yield 'slow done'
+        else:
+            self.searches_run.append(event.name)
+            for i in range(event.count):
+                yield event.name, i
+
+
+class _View:
+    def __init__(self, fail_on = None):
+        self.received = []
+        self.fail_on = fail_on
+        self._callback = None
+
+    def after(self, milliseconds, callback):
+        self._callback = callback
+
+    def handle_event(self, event):
+        if event == self.fail_on:
+            raise RuntimeError('the view failed')
+        self.received.append(event)
+
+    def run_until(self, condition, timeout = 10):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                raise AssertionError('timed out')
+            callback, self._callback = self._callback, None
+            callback()
+            time.sleep(0.001)
+
+
+class AsynchronousEventBusTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = _Engine()
+
+    def start_bus(self, view, **options):
+        bus = EventBus(asynchronous = True, **options)
+        bus.register_view(view)
+        bus.register_engine(self.engine)
+        return bus
+
+    def test_superseded_search_waiting_its_turn_never_runs(self):
+        view = _View()
+        bus = self.start_bus(view)
+
+        bus.initiate_event('slow')
+        bus.initiate_event(_Search('old', 50000))
+        bus.initiate_event(_Search('new', 3))
+        self.engine.release.set()
+
+        view.run_until(lambda: len(view.received) == 4)
+        self.assertEqual(view.received, ['slow done', ('new', 0), ('new', 1), ('new', 2)])
+        self.assertEqual(self.engine.searches_run, ['new'])
+
+    def test_results_of_a_superseded_search_are_discarded(self):
+        view = _View()
+        bus = self.start_bus(view, max_pending_results = 10)
+
+        bus.initiate_event(_Search('old', 5000))
+        time.sleep(0.05)
+        bus.initiate_event(_Search('new', 3))
+
+        view.run_until(lambda: ('new', 2) in view.received)
+        self.assertEqual([event for event in view.received if event[0] == 'new'],
+                         [('new', 0), ('new', 1), ('new', 2)])
+        self.assertLess(len(view.received), 100)
+
+    def test_results_queue_is_bounded(self):
+        view = _View()
+        bus = self.start_bus(view, max_pending_results = 10)
+
+        bus.initiate_event(_Search('big', 50000))
+        time.sleep(0.1)
+        self.assertLessEqual(bus._results.qsize(), 10)
+
+    def test_failing_view_does_not_stop_delivery(self):
+        view = _View(fail_on = ('search', 0))
+        bus = self.start_bus(view)
+
+        bus.initiate_event(_Search('search', 3))
+        with mock.patch('traceback.print_exc'):
+            view.run_until(lambda: len(view.received) == 2)
+        self.assertEqual(view.received, [('search', 1), ('search', 2)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+# p2app/engine/test_fuzzy.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Tests of fuzzy matching of country and region names.
+
+import unittest
+
+from p2app.engine import fuzzy
+from p2app.events.countries import Country
+from p2app.events.regions import Region
+
+
+def country(country_id, name):
+    return Country(country_id, f'C{country_id}', name, 1, '', 'keywords')
+
+
+class TrigramTests(unittest.TestCase):
+    def test_words_are_padded_and_punctuation_separates_them(self):
+        self.assertEqual(fuzzy.trigrams('Ab-c'), {'  a', ' ab', 'ab ', '  c', ' c '})
+
+    def test_empty_text_has_no_trigrams(self):
+        self.assertEqual(fuzzy.trigrams(''), frozenset())
+        self.assertEqual(fuzzy.trigrams(None), frozenset())
+
+
+class TrigramIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.index = fuzzy.TrigramIndex()
+        for record in (country(1, 'Switzerland'), country(2, 'Sweden'), country(3, 'Côte d\'Ivoire')):
+            self.index.update('country', record)
+
+    def test_misspelled_name_finds_the_closest_match_first(self):
+        matches = self.index.search('country', 'Swtizerland')
+        self.assertEqual(matches[0][0], country(1, 'Switzerland'))
+        self.assertTrue(all(similarity >= fuzzy.DEFAULT_THRESHOLD for record, similarity in matches))
+
+    def test_accents_are_ignored(self):
+        matches = self.index.search('country', "cote d'ivoire")
+        self.assertEqual(matches, [(country(3, 'Côte d\'Ivoire'), 1.0)])
+
+    def test_saved_record_replaces_its_old_entry(self):
+        self.index.update('country', country(2, 'Norway'))
+        self.assertEqual(self.index.search('country', 'Sweden'), [])
+        self.assertEqual(self.index.search('country', 'Norway')[0][0], country(2, 'Norway'))
+
+    def test_removed_record_is_not_found(self):
+        self.index.remove('country', 1)
+        self.assertEqual(self.index.search('country', 'Switzerland'), [])
+
+    def test_tables_are_searched_separately(self):
+        self.index.update('region', Region(1, 'XX-SW', 'SW', 'Sweden', 1, 2, '', ''))
+        self.assertEqual([record for record, similarity in self.index.search('country', 'Sweden')],
+                         [country(2, 'Sweden')])
+
+    def test_other_tables_cannot_be_searched(self):
+        with self.assertRaises(ValueError):
+            self.index.search('airport', 'Zurich')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,283 @@
+# p2app/engine/test_release.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Tests of importing a release of the OurAirports data, using a small release
+# written by the tests themselves.
+
+import csv
+import os
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from p2app.engine import fulltext
+from p2app.engine import importer
+from p2app.engine import parallel_loader
+from p2app.engine import spatial
+from p2app.engine import sync
+from p2app.engine.main import Engine
+from p2app.events.database import CloseDatabaseEvent, OpenDatabaseEvent
+from p2app.events.imports import SyncReleaseEvent
+from p2app.events.runways import BestRunwaysEvent, StartBestRunwaysEvent
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+_SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema.sql')
+
+_HEADERS = {
+    'countries.csv': ['id', 'code', 'name', 'continent', 'wikipedia_link', 'keywords'],
+    'regions.csv': ['id', 'code', 'local_code', 'name', 'continent', 'iso_country', 'wikipedia_link', 'keywords'],
+    'airports.csv': ['id', 'ident', 'type', 'name', 'latitude_deg', 'longitude_deg', 'elevation_ft', 'continent',
+                     'iso_country', 'iso_region', 'municipality', 'scheduled_service', 'gps_code', 'iata_code',
+                     'local_code', 'home_link', 'wikipedia_link', 'keywords'],
+    'airport-frequencies.csv': ['id', 'airport_ref', 'airport_ident', 'type', 'description', 'frequency_mhz'],
+    'runways.csv': ['id', 'airport_ref', 'airport_ident', 'length_ft', 'width_ft', 'surface', 'lighted', 'closed',
+                    'le_ident', 'le_latitude_deg', 'le_longitude_deg', 'le_elevation_ft', 'le_heading_degT',
+                    'le_displaced_threshold_ft', 'he_ident', 'he_latitude_deg', 'he_longitude_deg',
+                    'he_elevation_ft', 'he_heading_degT', 'he_displaced_threshold_ft'],
+    'navaids.csv': ['id', 'filename', 'ident', 'name', 'type', 'frequency_khz', 'latitude_deg', 'longitude_deg',
+                    'elevation_ft', 'iso_country', 'dme_frequency_khz', 'dme_channel', 'dme_latitude_deg',
+                    'dme_longitude_deg', 'dme_elevation_ft', 'slaved_variation_deg', 'magnetic_variation_deg',
+                    'usageType', 'power', 'associated_airport']
+}
+
+
+def release_rows():
+    """Returns the rows of a small release, as a dict mapping each file's name to a
+    list of dicts, which a test may change before writing the release"""
+    return {
+        'countries.csv': [
+            {'id': 1, 'code': 'CH', 'name': 'Switzerland', 'continent': 'EU', 'keywords': 'Schweiz'},
+            {'id': 2, 'code': 'US', 'name': 'United States', 'continent': 'NA', 'keywords': 'America'}
+        ],
+        'regions.csv': [
+            {'id': 10, 'code': 'CH-ZH', 'local_code': 'ZH', 'name': 'Zürich', 'continent': 'EU', 'iso_country': 'CH'},
+            {'id': 11, 'code': 'US-CA', 'local_code': 'CA', 'name': 'California', 'continent': 'NA',
+             'iso_country': 'US', 'keywords': 'Golden State'}
+        ],
+        'airports.csv': [
+            {'id': 100, 'ident': 'LSZH', 'type': 'large_airport', 'name': 'Zürich Airport', 'latitude_deg': 47.46,
+             'longitude_deg': 8.55, 'elevation_ft': 1416, 'continent': 'EU', 'iso_country': 'CH',
+             'iso_region': 'CH-ZH', 'municipality': 'Zurich', 'scheduled_service': 'yes'},
+            {'id': 101, 'ident': 'KSFO', 'type': 'large_airport', 'name': 'San Francisco International Airport',
+             'latitude_deg': 37.62, 'longitude_deg': -122.38, 'elevation_ft': 13, 'continent': 'NA',
+             'iso_country': 'US', 'iso_region': 'US-CA', 'municipality': 'San Francisco', 'scheduled_service': 'yes'},
+            {'id': 102, 'ident': 'KOAK', 'type': 'medium_airport', 'name': 'Oakland International Airport',
+             'latitude_deg': 37.72, 'longitude_deg': -122.22, 'elevation_ft': 9, 'continent': 'NA',
+             'iso_country': 'US', 'iso_region': 'US-CA', 'municipality': 'Oakland', 'scheduled_service': 'no'}
+        ],
+        'airport-frequencies.csv': [
+            {'id': 1000, 'airport_ref': 101, 'airport_ident': 'KSFO', 'type': 'TWR', 'frequency_mhz': 120.5}
+        ],
+        'runways.csv': [
+            {'id': 2000, 'airport_ref': 100, 'airport_ident': 'LSZH', 'length_ft': 12139, 'width_ft': 197,
+             'surface': 'CON', 'lighted': 1, 'closed': 0, 'le_ident': '16', 'he_ident': '34'},
+            {'id': 2001, 'airport_ref': 101, 'airport_ident': 'KSFO', 'length_ft': 11870, 'width_ft': 200,
+             'surface': 'ASP', 'lighted': 1, 'closed': 0, 'le_ident': '10L', 'le_heading_degT': 118,
+             'he_ident': '28R', 'he_heading_degT': 298},
+            {'id': 2002, 'airport_ref': 102, 'airport_ident': 'KOAK', 'length_ft': 10520, 'width_ft': 150,
+             'surface': 'ASP', 'lighted': 1, 'closed': 0, 'le_ident': '12', 'he_ident': '30'}
+        ],
+        'navaids.csv': [
+            {'id': 3000, 'filename': 'SFO', 'ident': 'SFO', 'name': 'San Francisco', 'type': 'VOR-DME',
+             'frequency_khz': 115800, 'latitude_deg': 37.6, 'longitude_deg': -122.3, 'iso_country': 'US',
+             'associated_airport': 'KSFO'}
+        ]
+    }
+
+
+def write_release(directory, rows, byte_order_mark = False):
+    """Writes the files of a release, with the given rows, into a directory"""
+    encoding = 'utf-8-sig' if byte_order_mark else 'utf-8'
+    for file_name, header in _HEADERS.items():
+        with open(Path(directory) / file_name, 'w', newline = '', encoding = encoding) as csv_file:
+            writer = csv.DictWriter(csv_file, header, quoting = csv.QUOTE_NONNUMERIC)
+            writer.writeheader()
+            writer.writerows(rows[file_name])
+
+
+class ReleaseTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.release = self.directory / 'release'
+        self.release.mkdir()
+
+        with open(_SCHEMA_PATH) as schema_file:
+            schema = schema_file.read()
+        self.connection = sqlite3.connect(self.directory / 'airport.db')
+        self.addCleanup(self.connection.close)
+        self.connection.executescript(schema)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+
+    def count(self, table):
+        return self.connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def schema_objects(self):
+        return set(self.connection.execute("SELECT type, name FROM sqlite_master"))
+
+
+class ImportReleaseTests(ReleaseTestCase):
+    def test_every_table_is_loaded(self):
+        write_release(self.release, release_rows())
+        results = importer.import_release(self.connection, self.release)
+
+        loaded = {result.table: result.loaded for result in results}
+        self.assertEqual(loaded['country'], 2)
+        self.assertEqual(loaded['region'], 2)
+        self.assertEqual(loaded['airport'], 3)
+        self.assertEqual(loaded['runway'], 3)
+        for table, rows in loaded.items():
+            self.assertEqual(self.count(table), rows)
+
+        self.assertEqual(self.connection.execute(
+            "SELECT airport_ident FROM airport WHERE airport_id = 101").fetchone(), ('KSFO',))
+
+    def test_byte_order_mark_is_ignored(self):
+        write_release(self.release, release_rows(), byte_order_mark = True)
+        results = importer.import_release(self.connection, self.release)
+
+        self.assertEqual({result.table: result.loaded for result in results}['airport'], 3)
+
+    def test_failed_import_leaves_the_database_as_it_was(self):
+        write_release(self.release, release_rows())
+        importer.import_release(self.connection, self.release)
+        fulltext.ensure_fulltext(self.connection)
+        spatial.ensure_spatial_index(self.connection)
+        objects = self.schema_objects()
+
+        rows = release_rows()
+        del rows['airports.csv'][0]
+        rows['runways.csv'][2]['length_ft'] = 'very long'
+        write_release(self.release, rows)
+        # The indexes are only rebuilt after the transaction ends, by which time the
+        # rollback should already have brought back everything that was dropped
+        objects_before_rebuild = []
+        ensure_indexes = importer.indexes.ensure_indexes
+        def record_objects(connection):
+            objects_before_rebuild.append(self.schema_objects())
+            return ensure_indexes(connection)
+
+        with mock.patch.object(importer.indexes, 'ensure_indexes', record_objects):
+            with self.assertRaises(ValueError):
+                importer.import_release(self.connection, self.release)
+
+        self.assertEqual(objects_before_rebuild, [objects])
+        self.assertEqual(self.count('airport'), 3)
+        self.assertEqual(self.count('runway'), 3)
+        self.assertEqual(self.schema_objects(), objects)
+
+
+class ParallelLoaderTests(ReleaseTestCase):
+    def many_airports(self):
+        rows = release_rows()
+        for number in range(200):
+            rows['airports.csv'].append(
+                {'id': 1000 + number, 'ident': f'X{number:03}', 'type': 'small_airport',
+                 'name': f'Airport {number}', 'latitude_deg': 40 + number / 100, 'longitude_deg': -100,
+                 'continent': 'NA', 'iso_country': 'US', 'iso_region': 'US-CA',
+                 'keywords': f'line one\n"quoted", line two {number}'})
+        return rows
+
+    def test_ranges_begin_at_rows_and_cover_the_file(self):
+        write_release(self.release, self.many_airports(), byte_order_mark = True)
+        path = self.release / 'airports.csv'
+
+        fieldnames, ranges = parallel_loader.split_ranges(path, chunk_bytes = 1000)
+        self.assertEqual(fieldnames, _HEADERS['airports.csv'])
+        self.assertGreater(len(ranges), 5)
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, start)
+        self.assertEqual(ranges[-1][1], path.stat().st_size)
+
+        with open(path, newline = '', encoding = 'utf-8-sig') as csv_file:
+            expected = list(csv.DictReader(csv_file))
+        parsed = []
+        with open(path, 'rb') as csv_file:
+            for start, end in ranges:
+                csv_file.seek(start)
+                text = csv_file.read(end - start).decode('utf-8')
+                parsed.extend(csv.DictReader(text.splitlines(keepends = True), fieldnames = fieldnames))
+        self.assertEqual(parsed, expected)
+
+    def test_parallel_import_matches_sequential_import(self):
+        write_release(self.release, self.many_airports())
+        importer.import_release(self.connection, self.release)
+        sequential = self.connection.execute("SELECT * FROM airport ORDER BY airport_id").fetchall()
+
+        results = importer.import_release(self.connection, self.release, workers = 2)
+        self.assertEqual({result.table: result.loaded for result in results}['airport'], 203)
+        self.assertEqual(self.connection.execute("SELECT * FROM airport ORDER BY airport_id").fetchall(), sequential)
+
+
+class SyncReleaseTests(ReleaseTestCase):
+    def setUp(self):
+        super().setUp()
+        write_release(self.release, release_rows())
+        importer.import_release(self.connection, self.release)
+
+    def test_only_changed_rows_are_applied(self):
+        rows = release_rows()
+        rows['countries.csv'][0]['name'] = 'Swiss Confederation'
+        rows['airports.csv'][1]['latitude_deg'] = 37.6189
+        del rows['airports.csv'][2]
+        del rows['runways.csv'][2]
+        rows['airports.csv'].append(
+            {'id': 103, 'ident': 'KSJC', 'type': 'medium_airport', 'name': 'San Jose', 'latitude_deg': 37.36,
+             'longitude_deg': -121.93, 'continent': 'NA', 'iso_country': 'US', 'iso_region': 'US-CA'})
+        write_release(self.release, rows)
+
+        results = {result.table: result for result in sync.sync_release(self.connection, self.release)}
+
+        self.assertEqual(results['country'].updated, ['CH'])
+        self.assertEqual(results['region'].updated, [])
+        self.assertEqual(results['airport'].inserted, ['KSJC'])
+        self.assertEqual(results['airport'].updated, ['KSFO'])
+        self.assertEqual(results['airport'].deleted, ['KOAK'])
+
+        self.assertEqual(self.connection.execute(
+            "SELECT name FROM country WHERE country_code = 'CH'").fetchone(), ('Swiss Confederation',))
+        self.assertEqual(self.connection.execute(
+            "SELECT airport_id, latitude_deg FROM airport WHERE airport_ident = 'KSFO'").fetchone(), (101, 37.6189))
+        self.assertEqual(self.connection.execute(
+            "SELECT COUNT(*) FROM runway WHERE airport_id = 102").fetchone(), (0,))
+
+    def test_unchanged_release_changes_nothing(self):
+        results = sync.sync_release(self.connection, self.release)
+
+        for result in results:
+            self.assertEqual((result.inserted, result.updated, result.deleted), ([], [], []))
+
+    @unittest.skipUnless(numpy, 'NumPy is not installed')
+    def test_engine_forgets_the_runways_of_deleted_airports(self):
+        self.connection.commit()
+        engine = Engine()
+        list(engine.process_event(OpenDatabaseEvent(self.directory / 'airport.db')))
+        self.addCleanup(lambda: list(engine.process_event(CloseDatabaseEvent())))
+
+        best_runways = StartBestRunwaysEvent([102], [120.0], [10.0])
+        before = list(engine.process_event(best_runways))[0]
+        self.assertIsInstance(before, BestRunwaysEvent)
+        self.assertIsNotNone(before.best_runway_ends()[0])
+
+        rows = release_rows()
+        del rows['airports.csv'][2]
+        del rows['runways.csv'][2]
+        write_release(self.release, rows)
+        list(engine.process_event(SyncReleaseEvent(self.release)))
+
+        after = list(engine.process_event(best_runways))[0]
+        self.assertEqual(after.best_runway_ends(), [None])
+
+
+if __name__ == '__main__':
+    unittest.main()
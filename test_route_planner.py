@@ -0,0 +1,98 @@
+# p2app/engine/test_route_planner.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Tests of planning routes between airports, over a handful of airports laid out
+# along the equator, where a degree of longitude is about 111 km.
+
+import unittest
+
+from p2app.engine import importer
+from p2app.engine import route_planner
+from p2app.engine import runway_summary
+from p2app.engine import spatial
+from p2app.engine.test_release import ReleaseTestCase, release_rows, write_release
+
+
+# (airport_id, ident, latitude, longitude, runway length): four airports 400 km apart
+# in a straight line, and one off to the side that's within 700 km of both ends
+_AIRPORTS = [
+    (200, 'EQ00', 0.0, 0.0, 10000),
+    (201, 'EQ04', 0.0, 3.6, 10000),
+    (202, 'EQ08', 0.0, 7.2, 10000),
+    (203, 'EQ12', 0.0, 10.8, 10000),
+    (204, 'EQNE', 2.7, 5.4, 10000)
+]
+
+
+class RoutePlannerTests(ReleaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write_airports(_AIRPORTS)
+        self.cursor = self.connection.cursor()
+
+    def write_airports(self, airports):
+        rows = release_rows()
+        for airport_id, ident, latitude, longitude, length_ft in airports:
+            rows['airports.csv'].append(
+                {'id': airport_id, 'ident': ident, 'type': 'small_airport', 'name': ident,
+                 'latitude_deg': latitude, 'longitude_deg': longitude, 'continent': 'NA',
+                 'iso_country': 'US', 'iso_region': 'US-CA'})
+            rows['runways.csv'].append(
+                {'id': airport_id * 100, 'airport_ref': airport_id, 'airport_ident': ident, 'length_ft': length_ft,
+                 'width_ft': 100, 'surface': 'ASP', 'lighted': 0, 'closed': 0, 'le_ident': '09', 'he_ident': '27'})
+        write_release(self.release, rows)
+        importer.import_release(self.connection, self.release)
+        spatial.ensure_spatial_index(self.connection)
+        runway_summary.ensure_runway_summary(self.connection)
+
+    def plan(self, range_km, min_runway_length_ft = 8000, objective = route_planner.SHORTEST_DISTANCE):
+        return route_planner.plan_route(self.cursor, 200, 203, range_km, min_runway_length_ft, objective)
+
+    def idents(self, route):
+        return [airport.airport_ident for airport in route.airports]
+
+    def test_shortest_route_flies_in_a_straight_line(self):
+        route = self.plan(700.0)
+
+        self.assertEqual(self.idents(route), ['EQ00', 'EQ04', 'EQ08', 'EQ12'])
+        self.assertEqual(len(route.leg_distances_km), 3)
+        self.assertAlmostEqual(route.total_distance_km, sum(route.leg_distances_km))
+        self.assertTrue(all(leg <= 700.0 for leg in route.leg_distances_km))
+
+    def test_fewest_hops_may_fly_farther(self):
+        route = self.plan(700.0, objective = route_planner.FEWEST_HOPS)
+
+        self.assertEqual(self.idents(route), ['EQ00', 'EQNE', 'EQ12'])
+        self.assertGreater(route.total_distance_km, self.plan(700.0).total_distance_km)
+
+    def test_direct_flight_when_in_range(self):
+        # Every route along the line is as short as the direct one, so only the hops decide
+        route = self.plan(1300.0, objective = route_planner.FEWEST_HOPS)
+
+        self.assertEqual(self.idents(route), ['EQ00', 'EQ12'])
+
+    def test_airports_with_short_runways_are_avoided(self):
+        self.connection.execute("UPDATE runway SET length_ft = 5000 WHERE airport_id = 201")
+
+        route = self.plan(700.0)
+
+        self.assertEqual(self.idents(route), ['EQ00', 'EQNE', 'EQ12'])
+
+    def test_no_route_when_out_of_range(self):
+        self.assertIsNone(self.plan(300.0))
+
+    def test_invalid_requests_are_rejected(self):
+        with self.assertRaises(ValueError):
+            self.plan(700.0, min_runway_length_ft = 20000)
+        with self.assertRaises(ValueError):
+            self.plan(0.0)
+        with self.assertRaises(ValueError):
+            self.plan(700.0, objective = 'fastest')
+        with self.assertRaises(ValueError):
+            route_planner.plan_route(self.cursor, 200, 999, 700.0, 8000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+# p2app/engine/test_spatial.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Tests of finding airports by location with the R*Tree index, using the small
+# release written by test_release.
+
+import unittest
+
+from p2app.engine import importer
+from p2app.engine import spatial
+from p2app.engine.test_release import ReleaseTestCase, release_rows, write_release
+
+
+class SpatialTestCase(ReleaseTestCase):
+    def setUp(self):
+        super().setUp()
+        write_release(self.release, release_rows())
+        importer.import_release(self.connection, self.release)
+        spatial.ensure_spatial_index(self.connection)
+        self.cursor = self.connection.cursor()
+
+    def idents(self, airports):
+        return [airport.airport_ident for airport in airports]
+
+
+class SpatialQueryTests(SpatialTestCase):
+    def test_airports_within_are_nearest_first(self):
+        results = spatial.airports_within(self.cursor, 37.62, -122.38, 30.0)
+
+        self.assertEqual(self.idents(airport for airport, distance in results), ['KSFO', 'KOAK'])
+        self.assertAlmostEqual(results[0][1], 0.0)
+        self.assertLess(results[1][1], 30.0)
+
+    def test_box_may_cross_the_antimeridian(self):
+        airports = spatial.airports_in_box(self.cursor, 30.0, 170.0, 40.0, -122.3)
+
+        self.assertEqual(self.idents(airports), ['KSFO'])
+
+    def test_nearest_airports_widen_the_search_until_there_are_enough(self):
+        results = spatial.nearest_airports(self.cursor, 37.62, -122.38, 3)
+
+        self.assertEqual(self.idents(airport for airport, distance in results), ['KSFO', 'KOAK', 'LSZH'])
+
+    def test_filters_apply_to_every_query(self):
+        results = spatial.airports_within(self.cursor, 37.62, -122.38, 30.0, airport_type = 'medium_airport')
+        self.assertEqual(self.idents(airport for airport, distance in results), ['KOAK'])
+
+        airports = spatial.airports_in_box(self.cursor, 30.0, -125.0, 50.0, 10.0, scheduled_service = True)
+        self.assertEqual(self.idents(airports), ['LSZH', 'KSFO'])
+
+
+class SpatialIndexTests(SpatialTestCase):
+    def test_index_follows_changes_to_airports(self):
+        self.connection.execute("UPDATE airport SET latitude_deg = 47.0, longitude_deg = 8.0 WHERE airport_id = 102")
+        self.connection.execute("DELETE FROM runway WHERE airport_id = 101")
+        self.connection.execute("DELETE FROM airport_frequency WHERE airport_id = 101")
+        self.connection.execute("UPDATE navigation_aid SET airport_id = NULL WHERE airport_id = 101")
+        self.connection.execute("DELETE FROM airport WHERE airport_id = 101")
+
+        results = spatial.airports_within(self.cursor, 37.62, -122.38, 100.0)
+        self.assertEqual(results, [])
+        airports = spatial.airports_in_box(self.cursor, 46.0, 7.0, 48.0, 9.0)
+        self.assertEqual(self.idents(airports), ['LSZH', 'KOAK'])
+
+    def test_index_is_only_created_once(self):
+        self.assertFalse(spatial.ensure_spatial_index(self.connection))
+        self.assertTrue(spatial.drop_spatial_index(self.connection))
+        self.assertFalse(spatial.drop_spatial_index(self.connection))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,27 @@
+# p2app/engine/text.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Normalization of names and codes, so that the in-memory indexes the engine
+# keeps match them regardless of case and accents (e.g., "zurich" matches
+# "Zürich").
+
+import unicodedata
+
+
+def fold(text):
+    """
+    Normalize text for matching: decompose it, drop the accents that decomposition
+    separates out, and fold its case.
+
+    Args:
+        text (str or None): The text to normalize.
+
+    Returns:
+        str: The normalized text, which is empty if text was None.
+    """
+    if not text:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(character for character in decomposed if not unicodedata.combining(character)).casefold()